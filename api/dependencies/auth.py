@@ -1,24 +1,44 @@
-from typing import Annotated, Union
+from dataclasses import dataclass
+from typing import Annotated, List, Union
+from uuid import UUID
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.config import settings
+from core.revocation import revocation_list
+from core.security import decode_token
 
 from db.dals.user_dal import UserDAL
 from db.models import User
-from db.session import get_db
+from api.dependencies.db import ReadSession
 from core.hashing import verify_password
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
 
+@dataclass(frozen=True, slots=True)
+class TokenUser:
+    """Identity taken from a verified access token, without a DB round trip"""
+
+    user_id: UUID
+    email: str
+    role: List[str]
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
 async def get_user_by_email(
     email: str,
-    session: Annotated[AsyncSession, Depends(get_db)]
+    session: Annotated[AsyncSession, ReadSession]
 ) -> Union[User, None]:
     
     dal = UserDAL(session)
@@ -28,7 +48,7 @@ async def get_user_by_email(
 async def authenticate_user(
     email: str,
     password: str,
-    session: Annotated[AsyncSession, Depends(get_db)]
+    session: Annotated[AsyncSession, ReadSession]
 ) -> Union[User, None]:
     
     user = await get_user_by_email(email, session)
@@ -41,41 +61,56 @@ async def authenticate_user(
     return user
 
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    session: Annotated[AsyncSession, Depends(get_db)]
-) -> User:
-    
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+async def get_token_payload(
+    token: Annotated[str, Depends(oauth2_scheme)]
+) -> dict:
 
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
-        email: str | None = payload.get("sub")
-        if email is None:
-            raise credentials_exception
+        payload = decode_token(token)
     except JWTError as e:
-        raise credentials_exception from e
+        raise _credentials_exception() from e
 
-    user = await get_user_by_email(email, session)
+    if payload.get("sub") is None:
+        raise _credentials_exception()
+
+    session_id = payload.get("sid")
+    if session_id is not None and revocation_list.is_revoked(session_id):
+        raise _credentials_exception()
+
+    return payload
+
+
+async def get_current_principal(
+    payload: Annotated[dict, Depends(get_token_payload)]
+) -> TokenUser:
+
+    try:
+        return TokenUser(
+            user_id=UUID(payload["uid"]),
+            email=payload["sub"],
+            role=list(payload.get("roles") or []),
+        )
+    except (KeyError, ValueError) as e:
+        raise _credentials_exception() from e
+
+
+async def get_current_user(
+    payload: Annotated[dict, Depends(get_token_payload)],
+    session: Annotated[AsyncSession, ReadSession]
+) -> User:
+
+    user = await get_user_by_email(payload["sub"], session)
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
 
     return user
 
 async def require_admin(
-    current_user: Annotated[User, Depends(get_current_user)]
-) -> User:
+    current_user: Annotated[TokenUser, Depends(get_current_principal)]
+) -> TokenUser:
     if "admin" not in current_user.role:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Доступ только для администраторов"
         )
-    return current_user
\ No newline at end of file
+    return current_user
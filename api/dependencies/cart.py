@@ -1,16 +1,22 @@
 from fastapi import Depends, HTTPException, status
 
-from api.dependencies.auth import get_current_user
+from api.dependencies.auth import TokenUser, get_current_principal
+from api.dependencies.db import UnitOfWork
+from core.cart_store import get_cart_store
 from db.dals.cart_dal import CartDAL
-from db.models import User, Cart
-from db.session import get_db
+from db.models import Cart
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
 async def get_user_cart(
-    current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db)
+    current_user: TokenUser = Depends(get_current_principal),
+    session: AsyncSession = UnitOfWork
 ) -> Cart:
+    store = get_cart_store()
+    if store is not None:
+        # Pending write-behind edits must be in the database before it is read
+        await store.flush(current_user.user_id)
+
     dal = CartDAL(session)
-    cart = await dal.get_or_create_cart(current_user)
+    cart = await dal.get_or_create_cart(current_user.user_id)
     return cart
\ No newline at end of file
@@ -0,0 +1,11 @@
+from fastapi import Depends
+
+from db.session import get_read_session, get_uow
+
+# Endpoints that write take UnitOfWork and leave committing to it. Function
+# scope ends the dependency before the response is sent, so the commit (and
+# any error from it) happens while the client is still waiting.
+UnitOfWork = Depends(get_uow, scope="function")
+
+# Endpoints that only read take ReadSession: autocommit, no BEGIN/COMMIT
+ReadSession = Depends(get_read_session)
@@ -0,0 +1,26 @@
+from fastapi import Request
+
+from core.config import Settings, get_settings
+from core.rate_limit import RateLimiter, body_email, client_ip
+
+_registration_settings: Settings | None = None
+_registration_limiters: list[RateLimiter] = []
+
+
+def _get_registration_limiters() -> list[RateLimiter]:
+    """Builds the limiters on first use and again whenever the settings are reconfigured"""
+    global _registration_settings, _registration_limiters
+    settings = get_settings()
+    if settings is not _registration_settings:
+        _registration_limiters = [
+            RateLimiter("users:ip", settings.RATE_LIMIT_USERS_IP, key=client_ip),
+            RateLimiter("users:account", settings.RATE_LIMIT_USERS_ACCOUNT, key=body_email),
+        ] if settings.RATE_LIMIT_ENABLED else []
+        _registration_settings = settings
+    return _registration_limiters
+
+
+async def limit_registration(request: Request) -> None:
+    """Route dependency for sign-up only: reading the profile must not spend the same buckets"""
+    for limiter in _get_registration_limiters():
+        await limiter(request)
@@ -1,13 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
-from typing import List
+from typing import List, Optional
 
-from api.schemas.product import ProductCreate, ProductUpdate, ProductShow
+from api.schemas.product import ProductCreate, ProductImageShow, ProductUpdate, ProductShow
 from api.schemas.category import CategoryCreate, CategoryUpdate, CategoryShow
+from api.schemas.order import OrderShow, OrderStatusState, OrderStatusTransition, OrderStatusTransitionResult
 from api.dependencies.auth import require_admin
+from api.dependencies.db import ReadSession, UnitOfWork
+from core.catalog_cache import invalidate_catalog
+from core.config import get_settings
+from core.images import (
+    FULL_VARIANT, MULTIPART_OVERHEAD, THUMBNAIL_VARIANT, ImageTooLarge, InvalidImage, InvalidUpload,
+    StreamedUpload, get_image_storage, process_upload,
+)
 from db.dals.admin_dal import AdminDAL
-from db.session import get_db
+from db.dals.order_dal import OrderDAL
+from db.models import OPEN_ORDER_STATUSES, OrderStatus
+from db.session import after_commit
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -18,12 +28,14 @@ router = APIRouter(prefix="/admin", tags=["admin"])
 async def create_product(
     data: ProductCreate,
     admin = Depends(require_admin),
-    session: AsyncSession = Depends(get_db)
+    session: AsyncSession = UnitOfWork
 ):
     dal = AdminDAL(session)
-    product = await dal.create_product(**data.dict())
-    await session.commit()
-    await session.refresh(product)
+    try:
+        product = await dal.create_product(**data.dict())
+    except ValueError as e:
+        raise HTTPException(404, str(e))
+    after_commit(session, invalidate_catalog)
     return product
 
 
@@ -31,7 +43,7 @@ async def create_product(
 async def get_product(
     product_id: UUID,
     admin = Depends(require_admin),
-    session: AsyncSession = Depends(get_db)
+    session: AsyncSession = ReadSession
 ):
     dal = AdminDAL(session)
     product = await dal.get_product_by_id(product_id)
@@ -45,12 +57,13 @@ async def update_product(
     product_id: UUID,
     data: ProductUpdate,
     admin = Depends(require_admin),
-    session: AsyncSession = Depends(get_db)
+    session: AsyncSession = UnitOfWork
 ):
     dal = AdminDAL(session)
     updated_id = await dal.update_product(product_id, **data.dict(exclude_unset=True))
     if not updated_id:
         raise HTTPException(404, "Товар не найден")
+    after_commit(session, invalidate_catalog)
     product = await dal.get_product_by_id(product_id)
     return product
 
@@ -59,12 +72,69 @@ async def update_product(
 async def delete_product(
     product_id: UUID,
     admin = Depends(require_admin),
-    session: AsyncSession = Depends(get_db)
+    session: AsyncSession = UnitOfWork
 ):
     dal = AdminDAL(session)
     deleted_id = await dal.delete_product(product_id)
     if not deleted_id:
         raise HTTPException(404, "Товар не найден")
+    after_commit(session, invalidate_catalog)
+
+
+# The body is parsed by the handler itself (see StreamedUpload), so the
+# multipart form is described here instead of with File()
+IMAGE_UPLOAD_BODY = {
+    "required": True,
+    "content": {"multipart/form-data": {"schema": {
+        "type": "object",
+        "properties": {"file": {"type": "string", "format": "binary"}},
+        "required": ["file"],
+    }}},
+}
+
+
+@router.post(
+    "/products/{product_id}/images",
+    response_model=ProductImageShow,
+    status_code=201,
+    openapi_extra={"requestBody": IMAGE_UPLOAD_BODY},
+)
+async def upload_product_image(
+    product_id: UUID,
+    request: Request,
+    admin = Depends(require_admin),
+    session: AsyncSession = UnitOfWork
+):
+    max_body_bytes = get_settings().IMAGE_MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD
+    # Rejected before a single byte of the body is read
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_body_bytes:
+        raise HTTPException(413, "Файл слишком большой")
+
+    dal = AdminDAL(session)
+    # Checked first so an unknown product doesn't cost a resize
+    if not await dal.get_product_by_id(product_id):
+        raise HTTPException(404, "Товар не найден")
+
+    try:
+        upload = StreamedUpload(request.stream(), request.headers.get("content-type", ""), "file", max_body_bytes)
+        await upload.open()
+        if not upload.content_type.startswith("image/"):
+            raise HTTPException(415, "Поддерживаются только изображения")
+        image = await process_upload(upload.chunks(), get_image_storage())
+    except ImageTooLarge:
+        raise HTTPException(413, "Файл слишком большой")
+    except InvalidUpload:
+        raise HTTPException(422, "Ожидается multipart/form-data с полем file")
+    except InvalidImage:
+        raise HTTPException(422, "Файл не является изображением")
+
+    product_image = await dal.add_product_image(
+        product_id, image.key, image.width, image.height, image.variants,
+        image_url=image.url(FULL_VARIANT), thumbnail_url=image.url(THUMBNAIL_VARIANT),
+    )
+    after_commit(session, invalidate_catalog)
+    return product_image
 
 
 # Category 
@@ -73,12 +143,13 @@ async def delete_product(
 async def create_category(
     data: CategoryCreate,
     admin = Depends(require_admin),
-    session: AsyncSession = Depends(get_db)
+    session: AsyncSession = UnitOfWork
 ):
     dal = AdminDAL(session)
-    category = await dal.create_category(**data.dict())
-    await session.commit()
-    await session.refresh(category)
+    try:
+        category = await dal.create_category(**data.dict())
+    except ValueError as e:
+        raise HTTPException(409, str(e))
     return category
 
 
@@ -87,7 +158,7 @@ async def update_category(
     category_id: UUID,
     data: CategoryUpdate,
     admin = Depends(require_admin),
-    session: AsyncSession = Depends(get_db)
+    session: AsyncSession = UnitOfWork
 ):
     dal = AdminDAL(session)
     updated_id = await dal.update_category(category_id, **data.dict(exclude_unset=True))
@@ -101,9 +172,42 @@ async def update_category(
 async def delete_category(
     category_id: UUID,
     admin = Depends(require_admin),
-    session: AsyncSession = Depends(get_db)
+    session: AsyncSession = UnitOfWork
 ):
     dal = AdminDAL(session)
     deleted_id = await dal.delete_category(category_id)
     if not deleted_id:
-        raise HTTPException(404, "Категория не найдена")
\ No newline at end of file
+        raise HTTPException(404, "Категория не найдена")
+
+
+# Orders
+
+@router.get("/orders/open", response_model=List[OrderShow])
+async def get_open_orders(
+    status: Optional[OrderStatus] = None,
+    limit: int = Query(100, ge=1, le=500),
+    admin = Depends(require_admin),
+    session: AsyncSession = ReadSession
+):
+    if status is not None and status not in OPEN_ORDER_STATUSES:
+        raise HTTPException(400, "Статус не относится к открытым заказам")
+    dal = OrderDAL(session)
+    return await dal.get_open_orders(limit, status)
+
+
+@router.post("/orders/status", response_model=OrderStatusTransitionResult)
+async def transition_orders(
+    data: OrderStatusTransition,
+    admin = Depends(require_admin),
+    session: AsyncSession = UnitOfWork
+):
+    """Переводит заказы в новый статус; заказы с устаревшей версией или
+    недопустимым переходом возвращаются в conflicts с текущим состоянием"""
+    dal = OrderDAL(session)
+    updated, conflicts = await dal.transition_orders(
+        [(order.order_id, order.version) for order in data.orders], data.status
+    )
+    return OrderStatusTransitionResult(
+        updated=[OrderStatusState(order_id=o, status=s, version=v) for o, s, v in updated],
+        conflicts=[OrderStatusState(order_id=o, status=s, version=v) for o, s, v in conflicts],
+    )
@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.schemas.analytics import CategoryRevenue, DailyRevenue, ProductSales, RevenueSummary
+from api.dependencies.auth import require_admin
+from db.dals.analytics_dal import AnalyticsDAL
+from api.dependencies.db import ReadSession
+
+router = APIRouter(prefix="/admin/analytics", tags=["admin"])
+
+DEFAULT_PERIOD_DAYS = 30
+MAX_PERIOD_DAYS = 366
+
+
+def date_range(
+    date_from: Optional[date] = Query(None, description="Начало периода включительно, по умолчанию 30 дней назад"),
+    date_to: Optional[date] = Query(None, description="Конец периода включительно, по умолчанию сегодня"),
+) -> tuple[date, date]:
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=DEFAULT_PERIOD_DAYS - 1)
+    if date_from > date_to:
+        raise HTTPException(400, "Начало периода позже его конца")
+    if (date_to - date_from).days >= MAX_PERIOD_DAYS:
+        raise HTTPException(400, f"Период не может быть длиннее {MAX_PERIOD_DAYS} дней")
+    return date_from, date_to
+
+
+# Everything below reads the sales_* rollup tables: one row per day (and per
+# category or product), never orders or order_items
+
+@router.get("/revenue", response_model=RevenueSummary)
+async def get_revenue(
+    period: tuple[date, date] = Depends(date_range),
+    admin = Depends(require_admin),
+    session: AsyncSession = ReadSession
+):
+    dal = AnalyticsDAL(session)
+    days = await dal.get_daily(*period)
+    orders_count = sum(day.orders_count for day in days)
+    revenue = sum(day.revenue for day in days)
+    return RevenueSummary(
+        date_from=period[0],
+        date_to=period[1],
+        orders_count=orders_count,
+        revenue=revenue,
+        average_order_value=revenue / orders_count if orders_count else 0,
+        days=[DailyRevenue.model_validate(day) for day in days],
+    )
+
+
+@router.get("/revenue/categories", response_model=List[CategoryRevenue])
+async def get_revenue_by_category(
+    period: tuple[date, date] = Depends(date_range),
+    admin = Depends(require_admin),
+    session: AsyncSession = ReadSession
+):
+    dal = AnalyticsDAL(session)
+    return await dal.get_daily_by_category(*period)
+
+
+@router.get("/top-products", response_model=List[ProductSales])
+async def get_top_products(
+    period: tuple[date, date] = Depends(date_range),
+    limit: int = Query(10, ge=1, le=100),
+    admin = Depends(require_admin),
+    session: AsyncSession = ReadSession
+):
+    dal = AnalyticsDAL(session)
+    return await dal.get_top_products(*period, limit)
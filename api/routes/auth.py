@@ -1,24 +1,52 @@
 from typing import Annotated
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import JWTError
 
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from db.session import get_db                 
+from api.dependencies.db import UnitOfWork
+from db.session import after_commit
 
-from api.schemas.auth import Token
+from api.schemas.auth import Token, RefreshRequest
 from api.dependencies.auth import authenticate_user
-from core.security import create_access_token
+from core.guest_carts import GUEST_CART_COOKIE, merge_guest_cart, read_guest_token
+from core.revocation import revocation_list
+from core.security import REFRESH_TOKEN_TYPE, create_token_pair, decode_token, token_expiry
+from db.dals.token_dal import TokenDAL
+from db.dals.user_dal import UserDAL
 from db.models import User
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Недействительный refresh-токен",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _decode_refresh_token(token: str) -> dict:
+    try:
+        payload = decode_token(token, REFRESH_TOKEN_TYPE)
+    except JWTError as e:
+        raise _invalid_refresh_token() from e
+
+    if not all(payload.get(claim) for claim in ("jti", "sid", "uid")):
+        raise _invalid_refresh_token()
+    return payload
+
+
 @router.post("/token", response_model=Token)
 async def login(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    session: Annotated[AsyncSession, Depends(get_db)]
+    session: Annotated[AsyncSession, UnitOfWork],
+    request: Request,
+    response: Response,
 ):
     user: User | None = await authenticate_user(
         email=form_data.username,
@@ -33,8 +61,51 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token = create_access_token(
-        data={"sub": user.email, "roles": user.role}
-    )
+    guest_id = read_guest_token(request.cookies.get(GUEST_CART_COOKIE))
+    if guest_id is not None:
+        await merge_guest_cart(session, guest_id, user.user_id)
+        # Only reaches the client with a successful response, i.e. after the commit
+        response.delete_cookie(GUEST_CART_COOKIE)
+
+    return create_token_pair(user)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(
+    data: RefreshRequest,
+    session: Annotated[AsyncSession, UnitOfWork]
+):
+    payload = _decode_refresh_token(data.refresh_token)
+    expires_at = token_expiry(payload)
+    token_dal = TokenDAL(session)
+
+    if await token_dal.is_revoked(payload["sid"]):
+        raise _invalid_refresh_token()
+
+    user = await UserDAL(session).get_user_by_id(UUID(payload["uid"]))
+    if user is None:
+        raise _invalid_refresh_token()
+
+    # Revoking is the check: of two refreshes with the same token only one
+    # inserts the jti, the other one is treated as reuse
+    if not await token_dal.revoke(payload["jti"], expires_at):
+        # a rotated refresh token is being reused: kill the whole session;
+        # committed here because the error response rolls the request back
+        await token_dal.revoke(payload["sid"], expires_at)
+        await session.commit()
+        revocation_list.add(payload["sid"])
+        raise _invalid_refresh_token()
+    after_commit(session, lambda: revocation_list.add(payload["jti"]))
+
+    return create_token_pair(user, session_id=payload["sid"])
+
+
+@router.post("/logout", status_code=204)
+async def logout(
+    data: RefreshRequest,
+    session: Annotated[AsyncSession, UnitOfWork]
+):
+    payload = _decode_refresh_token(data.refresh_token)
 
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    await TokenDAL(session).revoke(payload["sid"], token_expiry(payload))
+    after_commit(session, lambda: revocation_list.add(payload["sid"]))
@@ -1,22 +1,21 @@
+from decimal import Decimal
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from api.schemas import user
 from api.schemas.cart import CartShow, CartItemCreate, CartItemUpdate, CartItemShow
-from api.dependencies.auth import get_current_user
-from api.dependencies.cart import get_user_cart   
+from api.dependencies.auth import TokenUser, get_current_principal
+from api.dependencies.db import UnitOfWork
+from core.cart_store import CartSnapshot, get_cart_store
+from core.config import get_settings
 from db.dals.cart_dal import CartDAL
-from db.models import Cart, User
-from db.session import get_db
+from db.dals.fast_read_dal import FastReadDAL
+from db.models import Cart
 
 router = APIRouter(prefix="/cart", tags=["cart"])
 
 
-@router.get("/", response_model=CartShow)
-async def get_cart(
-    cart: Cart = Depends(get_user_cart)
-):
+def cart_to_show(cart: Cart) -> CartShow:
     items_show = []
     for item in cart.items:
         p = item.product
@@ -37,54 +36,138 @@ async def get_cart(
     )
 
 
+async def snapshot_to_show(session: AsyncSession, snapshot: CartSnapshot) -> CartShow:
+    """Renders a write-behind cart: quantities come from the store, product data is read fresh"""
+    products = await CartDAL(session).get_products(list(snapshot.items))
+    items_show = []
+    total = Decimal("0")
+    for product_id, quantity in snapshot.items.items():
+        p = products.get(product_id)
+        if p is None:
+            continue
+        # same Decimal arithmetic as CartItem.subtotal
+        subtotal = quantity * p.price * (Decimal("1") - Decimal(str(p.discount_percentage)) / Decimal("100"))
+        total += subtotal
+        items_show.append(CartItemShow(
+            product_id=product_id,
+            quantity=quantity,
+            subtotal=subtotal,
+            product_name=p.name,
+            product_price=p.price,
+            product_discount=p.discount_percentage,
+        ))
+
+    return CartShow(
+        cart_id=snapshot.cart_id,
+        total_price=total,
+        items=items_show,
+        items_count=len(items_show)
+    )
+
+
+@router.get("/", response_model=CartShow)
+async def get_cart(
+    user: TokenUser = Depends(get_current_principal),
+    session: AsyncSession = UnitOfWork
+):
+    store = get_cart_store()
+    if store is not None:
+        return await snapshot_to_show(session, await store.get(user.user_id))
+
+    if get_settings().FAST_READ_PATH:
+        cart = await FastReadDAL(session).get_cart(user.user_id)
+        if cart is not None:
+            return cart
+
+    cart = await CartDAL(session).get_or_create_cart(user.user_id)
+    return cart_to_show(cart)
+
+
 @router.post("/items/", response_model=CartShow, status_code=201)
 async def add_to_cart(
     item_data: CartItemCreate,
-    user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db)
+    user: TokenUser = Depends(get_current_principal),
+    session: AsyncSession = UnitOfWork
 ):
     dal = CartDAL(session)
-    cart = await dal.get_or_create_cart(user)
+    store = get_cart_store()
+    if store is not None:
+        # The write happens later, so the foreign key can't catch unknown products
+        if not await dal.get_products([item_data.product_id]):
+            raise HTTPException(404, "Товар не найден")
+
+        def add(items):
+            items[item_data.product_id] = items.get(item_data.product_id, 0) + item_data.quantity
+
+        return await snapshot_to_show(session, await store.update(user.user_id, add))
+
+    cart = await dal.get_or_create_cart(user.user_id)
     await dal.add_item(cart, item_data.product_id, item_data.quantity)
-    await session.commit()
-    cart = await dal.get_or_create_cart(user)
-    return await get_cart(cart=cart)  
+    cart = await dal.get_or_create_cart(user.user_id)
+    return cart_to_show(cart)
 
 
 @router.patch("/items/{product_id}", response_model=CartShow)
 async def update_cart_item(
     product_id: UUID,
     data: CartItemUpdate,
-    cart: Cart = Depends(get_user_cart),
-    session: AsyncSession = Depends(get_db)
+    user: TokenUser = Depends(get_current_principal),
+    session: AsyncSession = UnitOfWork
 ):
+    store = get_cart_store()
+    if store is not None:
+        if product_id not in (await store.get(user.user_id)).items:
+            if data.quantity > 0:
+                raise HTTPException(404, "Товар не найден в корзине")
+            return await snapshot_to_show(session, await store.get(user.user_id))
+
+        def set_quantity(items):
+            if data.quantity > 0:
+                items[product_id] = data.quantity
+            else:
+                items.pop(product_id, None)
+
+        return await snapshot_to_show(session, await store.update(user.user_id, set_quantity))
+
     dal = CartDAL(session)
+    cart = await dal.get_or_create_cart(user.user_id)
     updated = await dal.update_item_quantity(cart.cart_id, product_id, data.quantity)
     if not updated and data.quantity > 0:
         raise HTTPException(404, "Товар не найден в корзине")
-    await session.commit()
-    cart = await dal.get_or_create_cart(user)
-    return await get_cart(cart=cart)
+    cart = await dal.get_or_create_cart(cart.user_id)
+    return cart_to_show(cart)
 
 
 @router.delete("/items/{product_id}", status_code=204)
 async def remove_from_cart(
     product_id: UUID,
-    cart: Cart = Depends(get_user_cart),
-    session: AsyncSession = Depends(get_db)
+    user: TokenUser = Depends(get_current_principal),
+    session: AsyncSession = UnitOfWork
 ):
+    store = get_cart_store()
+    if store is not None:
+        if product_id not in (await store.get(user.user_id)).items:
+            raise HTTPException(404, "Товар не найден в корзине")
+        await store.update(user.user_id, lambda items: items.pop(product_id, None))
+        return
+
     dal = CartDAL(session)
+    cart = await dal.get_or_create_cart(user.user_id)
     removed = await dal.remove_item(cart.cart_id, product_id)
     if not removed:
         raise HTTPException(404, "Товар не найден в корзине")
-    await session.commit()
 
 
 @router.delete("/", status_code=204)
 async def clear_cart(
-    cart: Cart = Depends(get_user_cart),
-    session: AsyncSession = Depends(get_db)
+    user: TokenUser = Depends(get_current_principal),
+    session: AsyncSession = UnitOfWork
 ):
+    store = get_cart_store()
+    if store is not None:
+        await store.update(user.user_id, lambda items: items.clear())
+        return
+
     dal = CartDAL(session)
+    cart = await dal.get_or_create_cart(user.user_id)
     await dal.clear_cart(cart.cart_id)
-    await session.commit()
\ No newline at end of file
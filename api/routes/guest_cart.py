@@ -0,0 +1,105 @@
+from typing import Optional
+from uuid import UUID, uuid4
+
+from fastapi import APIRouter, Cookie, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.dependencies.db import ReadSession, UnitOfWork
+from api.routes.cart import snapshot_to_show
+from api.schemas.cart import CartItemCreate, CartItemUpdate, CartShow
+from core.cart_store import CartSnapshot
+from core.clock import utcnow
+from core.config import get_settings
+from core.guest_carts import GUEST_CART_COOKIE, guest_cart_expiry, read_guest_token, sign_guest_id
+from db.dals.cart_dal import CartDAL
+from db.dals.guest_cart_dal import GuestCartDAL
+
+router = APIRouter(prefix="/guest-cart", tags=["guest-cart"])
+
+
+def get_guest_id(guest_cart: Optional[str] = Cookie(None)) -> Optional[UUID]:
+    return read_guest_token(guest_cart)
+
+
+def set_guest_cookie(response: Response, guest_id: UUID) -> None:
+    settings = get_settings()
+    response.set_cookie(
+        GUEST_CART_COOKIE,
+        sign_guest_id(guest_id),
+        max_age=settings.GUEST_CART_TTL_DAYS * 24 * 60 * 60,
+        httponly=True,
+        secure=settings.GUEST_CART_COOKIE_SECURE,
+        samesite="lax",
+    )
+
+
+@router.get("/", response_model=CartShow)
+async def get_guest_cart(
+    guest_id: Optional[UUID] = Depends(get_guest_id),
+    session: AsyncSession = ReadSession
+):
+    # No cookie means an empty cart; nothing is stored until the first item
+    if guest_id is None:
+        return CartShow(cart_id=uuid4(), total_price=0, items=[], items_count=0)
+    items = await GuestCartDAL(session).get_items(guest_id, utcnow())
+    return await snapshot_to_show(session, CartSnapshot(guest_id, items))
+
+
+@router.post("/items/", response_model=CartShow, status_code=201)
+async def add_to_guest_cart(
+    item_data: CartItemCreate,
+    response: Response,
+    guest_id: Optional[UUID] = Depends(get_guest_id),
+    session: AsyncSession = UnitOfWork
+):
+    if not await CartDAL(session).get_products([item_data.product_id]):
+        raise HTTPException(404, "Товар не найден")
+
+    dal = GuestCartDAL(session)
+    now = utcnow()
+    if guest_id is None:
+        guest_id = uuid4()
+    else:
+        items = await dal.get_items(guest_id, now)
+        if item_data.product_id not in items and len(items) >= get_settings().GUEST_CART_MAX_ITEMS:
+            raise HTTPException(400, "В корзине слишком много товаров")
+
+    expires_at = guest_cart_expiry(now)
+    items = await dal.add_item(guest_id, item_data.product_id, item_data.quantity, now, expires_at)
+    set_guest_cookie(response, guest_id)
+    return await snapshot_to_show(session, CartSnapshot(guest_id, items))
+
+
+@router.patch("/items/{product_id}", response_model=CartShow)
+async def update_guest_cart_item(
+    product_id: UUID,
+    data: CartItemUpdate,
+    response: Response,
+    guest_id: Optional[UUID] = Depends(get_guest_id),
+    session: AsyncSession = UnitOfWork
+):
+    if guest_id is None:
+        raise HTTPException(404, "Товар не найден в корзине")
+
+    dal = GuestCartDAL(session)
+    now = utcnow()
+    if product_id not in await dal.get_items(guest_id, now):
+        raise HTTPException(404, "Товар не найден в корзине")
+
+    expires_at = guest_cart_expiry(now)
+    items = await dal.set_item(guest_id, product_id, data.quantity, now, expires_at)
+    set_guest_cookie(response, guest_id)
+    return await snapshot_to_show(session, CartSnapshot(guest_id, items or {}))
+
+
+@router.delete("/items/{product_id}", status_code=204)
+async def remove_from_guest_cart(
+    product_id: UUID,
+    guest_id: Optional[UUID] = Depends(get_guest_id),
+    session: AsyncSession = UnitOfWork
+):
+    dal = GuestCartDAL(session)
+    now = utcnow()
+    if guest_id is None or product_id not in await dal.get_items(guest_id, now):
+        raise HTTPException(404, "Товар не найден в корзине")
+    await dal.set_item(guest_id, product_id, 0, now, guest_cart_expiry(now))
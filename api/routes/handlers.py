@@ -1,20 +1,30 @@
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.schemas.user import UserCreate, ShowUser
 from api.dependencies.auth import get_current_user
+from api.dependencies.db import UnitOfWork
+from api.dependencies.rate_limit import limit_registration
 from core.hashing import get_password_hash
 from db.dals.user_dal import UserDAL
-from db.session import get_db
 from db.models import User
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/users", tags=["users"])
 
 
-@router.post("/", response_model=ShowUser, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=ShowUser,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(limit_registration)],
+)
 async def register_user(
     user_data: UserCreate,
-    session: AsyncSession = Depends(get_db)
+    session: AsyncSession = UnitOfWork
 ):
    
     dal = UserDAL(session)
@@ -33,14 +43,10 @@ async def register_user(
        
         raise HTTPException(status_code=400, detail=str(e))
 
-    except Exception as e:
-        
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(
-            status_code=500,
-            detail=f"Внутренняя ошибка сервера: {str(e)}"
-        )
+    except Exception:
+        # The cause goes to the log only: driver errors carry SQL and values
+        logger.exception("Failed to register user")
+        raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 
 @router.get("/me", response_model=ShowUser)
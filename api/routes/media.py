@@ -0,0 +1,21 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+
+from core.config import get_settings
+from core.images import get_image_storage
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+
+@router.get("/{path:path}")
+async def get_media(path: str):
+    file = get_image_storage().resolve(path)
+    if file is None:
+        raise HTTPException(404, "Файл не найден")
+
+    # Stored files are content-addressed and never rewritten; FileResponse
+    # answers Range and conditional requests itself
+    return FileResponse(
+        file,
+        headers={"Cache-Control": f"public, max-age={get_settings().MEDIA_CACHE_SECONDS}, immutable"},
+    )
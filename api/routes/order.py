@@ -1,24 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
 from api.schemas.order import OrderShow
-from api.dependencies.auth import get_current_user
+from core.cart_store import get_cart_store
+from core.jobs import get_job_queue
+from api.dependencies.auth import TokenUser, get_current_principal
+from api.dependencies.db import ReadSession, UnitOfWork
 from api.dependencies.cart import get_user_cart
 from db.dals.order_dal import OrderDAL
 from db.dals.cart_dal import CartDAL
-from db.models import User, Cart
-from db.session import get_db
+from db.models import Cart
+from db.session import after_commit
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 
 @router.post("/", response_model=OrderShow, status_code=201)
 async def create_order(
-    user: User = Depends(get_current_user),
+    user: TokenUser = Depends(get_current_principal),
     cart: Cart = Depends(get_user_cart),
-    session: AsyncSession = Depends(get_db)
+    session: AsyncSession = UnitOfWork
 ):
     if not cart.items:
         raise HTTPException(status_code=400, detail="Корзина пуста")
@@ -27,13 +31,22 @@ async def create_order(
     cart_dal = CartDAL(session)
 
     order = await order_dal.create_order_from_cart(cart, user.user_id)
+    await cart_dal.clear_cart(cart.cart_id)
 
-    await session.commit()
+    # Follow-up work is written to the outbox in the same transaction and
+    # runs in the background once the order is committed
+    queue = get_job_queue()
+    await queue.enqueue(session, "order.created", {
+        "order_id": str(order.order_id),
+        "user_id": str(user.user_id),
+    })
+    after_commit(session, queue.notify)
 
-    await cart_dal.clear_cart(cart.cart_id)
-    await session.commit()
+    store = get_cart_store()
+    if store is not None:
+        after_commit(session, lambda: store.forget(user.user_id))
 
-    order = await order_dal.get_order_by_id(order.order_id, user.user_id)
+    order = await order_dal.get_order_by_id(order.order_id, user.user_id, order.created_at)
     if not order:
         raise HTTPException(status_code=500, detail="Ошибка при создании заказа")
 
@@ -42,22 +55,25 @@ async def create_order(
 
 @router.get("/", response_model=List[OrderShow])
 async def get_my_orders(
-    user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db)
+    limit: int = Query(20, ge=1, le=100, description="Количество заказов на странице"),
+    before: Optional[datetime] = Query(None, description="created_at последнего заказа предыдущей страницы"),
+    user: TokenUser = Depends(get_current_principal),
+    session: AsyncSession = ReadSession
 ):
     dal = OrderDAL(session)
-    orders = await dal.get_user_orders(user.user_id)
+    orders = await dal.get_user_orders(user.user_id, limit, before)
     return orders
 
 
 @router.get("/{order_id}", response_model=OrderShow)
 async def get_order_detail(
     order_id: UUID,
-    user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_db)
+    created_at: Optional[datetime] = Query(None, description="Время создания заказа: сужает поиск до одной партиции"),
+    user: TokenUser = Depends(get_current_principal),
+    session: AsyncSession = ReadSession
 ):
     dal = OrderDAL(session)
-    order = await dal.get_order_by_id(order_id, user.user_id)
+    order = await dal.get_order_by_id(order_id, user.user_id, created_at)
     if not order:
         raise HTTPException(status_code=404, detail="Заказ не найден или не принадлежит вам")
     return order
\ No newline at end of file
@@ -1,33 +1,42 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from uuid import UUID
 
-from api.schemas.product import ProductShow, ProductListResponse
-from db.session import get_db
-from db.models import Product, Category
+from api.dependencies.db import ReadSession
+from api.schemas.product import ProductBatchResponse, ProductShow, ProductListResponse
+from core.catalog_cache import encoded_response, get_catalog_cache
+from core.compression import EncodedBody
+from core.config import get_settings
+from core.singleflight import SingleFlight
+from db.dals.admin_dal import AdminDAL
+from db.dals.fast_read_dal import FastReadDAL
+from db.session import async_read_session
+from db.models import Product
 from sqlalchemy import select, func
 
 router = APIRouter(prefix="/products", tags=["public_products"])
 
+MAX_BATCH_IDS = 100
+
+SORTS = {
+    "name_asc": Product.name.asc(),
+    "name_desc": Product.name.desc(),
+    "price_asc": Product.price.asc(),
+    "price_desc": Product.price.desc(),
+    "newest": Product.product_id.desc(),
+    "discount_desc": Product.discount_percentage.desc(),
+}
+
+# Identical concurrent catalog reads share one query per worker; the
+# rendered (and later compressed) bodies are kept in the catalog cache
+product_flight = SingleFlight("product_detail")
+products_list_flight = SingleFlight("products_list")
 
-@router.get("/", response_model=ProductListResponse)
-async def get_products_list(
-    session: AsyncSession = Depends(get_db),
-    
-    page: int = Query(1, ge=1, description="Номер страницы"),
-    size: int = Query(20, ge=1, le=100, description="Количество товаров на странице"),
-    
-    category_id: Optional[UUID] = Query(None, description="ID категории"),
-    search: Optional[str] = Query(None, description="Поиск по названию (частичное совпадение)"),
-    
-    sort: str = Query(
-        "name_asc",
-        description="Варианты: name_asc, name_desc, price_asc, price_desc, newest, discount_desc"
-    ),
-):
-    offset = (page - 1) * size
 
+async def load_products_list(
+    session: AsyncSession, page: int, size: int, category_id: Optional[UUID], search: Optional[str], sort: str
+) -> dict:
     stmt = select(Product)
 
     if category_id:
@@ -36,32 +45,15 @@ async def get_products_list(
     if search:
         stmt = stmt.where(Product.name.ilike(f"%{search}%"))
 
-    match sort:
-        case "name_asc":
-            stmt = stmt.order_by(Product.name.asc())
-        case "name_desc":
-            stmt = stmt.order_by(Product.name.desc())
-        case "price_asc":
-            stmt = stmt.order_by(Product.price.asc())
-        case "price_desc":
-            stmt = stmt.order_by(Product.price.desc())
-        case "newest":
-            stmt = stmt.order_by(Product.product_id.desc())  
-        case "discount_desc":
-            stmt = stmt.order_by(Product.discount_percentage.desc())
-        case _:
-            stmt = stmt.order_by(Product.name.asc())
+    stmt = stmt.order_by(SORTS[sort])
 
     count_stmt = select(func.count()).select_from(stmt.subquery())
     total_result = await session.execute(count_stmt)
     total = total_result.scalar_one()
 
-    stmt = stmt.offset(offset).limit(size)
+    stmt = stmt.offset((page - 1) * size).limit(size)
     result = await session.execute(stmt)
-    products = result.scalars().all()
-
-    if not products and page > 1:
-        raise HTTPException(404, "Страница не найдена")
+    products = [ProductShow.model_validate(product) for product in result.scalars()]
 
     return {
         "items": products,
@@ -72,16 +64,124 @@ async def get_products_list(
     }
 
 
-@router.get("/{product_id}", response_model=ProductShow)
-async def get_product_detail(
-    product_id: UUID,
-    session: AsyncSession = Depends(get_db)
+async def render_products_list(key: tuple) -> Optional[EncodedBody]:
+    page, size, category_id, search, sort = key
+    async with async_read_session() as session:
+        data = await load_products_list(session, page, size, category_id, search, sort)
+    if not data["items"] and page > 1:
+        return None
+    body = EncodedBody(ProductListResponse.model_validate(data).model_dump_json().encode())
+    return get_catalog_cache().put(key, body)
+
+
+async def load_product(session: AsyncSession, product_id: UUID) -> Optional[ProductShow]:
+    if get_settings().FAST_READ_PATH:
+        product = await FastReadDAL(session).get_product(product_id)
+    else:
+        product = await AdminDAL(session).get_product_by_id(product_id)
+    return ProductShow.model_validate(product) if product else None
+
+
+async def render_product(key: tuple) -> Optional[EncodedBody]:
+    _, product_id = key
+    async with async_read_session() as session:
+        product = await load_product(session, product_id)
+    if product is None:
+        return None
+    body = EncodedBody(product.model_dump_json().encode())
+    return get_catalog_cache().put(key, body)
+
+
+@router.get("/", response_model=ProductListResponse)
+async def get_products_list(
+    request: Request,
+    page: int = Query(1, ge=1, description="Номер страницы"),
+    size: int = Query(20, ge=1, le=100, description="Количество товаров на странице"),
+    
+    category_id: Optional[UUID] = Query(None, description="ID категории"),
+    search: Optional[str] = Query(None, description="Поиск по названию (частичное совпадение)"),
+    
+    sort: str = Query(
+        "name_asc",
+        description="Варианты: name_asc, name_desc, price_asc, price_desc, newest, discount_desc"
+    ),
 ):
-    stmt = select(Product).where(Product.product_id == product_id)
-    result = await session.execute(stmt)
-    product = result.scalars().first()
+    # ILIKE ignores case, so differently cased searches are the same query
+    search = search.strip().lower() if search else None
+    sort = sort if sort in SORTS else "name_asc"
+
+    key = (page, size, category_id, search, sort)
+    body = get_catalog_cache().get(key)
+    if body is None:
+        body = await products_list_flight.do(key, lambda: render_products_list(key))
+
+    if body is None:
+        raise HTTPException(404, "Страница не найдена")
+
+    return encoded_response(request, body)
+
+
+def parse_product_ids(raw: str) -> List[UUID]:
+    """Splits a comma-separated list of IDs, dropping duplicates but keeping the order"""
+    ids = []
+    for part in raw.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            ids.append(UUID(part))
+        except ValueError:
+            raise HTTPException(422, f"Некорректный ID товара: {part}")
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise HTTPException(422, "Не передано ни одного ID товара")
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(422, f"Можно запросить не больше {MAX_BATCH_IDS} товаров")
+    return ids
+
+
+# Declared before /{product_id}, otherwise "batch" is matched as a product ID
+@router.get("/batch", response_model=ProductBatchResponse)
+async def get_products_batch(
+    ids: str = Query(..., description="ID товаров через запятую"),
+    session: AsyncSession = ReadSession
+):
+    product_ids = parse_product_ids(ids)
+    cache = get_catalog_cache()
+
+    # Products already rendered for the detail endpoint are served from the
+    # cache; only the misses are queried, and cached for the next request
+    found = {}
+    for product_id in product_ids:
+        body = cache.get(("product", product_id))
+        if body is not None:
+            found[product_id] = ProductShow.model_validate_json(body.body)
+
+    misses = [product_id for product_id in product_ids if product_id not in found]
+    if misses:
+        if get_settings().FAST_READ_PATH:
+            rows = await FastReadDAL(session).get_products(misses)
+        else:
+            rows = await AdminDAL(session).get_products_by_ids(misses)
+        for product_id, row in rows.items():
+            product = ProductShow.model_validate(row)
+            cache.put(("product", product_id), EncodedBody(product.model_dump_json().encode()))
+            found[product_id] = product
+
+    return {
+        "items": [found[product_id] for product_id in product_ids if product_id in found],
+        "missing": [product_id for product_id in product_ids if product_id not in found],
+    }
+
+
+@router.get("/{product_id}", response_model=ProductShow)
+async def get_product_detail(product_id: UUID, request: Request):
+    key = ("product", product_id)
+    body = get_catalog_cache().get(key)
+    if body is None:
+        body = await product_flight.do(key, lambda: render_product(key))
 
-    if not product:
+    if body is None:
         raise HTTPException(status_code=404, detail="Товар не найден")
 
-    return product
\ No newline at end of file
+    return encoded_response(request, body)
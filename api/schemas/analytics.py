@@ -0,0 +1,45 @@
+from datetime import date
+from typing import List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class DailyRevenue(BaseModel):
+    day: date
+    orders_count: int
+    items_count: int
+    revenue: float
+
+    class Config:
+        from_attributes = True
+
+
+class RevenueSummary(BaseModel):
+    date_from: date
+    date_to: date
+    orders_count: int
+    revenue: float
+    average_order_value: float
+    days: List[DailyRevenue]
+
+
+class CategoryRevenue(BaseModel):
+    day: date
+    category_id: UUID
+    category_name: Optional[str]
+    quantity: int
+    revenue: float
+
+    class Config:
+        from_attributes = True
+
+
+class ProductSales(BaseModel):
+    product_id: UUID
+    product_name: Optional[str]
+    quantity: int
+    revenue: float
+
+    class Config:
+        from_attributes = True
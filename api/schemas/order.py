@@ -1,13 +1,17 @@
 from uuid import UUID
-from typing import List
+from typing import List, Optional
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from db.models import OrderStatus
 
 
 class OrderItemShow(BaseModel):
     product_id: UUID
     quantity: int
     price: float
+    discount_percentage: float
+    line_total: float
 
     class Config:
         from_attributes = True
@@ -17,9 +21,31 @@ class OrderShow(BaseModel):
     order_id: UUID
     user_id: UUID
     total: float
-    status: float
+    status: OrderStatus
+    version: int
     created_at: datetime
     items: List[OrderItemShow]
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class OrderVersion(BaseModel):
+    order_id: UUID
+    version: int = Field(..., ge=1, description="Версия заказа, которую видел клиент")
+
+
+class OrderStatusTransition(BaseModel):
+    status: OrderStatus
+    orders: List[OrderVersion] = Field(..., min_length=1, max_length=500)
+
+
+class OrderStatusState(BaseModel):
+    order_id: UUID
+    status: Optional[OrderStatus] = Field(None, description="Текущий статус; пусто, если заказ не найден")
+    version: Optional[int] = None
+
+
+class OrderStatusTransitionResult(BaseModel):
+    updated: List[OrderStatusState]
+    conflicts: List[OrderStatusState]
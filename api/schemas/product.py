@@ -52,6 +52,7 @@ class ProductShow(BaseModel):
     discount_percentage: float
     category_id: UUID
     images: List[str]
+    thumbnails: List[str] = []
 
     class Config:
         from_attributes = True
@@ -61,4 +62,28 @@ class ProductListResponse(BaseModel):
     total: int
     page: int
     size: int
-    pages: int
\ No newline at end of file
+    pages: int
+
+
+class ProductBatchResponse(BaseModel):
+    items: List[ProductShow]
+    missing: List[UUID]
+
+
+class ImageVariantShow(BaseModel):
+    name: str
+    url: str
+    width: int
+    height: int
+    bytes: int
+
+
+class ProductImageShow(BaseModel):
+    image_id: UUID
+    product_id: UUID
+    width: int
+    height: int
+    variants: List[ImageVariantShow]
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,139 @@
+"""Per-request authentication overhead.
+
+Compares decoding an access token with and without the verified-token
+cache for each available JWT backend/algorithm, then measures a full
+in-process request to a route guarded by ``get_current_principal``
+against an unguarded one:
+
+    SECRET_KEY=... python -m benchmarks.bench_auth
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from types import SimpleNamespace
+
+import httpx
+from fastapi import Depends, FastAPI
+
+from core.tokens import VerifiedTokenCache, build_backend
+
+
+def _generate_keys(algorithm: str) -> tuple[str, str]:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+    if algorithm.startswith("RS"):
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm.startswith("ES"):
+        key = ec.generate_private_key(ec.SECP256R1())
+    else:
+        key = ed25519.Ed25519PrivateKey.generate()
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    public_pem = key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+    return private_pem, public_pem
+
+
+def _per_call_us(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def bench_decode(iterations: int) -> list[dict]:
+    results = []
+    for backend_name in ("jose", "pyjwt"):
+        for algorithm in ("HS256", "RS256", "ES256", "EdDSA"):
+            private_pem = public_pem = None
+            if not algorithm.startswith("HS"):
+                private_pem, public_pem = _generate_keys(algorithm)
+            config = SimpleNamespace(
+                ALGORITHM=algorithm, JWT_BACKEND=backend_name, SECRET_KEY="bench-secret",
+                JWT_PRIVATE_KEY=private_pem, JWT_PUBLIC_KEY=public_pem,
+            )
+            try:
+                backend = build_backend(config)
+            except RuntimeError as e:
+                results.append({"backend": backend_name, "algorithm": algorithm, "skipped": str(e)})
+                continue
+
+            token = backend.encode({
+                "sub": "bench@example.com", "uid": str(uuid.uuid4()), "sid": uuid.uuid4().hex,
+                "roles": ["user"], "type": "access", "exp": int(time.time()) + 3600,
+            })
+            cache = VerifiedTokenCache()
+            cache.put(token, backend.decode(token))
+
+            def cached():
+                if cache.get(token) is None:
+                    backend.decode(token)
+
+            results.append({
+                "backend": backend_name,
+                "algorithm": algorithm,
+                "encode_us": round(_per_call_us(lambda: backend.encode({"sub": "x", "exp": 2**31}), iterations), 2),
+                "decode_us": round(_per_call_us(lambda: backend.decode(token), iterations), 2),
+                "cached_decode_us": round(_per_call_us(cached, iterations), 2),
+            })
+    return results
+
+
+async def bench_request(iterations: int) -> dict:
+    from api.dependencies.auth import get_current_principal
+    from core.security import create_token_pair, verified_tokens
+
+    app = FastAPI()
+
+    @app.get("/open")
+    async def open_route():
+        return {}
+
+    @app.get("/guarded")
+    async def guarded_route(user=Depends(get_current_principal)):
+        return {}
+
+    user = SimpleNamespace(user_id=uuid.uuid4(), email="bench@example.com", role=["user"])
+    headers = {"Authorization": f"Bearer {create_token_pair(user)['access_token']}"}
+
+    async def timed(client: httpx.AsyncClient, url: str, clear_cache: bool = False) -> float:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            if clear_cache:
+                verified_tokens.clear()
+            await client.get(url, headers=headers)
+        return (time.perf_counter() - start) / iterations * 1e6
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        open_us = await timed(client, "/open")
+        uncached_us = await timed(client, "/guarded", clear_cache=True)
+        cached_us = await timed(client, "/guarded")
+
+    return {
+        "request_open_us": round(open_us, 2),
+        "request_auth_uncached_us": round(uncached_us, 2),
+        "request_auth_cached_us": round(cached_us, 2),
+        "auth_overhead_uncached_us": round(uncached_us - open_us, 2),
+        "auth_overhead_cached_us": round(cached_us - open_us, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark auth overhead")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    report = {
+        "decode": bench_decode(args.iterations),
+        "request": asyncio.run(bench_request(args.iterations)),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Cold-start time of fresh Python processes.
+
+Each scenario is run in a new interpreter, as a serverless platform or a
+test runner would do, and wall-clock time is reported as JSON:
+
+    python -m benchmarks.bench_startup --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SCENARIOS = {
+    "import_main": "import main",
+    "create_app": "import main; main.create_app()",
+    "first_request": (
+        "import main\n"
+        "from fastapi.testclient import TestClient\n"
+        "assert TestClient(main.create_app()).get('/health/live').status_code == 200"
+    ),
+}
+
+
+def _time_process(args: list[str], env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run(args, cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def _summary(samples: list[float]) -> dict:
+    return {
+        "runs": len(samples),
+        "min_s": round(min(samples), 4),
+        "median_s": round(statistics.median(samples), 4),
+        "max_s": round(max(samples), 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark process cold start")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--skip-tests", action="store_true", help="do not time the test suite")
+    args = parser.parse_args()
+
+    env = {**os.environ, "SECRET_KEY": os.environ.get("SECRET_KEY", "bench-secret")}
+    report = {}
+    for name, code in SCENARIOS.items():
+        report[name] = _summary([_time_process([sys.executable, "-c", code], env) for _ in range(args.runs)])
+
+    if not args.skip_tests:
+        pytest_args = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "tests"]
+        report["test_suite"] = _summary([_time_process(pytest_args, env) for _ in range(max(1, args.runs // 3))])
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Per-call statement overhead: building ``select()`` on every call vs prebuilt statements.
+
+SQLAlchemy looks compiled SQL up by the statement's cache key, so the work
+left on the hot path is constructing the statement and generating its
+key. A prebuilt statement memoizes its key, leaving only the parameters:
+
+    python -m benchmarks.bench_statements
+"""
+import argparse
+import json
+import time
+import uuid
+
+from sqlalchemy import delete, lambda_stmt, select
+from sqlalchemy.orm import selectinload
+
+from db.dals import admin_dal, cart_dal, order_dal, user_dal
+from db.models import Cart, CartItem, Order, Product, User
+
+
+def _inline_cases(value):
+    return {
+        "CartDAL.get_or_create_cart": (
+            lambda: select(Cart)
+            .options(selectinload(Cart.items).selectinload(CartItem.product))
+            .where(Cart.user_id == value),
+            cart_dal.GET_CART_WITH_ITEMS,
+            lambda: lambda_stmt(
+                lambda: select(Cart)
+                .options(selectinload(Cart.items).selectinload(CartItem.product))
+                .where(Cart.user_id == value)
+            ),
+        ),
+        "OrderDAL.get_order_by_id": (
+            lambda: select(Order)
+            .where(Order.order_id == value, Order.user_id == value)
+            .options(selectinload(Order.items)),
+            order_dal.GET_ORDER,
+            lambda: lambda_stmt(
+                lambda: select(Order)
+                .where(Order.order_id == value, Order.user_id == value)
+                .options(selectinload(Order.items))
+            ),
+        ),
+        "AdminDAL.get_product_by_id": (
+            lambda: select(Product).where(Product.product_id == value),
+            admin_dal.GET_PRODUCT,
+            lambda: lambda_stmt(lambda: select(Product).where(Product.product_id == value)),
+        ),
+        "UserDAL.get_user_by_email": (
+            lambda: select(User).where(User.email == "bench@example.com"),
+            user_dal.GET_USER_BY_EMAIL,
+            lambda: lambda_stmt(lambda: select(User).where(User.email == "bench@example.com")),
+        ),
+        "CartDAL.clear_cart": (
+            lambda: delete(CartItem).where(CartItem.cart_id == value),
+            cart_dal.CLEAR_CART,
+            lambda: lambda_stmt(lambda: delete(CartItem).where(CartItem.cart_id == value)),
+        ),
+    }
+
+
+def _per_call_us(func, iterations: int) -> float:
+    func()  # populate any first-call caches
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark DAL statement construction")
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    report = {}
+    for name, (build, prebuilt, build_lambda) in _inline_cases(uuid.uuid4()).items():
+        before = _per_call_us(lambda: build()._generate_cache_key(), args.iterations)
+        after = _per_call_us(lambda: prebuilt._generate_cache_key(), args.iterations)
+        with_lambda = _per_call_us(lambda: build_lambda()._generate_cache_key(), args.iterations)
+        report[name] = {
+            "inline_us": round(before, 2),
+            "prebuilt_us": round(after, 2),
+            "lambda_stmt_us": round(with_lambda, 2),
+            "speedup": round(before / after, 1) if after else None,
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
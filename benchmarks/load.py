@@ -0,0 +1,217 @@
+"""Scripted load scenarios for the shop flow.
+
+Runs virtual users against the app (in-process by default, or a running
+server with --base-url) and prints per-endpoint RPS and latency
+percentiles as JSON:
+
+    python -m benchmarks.seed --users 50
+    python -m benchmarks.load --users 50 --duration 30 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import subprocess
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.seed import BENCH_PASSWORD, SEARCH_WORDS, bench_email
+
+SCENARIO_WEIGHTS = {
+    "browse": 40,
+    "search": 20,
+    "add_to_cart": 20,
+    "checkout": 10,
+    "order_history": 10,
+}
+
+
+@dataclass
+class Recorder:
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    endpoints = {}
+    for name in sorted(set(recorder.latencies) | set(recorder.errors)):
+        values = sorted(recorder.latencies.get(name, []))
+        endpoints[name] = {
+            "requests": len(values),
+            "errors": recorder.errors.get(name, 0),
+            "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p95_ms": round(percentile(values, 95) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+            "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+        }
+    total = sum(item["requests"] for item in endpoints.values())
+    return {
+        "total_requests": total,
+        "total_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, index: int, product_ids: list[str], rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.index = index
+        self.product_ids = product_ids
+        self.rng = rng
+        self.headers: dict[str, str] = {}
+
+    async def login(self) -> bool:
+        response = await self.recorder.request(
+            self.client, "POST /auth/token", "POST", "/auth/token",
+            data={"username": bench_email(self.index), "password": BENCH_PASSWORD},
+        )
+        if response is None or response.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return True
+
+    async def browse(self) -> None:
+        page = self.rng.randint(1, 5)
+        await self.recorder.request(self.client, "GET /products/", "GET", "/products/", params={"page": page, "size": 20})
+        await self.recorder.request(
+            self.client, "GET /products/{product_id}", "GET", f"/products/{self.rng.choice(self.product_ids)}"
+        )
+
+    async def search(self) -> None:
+        await self.recorder.request(
+            self.client, "GET /products/?search", "GET", "/products/",
+            params={"search": self.rng.choice(SEARCH_WORDS), "sort": "price_asc"},
+        )
+
+    async def add_to_cart(self) -> None:
+        await self.recorder.request(
+            self.client, "POST /cart/items/", "POST", "/cart/items/",
+            json={"product_id": self.rng.choice(self.product_ids), "quantity": self.rng.randint(1, 3)},
+            headers=self.headers,
+        )
+        await self.recorder.request(self.client, "GET /cart/", "GET", "/cart/", headers=self.headers)
+
+    async def checkout(self) -> None:
+        await self.add_to_cart()
+        await self.recorder.request(self.client, "POST /orders/", "POST", "/orders/", headers=self.headers)
+
+    async def order_history(self) -> None:
+        await self.recorder.request(self.client, "GET /orders/", "GET", "/orders/", headers=self.headers)
+
+    async def run(self, deadline: float) -> None:
+        if not await self.login():
+            return
+        names = list(SCENARIO_WEIGHTS)
+        weights = list(SCENARIO_WEIGHTS.values())
+        while time.perf_counter() < deadline:
+            scenario = self.rng.choices(names, weights)[0]
+            await getattr(self, scenario)()
+
+
+async def _load_product_ids(client: httpx.AsyncClient, limit: int = 500) -> list[str]:
+    ids: list[str] = []
+    page = 1
+    while len(ids) < limit:
+        response = await client.get("/products/", params={"page": page, "size": 100})
+        if response.status_code != 200:
+            break
+        items = response.json()["items"]
+        if not items:
+            break
+        ids.extend(item["product_id"] for item in items)
+        page += 1
+    return ids
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(users: int, duration: float, base_url: str | None, seed_value: int) -> dict:
+    if base_url:
+        transport = None
+    else:
+        from main import app
+
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://bench"
+
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits, timeout=30) as client:
+        product_ids = await _load_product_ids(client)
+        if not product_ids:
+            raise SystemExit("No products found, run `python -m benchmarks.seed` first")
+
+        recorder = Recorder()
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(
+            VirtualUser(client, recorder, i, product_ids, random.Random(seed_value + i)).run(deadline)
+            for i in range(users)
+        ))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "users": users,
+            "duration_s": duration,
+            "elapsed_s": round(elapsed, 3),
+            "target": base_url,
+            "seed": seed_value,
+        },
+        **summarize(recorder, elapsed),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run shop load scenarios")
+    parser.add_argument("--users", type=int, default=20, help="virtual users, must not exceed seeded users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--base-url", default=None, help="run against a live server instead of in-process")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="write JSON report to file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.users, args.duration, args.base_url, args.seed))
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload)
+    print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Seeds the database with a deterministic data set for the benchmarks.
+
+    python -m benchmarks.seed --users 200 --categories 20 --products 2000
+"""
+import argparse
+import asyncio
+import random
+import uuid
+from decimal import Decimal
+
+from sqlalchemy import delete, insert, select
+
+from core.hashing import get_password_hash
+from db.models import Category, Product, User
+from db.session import async_session
+
+BENCH_EMAIL_TEMPLATE = "bench-user-{}@example.com"
+BENCH_PASSWORD = "bench-password"
+BENCH_CATEGORY_PREFIX = "Bench "
+SEARCH_WORDS = ["Alpha", "Bravo", "Charlie", "Delta", "Echo", "Foxtrot", "Golf", "Hotel"]
+
+BATCH_SIZE = 1000
+
+
+def bench_email(index: int) -> str:
+    return BENCH_EMAIL_TEMPLATE.format(index)
+
+
+def _category_name(index: int) -> str:
+    # category names only allow letters, so the index is spelled with letters
+    letters = ""
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        letters = chr(ord("A") + rest) + letters
+    return f"{BENCH_CATEGORY_PREFIX}{letters}"
+
+
+async def _insert_batches(session, model, rows: list[dict]) -> None:
+    for start in range(0, len(rows), BATCH_SIZE):
+        await session.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+async def clear(session) -> None:
+    # users go first: their orders reference the bench products
+    await session.execute(delete(User).where(User.email.like(BENCH_EMAIL_TEMPLATE.format("%"))))
+    bench_categories = select(Category.category_id).where(Category.name.startswith(BENCH_CATEGORY_PREFIX))
+    await session.execute(delete(Product).where(Product.category_id.in_(bench_categories)))
+    await session.execute(delete(Category).where(Category.name.startswith(BENCH_CATEGORY_PREFIX)))
+
+
+async def seed(users: int, categories: int, products: int, seed_value: int) -> None:
+    rng = random.Random(seed_value)
+
+    def next_uuid() -> uuid.UUID:
+        return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+    # one bcrypt hash is enough: every bench user shares the password
+    password_hash = get_password_hash(BENCH_PASSWORD)
+
+    user_rows = [
+        {
+            "user_id": next_uuid(),
+            "name": "Bench",
+            "surname": "User",
+            "email": bench_email(i),
+            "password_hash": password_hash,
+            "role": ["user"],
+        }
+        for i in range(users)
+    ]
+    category_rows = [
+        {"category_id": next_uuid(), "name": _category_name(i), "description": None}
+        for i in range(categories)
+    ]
+    product_rows = [
+        {
+            "product_id": next_uuid(),
+            "category_id": rng.choice(category_rows)["category_id"],
+            "name": f"{rng.choice(SEARCH_WORDS)} Product {i}",
+            "price": Decimal(rng.randint(100, 100000)) / 100,
+            "discount_percentage": float(rng.choice([0, 0, 0, 5, 10, 25])),
+            "description": "Benchmark product",
+            "stock": rng.randint(0, 500),
+            "images": [],
+        }
+        for i in range(products)
+    ]
+
+    async with async_session() as session:
+        await clear(session)
+        await _insert_batches(session, User, user_rows)
+        await _insert_batches(session, Category, category_rows)
+        await _insert_batches(session, Product, product_rows)
+        await session.commit()
+
+    print(f"Seeded {users} users, {categories} categories, {products} products (seed={seed_value})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed benchmark data")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(seed(args.users, args.categories, args.products, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Write-behind cart store.
+
+Cart edits are applied to a cached copy of the cart and written to
+``carts``/``cart_items`` later, so a burst of quantity changes costs one
+transaction instead of one per click.
+
+Durability:
+
+* An acknowledged edit reaches Postgres at most ``flush_delay`` seconds
+  later. If the worker dies before that, the edits made since the last
+  flush are lost; the cart itself and everything flushed before are not.
+* Checkout flushes the cart synchronously, so an order is always built
+  from the latest edits; graceful shutdown flushes every dirty cart
+  (``flush_all`` from the app lifespan).
+* A failed flush keeps the cart dirty and is retried after another delay.
+* ``MemoryCartStoreBackend`` is per worker, so it needs a single worker:
+  two workers would hold different copies of one cart, and a stale copy
+  could overwrite a cart another worker's checkout cleared. server.py
+  refuses to start several workers with CART_WRITE_BEHIND enabled.
+"""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+from uuid import UUID
+
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+LOCK_STRIPES = 64
+
+
+@dataclass
+class CartSnapshot:
+    cart_id: UUID
+    items: Dict[UUID, int] = field(default_factory=dict)
+
+
+class CartStoreBackend(ABC):
+    """Storage for cached carts. Shared backends (e.g. Redis) implement the same interface."""
+
+    @abstractmethod
+    async def get(self, user_id: UUID) -> Optional[CartSnapshot]:
+        """Returns a copy of the cached cart, or None"""
+
+    @abstractmethod
+    async def set(self, user_id: UUID, cart: CartSnapshot, dirty: bool) -> None:
+        ...
+
+    @abstractmethod
+    async def mark_clean(self, user_id: UUID, flushed: CartSnapshot) -> None:
+        """Clears the dirty flag unless the cart changed after `flushed` was taken"""
+
+    @abstractmethod
+    async def is_dirty(self, user_id: UUID) -> bool:
+        ...
+
+    @abstractmethod
+    async def dirty(self) -> List[UUID]:
+        ...
+
+    @abstractmethod
+    async def discard(self, user_id: UUID) -> None:
+        ...
+
+
+class MemoryCartStoreBackend(CartStoreBackend):
+    """Per-process carts; the oldest clean carts are evicted beyond `max_carts`"""
+
+    def __init__(self, max_carts: int = 10_000):
+        self.max_carts = max_carts
+        self._carts: "OrderedDict[UUID, tuple[CartSnapshot, bool]]" = OrderedDict()
+
+    async def get(self, user_id: UUID) -> Optional[CartSnapshot]:
+        entry = self._carts.get(user_id)
+        if entry is None:
+            return None
+        self._carts.move_to_end(user_id)
+        cart = entry[0]
+        return CartSnapshot(cart.cart_id, dict(cart.items))
+
+    async def set(self, user_id: UUID, cart: CartSnapshot, dirty: bool) -> None:
+        self._carts[user_id] = (CartSnapshot(cart.cart_id, dict(cart.items)), dirty)
+        self._carts.move_to_end(user_id)
+        if len(self._carts) > self.max_carts:
+            self._evict()
+
+    def _evict(self) -> None:
+        # Dirty carts are never evicted, they still have to be flushed
+        for user_id in [user_id for user_id, (_, dirty) in self._carts.items() if not dirty]:
+            if len(self._carts) <= self.max_carts:
+                break
+            del self._carts[user_id]
+
+    async def mark_clean(self, user_id: UUID, flushed: CartSnapshot) -> None:
+        entry = self._carts.get(user_id)
+        if entry is not None and entry[0].items == flushed.items:
+            self._carts[user_id] = (entry[0], False)
+
+    async def is_dirty(self, user_id: UUID) -> bool:
+        entry = self._carts.get(user_id)
+        return entry is not None and entry[1]
+
+    async def dirty(self) -> List[UUID]:
+        return [user_id for user_id, (_, dirty) in self._carts.items() if dirty]
+
+    async def discard(self, user_id: UUID) -> None:
+        self._carts.pop(user_id, None)
+
+    def __len__(self) -> int:
+        return len(self._carts)
+
+
+CartLoader = Callable[[UUID], Awaitable[CartSnapshot]]
+CartWriter = Callable[[UUID, CartSnapshot], Awaitable[None]]
+
+
+async def load_cart(user_id: UUID) -> CartSnapshot:
+    from db.dals.cart_dal import CartDAL
+    from db.session import async_session
+
+    async with async_session() as session:
+        cart = await CartDAL(session).get_or_create_cart(user_id)
+        await session.commit()
+        return CartSnapshot(cart.cart_id, {item.product_id: item.quantity for item in cart.items})
+
+
+async def write_cart(user_id: UUID, cart: CartSnapshot) -> None:
+    from db.dals.cart_dal import CartDAL
+    from db.session import async_session
+
+    async with async_session() as session:
+        await CartDAL(session).replace_items(cart.cart_id, cart.items)
+        await session.commit()
+
+
+class WriteBehindCartStore:
+    def __init__(
+        self,
+        backend: CartStoreBackend,
+        flush_delay: float = 2.0,
+        loader: CartLoader = load_cart,
+        writer: CartWriter = write_cart,
+    ):
+        self.backend = backend
+        self.flush_delay = flush_delay
+        self.loader = loader
+        self.writer = writer
+        self._locks = [asyncio.Lock() for _ in range(LOCK_STRIPES)]
+        self._scheduled: Dict[UUID, asyncio.Task] = {}
+
+    def _lock(self, user_id: UUID) -> asyncio.Lock:
+        return self._locks[hash(user_id) % LOCK_STRIPES]
+
+    async def _get(self, user_id: UUID) -> CartSnapshot:
+        cart = await self.backend.get(user_id)
+        if cart is None:
+            cart = await self.loader(user_id)
+            await self.backend.set(user_id, cart, dirty=False)
+        return cart
+
+    async def get(self, user_id: UUID) -> CartSnapshot:
+        async with self._lock(user_id):
+            return await self._get(user_id)
+
+    async def update(self, user_id: UUID, change: Callable[[Dict[UUID, int]], None]) -> CartSnapshot:
+        """Applies `change` to the cart items in place and schedules a flush"""
+        async with self._lock(user_id):
+            cart = await self._get(user_id)
+            change(cart.items)
+            await self.backend.set(user_id, cart, dirty=True)
+        self._schedule(user_id)
+        return cart
+
+    def _schedule(self, user_id: UUID) -> None:
+        # Edits arriving while a flush is scheduled ride along with it
+        if user_id not in self._scheduled:
+            self._scheduled[user_id] = asyncio.create_task(self._flush_later(user_id))
+
+    async def _flush_later(self, user_id: UUID) -> None:
+        await asyncio.sleep(self.flush_delay)
+        self._scheduled.pop(user_id, None)
+        try:
+            await self.flush(user_id)
+        except Exception:
+            logger.exception("Failed to flush cart of user %s, retrying later", user_id)
+            self._schedule(user_id)
+
+    async def flush(self, user_id: UUID) -> None:
+        async with self._lock(user_id):
+            if not await self.backend.is_dirty(user_id):
+                return
+            cart = await self.backend.get(user_id)
+            await self.writer(user_id, cart)
+            await self.backend.mark_clean(user_id, cart)
+
+    async def flush_all(self) -> None:
+        for task in self._scheduled.values():
+            task.cancel()
+        self._scheduled.clear()
+        for user_id in await self.backend.dirty():
+            try:
+                await self.flush(user_id)
+            except Exception:
+                logger.exception("Failed to flush cart of user %s", user_id)
+
+    async def forget(self, user_id: UUID) -> None:
+        """Drops the cached copy, e.g. after checkout emptied the cart in the database"""
+        task = self._scheduled.pop(user_id, None)
+        if task is not None:
+            task.cancel()
+        async with self._lock(user_id):
+            await self.backend.discard(user_id)
+
+
+_store_settings = None
+_store: Optional[WriteBehindCartStore] = None
+
+
+def get_cart_store() -> Optional[WriteBehindCartStore]:
+    """Returns the store when CART_WRITE_BEHIND is enabled, otherwise None"""
+    global _store_settings, _store
+    settings = get_settings()
+    if settings is not _store_settings:
+        _store = None
+        if settings.CART_WRITE_BEHIND:
+            _store = WriteBehindCartStore(
+                MemoryCartStoreBackend(settings.CART_STORE_MAX_CARTS),
+                flush_delay=settings.CART_FLUSH_SECONDS,
+            )
+        _store_settings = settings
+    return _store
@@ -0,0 +1,82 @@
+"""Short-lived cache of rendered catalog responses.
+
+Entries hold the serialized JSON plus its gzip/brotli forms, each
+compressed on first request and then served as-is, so a popular page is
+serialized and compressed once per TTL instead of once per client.
+
+The cache is per process. Admin writes clear it in the worker that made
+them; other workers catch up within CATALOG_CACHE_SECONDS.
+"""
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from fastapi import Request, Response
+
+from core.compression import EncodedBody, choose_encoding
+from core.config import get_settings
+
+
+class CatalogCache:
+    def __init__(self, ttl: float, max_entries: int, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple[float, EncodedBody]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[EncodedBody]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, body = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return body
+
+    def put(self, key: Hashable, body: EncodedBody) -> EncodedBody:
+        if self.ttl > 0:
+            self._entries[key] = (self._clock() + self.ttl, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_cache_settings = None
+_cache: Optional[CatalogCache] = None
+
+
+def get_catalog_cache() -> CatalogCache:
+    global _cache_settings, _cache
+    settings = get_settings()
+    if settings is not _cache_settings:
+        _cache = CatalogCache(settings.CATALOG_CACHE_SECONDS, settings.CATALOG_CACHE_MAX_ENTRIES)
+        _cache_settings = settings
+    return _cache
+
+
+def invalidate_catalog() -> None:
+    get_catalog_cache().clear()
+
+
+def encoded_response(request: Request, body: EncodedBody) -> Response:
+    """Sends the body in the client's preferred encoding; CompressionMiddleware leaves it alone"""
+    settings = get_settings()
+    content, encoding = body.encoded(
+        choose_encoding(request.headers.get("accept-encoding")) if settings.COMPRESSION_ENABLED else None,
+        settings.COMPRESSION_MIN_BYTES,
+        settings.COMPRESSION_GZIP_LEVEL,
+        settings.COMPRESSION_BROTLI_QUALITY,
+    )
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content, media_type=body.media_type, headers=headers)
@@ -0,0 +1,126 @@
+"""gzip/brotli response compression.
+
+Only complete bodies of compressible types at least ``min_size`` bytes long
+are compressed; streamed responses (media files, already compressed) pass
+through. Levels are kept moderate: beyond gzip 6 / brotli 5 the CPU cost
+grows much faster than the savings on JSON. Brotli is used when the
+``brotli`` package is installed.
+
+Responses that already carry Content-Encoding are left alone, which is how
+the catalog cache serves bodies it compressed once (see ``EncodedBody``).
+"""
+import gzip
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Picks br or gzip from an Accept-Encoding header, ignoring q=0 entries"""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.partition(";")
+        name, _, value = params.strip().partition("=")
+        try:
+            if name.strip() == "q" and float(value) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding.strip().lower())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    # mtime=0 keeps the output stable for identical bodies
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class EncodedBody:
+    """A response body with its compressed forms, each computed at most once"""
+
+    def __init__(self, body: bytes, media_type: str = "application/json"):
+        self.body = body
+        self.media_type = media_type
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: Optional[str], min_size: int, gzip_level: int, brotli_quality: int):
+        """Returns (body, encoding) for a client; encoding is None when sent as-is"""
+        if encoding is None or len(self.body) < min_size:
+            return self.body, None
+        if encoding not in self._encoded:
+            self._encoded[encoding] = compress(self.body, encoding, gzip_level, brotli_quality)
+        return self._encoded[encoding], encoding
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, min_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4) -> None:
+        self.app = app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                media_type = headers.get("content-type", "")
+                if "content-encoding" in headers or not media_type.startswith(COMPRESSIBLE_TYPES):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            if start is not None:
+                response_start, start = start, None
+                headers = MutableHeaders(raw=response_start["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                body = message.get("body", b"")
+                if message.get("more_body", False) or len(body) < self.min_size:
+                    # Streams are sent as they come; small bodies aren't worth it
+                    passthrough = True
+                    await send(response_start)
+                    await send(message)
+                    return
+
+                body = compress(body, encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                await send(response_start)
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -5,10 +5,60 @@ class Settings(BaseSettings):
    
     SECRET_KEY: str
     ALGORITHM: str = "HS256" 
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  
+    JWT_BACKEND: str = "jose"
+    JWT_PRIVATE_KEY: str | None = None
+    JWT_PUBLIC_KEY: str | None = None
+    JWT_CACHE_SIZE: int = 10_000
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    REVOCATION_SYNC_SECONDS: int = 30
 
    
     REAL_DATABASE_URL: str | None = None
+    FAST_READ_PATH: bool = False
+    CART_WRITE_BEHIND: bool = False
+    CART_FLUSH_SECONDS: float = 2.0
+    CART_STORE_MAX_CARTS: int = 10_000
+    GUEST_CART_TTL_DAYS: int = 7
+    GUEST_CART_MAX_ITEMS: int = 100
+    GUEST_CART_COOKIE_SECURE: bool = True
+    GUEST_CART_SWEEP_SECONDS: int = 15 * 60
+    GUEST_CART_SWEEP_BATCH: int = 1000
+    PARTITION_MONTHS_AHEAD: int = 3
+    PARTITION_MAINTENANCE_SECONDS: int = 6 * 60 * 60
+
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_BYTES: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    CATALOG_CACHE_SECONDS: float = 30.0
+    CATALOG_CACHE_MAX_ENTRIES: int = 1000
+
+    MEDIA_ROOT: str = "media"
+    MEDIA_URL: str = "/media"
+    MEDIA_CACHE_SECONDS: int = 365 * 24 * 60 * 60
+    IMAGE_MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024
+    IMAGE_WORKERS: int = 2
+
+    JOBS_ENABLED: bool = True
+    JOBS_BACKEND: str = "outbox"
+    JOBS_CONCURRENCY: int = 4
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_POLL_SECONDS: float = 1.0
+
+    METRICS_ENABLED: bool = True
+    SENTRY_DSN: str | None = None
+    SENTRY_TRACES_SAMPLE_RATE: float = 0.0
+
+    QUERY_DEBUG: bool = False
+    QUERY_DEBUG_N_PLUS_ONE_THRESHOLD: int = 3
+
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_AUTH_IP: str = "20/minute"
+    RATE_LIMIT_AUTH_ACCOUNT: str = "5/minute"
+    RATE_LIMIT_USERS_IP: str = "10/minute"
+    RATE_LIMIT_USERS_ACCOUNT: str = "3/minute"
+    RATE_LIMIT_GUEST_CART_IP: str = "60/minute"
 
     model_config = SettingsConfigDict(
         env_file=".env",              
@@ -17,4 +67,24 @@ class Settings(BaseSettings):
         extra="ignore"                
     )
 
-settings = Settings()
\ No newline at end of file
+_settings: Settings | None = None
+
+
+def get_settings() -> Settings:
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
+
+
+def configure(settings: Settings) -> None:
+    global _settings
+    _settings = settings
+
+
+def __getattr__(name: str):
+    # `from core.config import settings` keeps working, but Settings() is
+    # only constructed (and SECRET_KEY required) on first access
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""Guest carts: a signed cookie names the cart, the cart itself lives in guest_carts."""
+import asyncio
+import base64
+import binascii
+import hashlib
+import hmac
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+from core.clock import utcnow
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+GUEST_CART_COOKIE = "guest_cart"
+SIGNATURE_BYTES = 16
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _signature(guest_id: UUID) -> bytes:
+    key = get_settings().SECRET_KEY.encode()
+    return hmac.new(key, b"guest-cart:" + guest_id.bytes, hashlib.sha256).digest()[:SIGNATURE_BYTES]
+
+
+def sign_guest_id(guest_id: UUID) -> str:
+    return f"{_b64encode(guest_id.bytes)}.{_b64encode(_signature(guest_id))}"
+
+
+def read_guest_token(token: Optional[str]) -> Optional[UUID]:
+    """Returns the guest id from a cookie value, or None if it is missing or forged"""
+    if not token:
+        return None
+    raw_id, _, raw_signature = token.partition(".")
+    try:
+        guest_id = UUID(bytes=_b64decode(raw_id))
+        signature = _b64decode(raw_signature)
+    except (ValueError, binascii.Error):
+        return None
+    if not hmac.compare_digest(signature, _signature(guest_id)):
+        return None
+    return guest_id
+
+
+def guest_cart_expiry(now: Optional[datetime] = None) -> datetime:
+    return (now or utcnow()) + timedelta(days=get_settings().GUEST_CART_TTL_DAYS)
+
+
+async def merge_guest_cart(session, guest_id: UUID, user_id: UUID) -> int:
+    """Moves a guest cart into the user's cart; returns the number of merged items.
+
+    Committing is left to the caller's unit of work, the cached cart is
+    only dropped once that commit succeeds.
+    """
+    from core.cart_store import get_cart_store
+    from db.dals.cart_dal import CartDAL
+    from db.dals.guest_cart_dal import GuestCartDAL
+    from db.session import after_commit
+
+    store = get_cart_store()
+    if store is not None:
+        await store.flush(user_id)
+
+    cart_id = await CartDAL(session).ensure_cart_id(user_id)
+    merged = await GuestCartDAL(session).merge_into_cart(guest_id, cart_id, utcnow())
+
+    if store is not None:
+        after_commit(session, lambda: store.forget(user_id))
+    return merged
+
+
+async def sweep_expired_guest_carts(batch_size: int) -> int:
+    """Deletes expired guest carts in batches, one short transaction per batch"""
+    from db.dals.guest_cart_dal import GuestCartDAL
+    from db.session import async_session
+
+    total = 0
+    while True:
+        async with async_session() as session:
+            deleted = await GuestCartDAL(session).purge_expired(utcnow(), batch_size)
+            await session.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+async def run_guest_cart_sweeper(interval: float, batch_size: int) -> None:
+    while True:
+        try:
+            deleted = await sweep_expired_guest_carts(batch_size)
+            if deleted:
+                logger.info("Purged %s expired guest carts", deleted)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Failed to purge expired guest carts")
+        await asyncio.sleep(interval)
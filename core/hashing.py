@@ -1,9 +1,19 @@
-from passlib.context import CryptContext
+from functools import lru_cache
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from core.metrics import BCRYPT_DURATION
+
+
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    # passlib loads the bcrypt backend on import, so it is deferred to first use
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    with BCRYPT_DURATION.labels("hash").time():
+        return get_pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed: str) -> bool:
-    return pwd_context.verify(plain_password, hashed)
\ No newline at end of file
+    with BCRYPT_DURATION.labels("verify").time():
+        return get_pwd_context().verify(plain_password, hashed)
\ No newline at end of file
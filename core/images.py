@@ -0,0 +1,276 @@
+"""Product image uploads and their resized variants.
+
+An upload is parsed straight off the request stream (nothing is spooled
+before the size limit applies), written to disk and stored under the
+sha256 of its content,
+so a stored file never changes and can be served with an immutable,
+year-long Cache-Control header. Resizing is CPU-bound Pillow work and runs
+in a process pool, away from the event loop.
+
+Layout under MEDIA_ROOT::
+
+    images/<key[:2]>/<key>/original
+    images/<key[:2]>/<key>/<variant>.webp
+"""
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+from core.config import get_settings
+
+# Longest side of each variant in pixels
+IMAGE_VARIANTS = {"thumb": 200, "medium": 600, "large": 1200}
+THUMBNAIL_VARIANT = "thumb"
+FULL_VARIANT = "large"
+
+CHUNK_SIZE = 64 * 1024
+WEBP_QUALITY = 82
+# Allowance for boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+class InvalidUpload(ValueError):
+    pass
+
+
+@dataclass
+class ProcessedImage:
+    key: str
+    width: int
+    height: int
+    variants: List[Dict[str, Any]]
+
+    def url(self, variant: str) -> str:
+        return next(item["url"] for item in self.variants if item["name"] == variant)
+
+
+class LocalImageStorage:
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def image_dir(self, key: str) -> Path:
+        return self.root / "images" / key[:2] / key
+
+    def resolve(self, relative: str) -> Optional[Path]:
+        """Maps a media path to a file, refusing anything outside the root"""
+        root = self.root.resolve()
+        path = (root / relative).resolve()
+        if root not in path.parents or not path.is_file():
+            return None
+        return path
+
+    async def save(self, chunks: AsyncIterator[bytes], max_bytes: int) -> str:
+        """Streams the upload to a temporary file and moves it under its hash; returns the key"""
+        tmp_dir = self.root / "tmp"
+        await asyncio.to_thread(tmp_dir.mkdir, parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ImageTooLarge(f"Upload exceeds {max_bytes} bytes")
+                    digest.update(chunk)
+                    await asyncio.to_thread(tmp.write, chunk)
+
+            key = digest.hexdigest()
+            target = self.image_dir(key)
+            await asyncio.to_thread(target.mkdir, parents=True, exist_ok=True)
+            await asyncio.to_thread(os.replace, tmp_path, target / "original")
+            return key
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.unlink(tmp_path)
+            raise
+
+
+def generate_variants(directory: str, variants: Dict[str, int]) -> Dict[str, Any]:
+    """Runs in a worker process: validates the original and writes one WebP per variant"""
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    source = Path(directory) / "original"
+    try:
+        with Image.open(source) as image:
+            image.verify()
+        with Image.open(source) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            width, height = image.size
+
+            created = []
+            for name, side in variants.items():
+                variant = image.copy()
+                # thumbnail() keeps the aspect ratio and never upscales
+                variant.thumbnail((side, side), Image.LANCZOS)
+                target = Path(directory) / f"{name}.webp"
+                variant.save(target, "WEBP", quality=WEBP_QUALITY, method=4)
+                created.append({
+                    "name": name,
+                    "file": target.name,
+                    "width": variant.width,
+                    "height": variant.height,
+                    "bytes": target.stat().st_size,
+                })
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as exc:
+        # Pillow's verify() raises SyntaxError on corrupt data
+        raise InvalidImage(str(exc)) from None
+
+    return {"width": width, "height": height, "variants": created}
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_image_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=get_settings().IMAGE_WORKERS)
+    return _pool
+
+
+def shutdown_image_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+class StreamedUpload:
+    """One file field of a multipart/form-data body, read from the request stream.
+
+    The body is fed to the parser as it arrives and the file part's data is
+    handed on chunk by chunk; reading stops with ImageTooLarge as soon as
+    the body exceeds ``max_body_bytes``.
+    """
+
+    def __init__(self, stream: AsyncIterator[bytes], content_type: str, field: str, max_body_bytes: int):
+        media_type, options = parse_options_header(content_type)
+        if media_type != b"multipart/form-data" or b"boundary" not in options:
+            raise InvalidUpload("Expected multipart/form-data with a boundary")
+
+        self.field = field
+        self.content_type = ""
+        self._stream = stream.__aiter__()
+        self._max_body_bytes = max_body_bytes
+        self._received = 0
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_file = False
+        self._found = False
+        self._done = False
+        self._pending: List[bytes] = []
+        self._parser = MultipartParser(options[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if not self._found and options.get(b"name") == self.field.encode():
+            self._found = self._in_file = True
+            self.content_type = self._headers.get(b"content-type", b"").decode("latin-1")
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self._pending.append(bytes(data[start:end]))
+
+    def _on_part_end(self) -> None:
+        if self._in_file:
+            self._in_file = False
+            self._done = True
+
+    async def _feed(self) -> bool:
+        """Parses the next piece of the body; False once the body has ended"""
+        try:
+            chunk = await self._stream.__anext__()
+        except StopAsyncIteration:
+            return False
+        self._received += len(chunk)
+        if self._received > self._max_body_bytes:
+            raise ImageTooLarge(f"Request body exceeds {self._max_body_bytes} bytes")
+        try:
+            self._parser.write(chunk)
+        except MultipartParseError as exc:
+            raise InvalidUpload(str(exc)) from None
+        return True
+
+    async def open(self) -> None:
+        """Reads up to the file part's headers, so its content type is known before any data"""
+        while not self._found:
+            if not await self._feed():
+                raise InvalidUpload(f"No {self.field!r} field in the form")
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        while True:
+            if self._pending:
+                pending, self._pending = self._pending, []
+                for chunk in pending:
+                    yield chunk
+            if self._done:
+                return
+            if not await self._feed():
+                raise InvalidUpload("The form ended inside the file")
+
+
+def get_image_storage() -> LocalImageStorage:
+    return LocalImageStorage(get_settings().MEDIA_ROOT)
+
+
+async def process_upload(chunks: AsyncIterator[bytes], storage: LocalImageStorage) -> ProcessedImage:
+    settings = get_settings()
+    key = await storage.save(chunks, settings.IMAGE_MAX_UPLOAD_BYTES)
+    directory = storage.image_dir(key)
+
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(get_image_pool(), generate_variants, str(directory), IMAGE_VARIANTS)
+    except InvalidImage:
+        await asyncio.to_thread(shutil.rmtree, directory, True)
+        raise
+
+    base_url = settings.MEDIA_URL.rstrip("/") + "/" + directory.relative_to(storage.root).as_posix()
+    variants = [
+        {**{k: v for k, v in variant.items() if k != "file"}, "url": f"{base_url}/{variant['file']}"}
+        for variant in result["variants"]
+    ]
+    return ProcessedImage(key, result["width"], result["height"], variants)
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from uuid import UUID, uuid4
+
+from core.clock import utcnow
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str):
+    """Registers the coroutine that processes jobs of the given kind"""
+    def decorator(func: JobHandler) -> JobHandler:
+        handlers[kind] = func
+        return func
+    return decorator
+
+
+@dataclass
+class Job:
+    job_id: UUID
+    kind: str
+    payload: Dict[str, Any]
+    attempts: int = 0
+
+
+class OutboxJobBackend:
+    """Jobs live in the outbox_jobs table and are enqueued in the caller's transaction"""
+
+    async def enqueue(self, session, kind: str, payload: Dict[str, Any]) -> None:
+        from db.dals.outbox_dal import OutboxDAL
+
+        OutboxDAL(session).enqueue(kind, payload)
+
+    async def claim(self, limit: int, lease: timedelta) -> List[Job]:
+        from db.dals.outbox_dal import OutboxDAL
+        from db.session import async_session
+
+        now = utcnow()
+        async with async_session() as session:
+            rows = await OutboxDAL(session).claim_due(now, now + lease, limit)
+            await session.commit()
+        return [Job(row.job_id, row.kind, row.payload, row.attempts) for row in rows]
+
+    async def _finish(self, method: str, *args) -> None:
+        from db.dals.outbox_dal import OutboxDAL
+        from db.session import async_session
+
+        async with async_session() as session:
+            await getattr(OutboxDAL(session), method)(*args)
+            await session.commit()
+
+    async def complete(self, job: Job) -> None:
+        await self._finish("complete", job.job_id)
+
+    async def retry(self, job: Job, retry_at: datetime, error: str) -> None:
+        await self._finish("retry", job.job_id, retry_at, error)
+
+    async def fail(self, job: Job, error: str) -> None:
+        await self._finish("fail", job.job_id, error)
+
+
+@dataclass
+class _LocalEntry:
+    job: Job
+    run_after: datetime
+    error: Optional[str] = None
+
+
+@dataclass
+class LocalJobBackend:
+    """In-memory stand-in for tests and runs without a database.
+
+    Jobs are enqueued immediately rather than with the caller's transaction.
+    """
+    clock: Callable[[], datetime] = utcnow
+    pending: Dict[UUID, _LocalEntry] = field(default_factory=dict)
+    completed: List[Job] = field(default_factory=list)
+    failed: List[_LocalEntry] = field(default_factory=list)
+
+    async def enqueue(self, session, kind: str, payload: Dict[str, Any]) -> None:
+        job = Job(uuid4(), kind, payload)
+        self.pending[job.job_id] = _LocalEntry(job, self.clock())
+
+    async def claim(self, limit: int, lease: timedelta) -> List[Job]:
+        now = self.clock()
+        due = sorted(
+            (entry for entry in self.pending.values() if entry.run_after <= now),
+            key=lambda entry: entry.run_after,
+        )[:limit]
+        for entry in due:
+            entry.job.attempts += 1
+            entry.run_after = now + lease
+        return [entry.job for entry in due]
+
+    async def complete(self, job: Job) -> None:
+        self.pending.pop(job.job_id, None)
+        self.completed.append(job)
+
+    async def retry(self, job: Job, retry_at: datetime, error: str) -> None:
+        entry = self.pending[job.job_id]
+        entry.run_after = retry_at
+        entry.error = error
+
+    async def fail(self, job: Job, error: str) -> None:
+        entry = self.pending.pop(job.job_id)
+        entry.error = error
+        self.failed.append(entry)
+
+
+class JobQueue:
+    """Runs outbox jobs in-process with bounded concurrency and exponential backoff"""
+
+    def __init__(
+        self,
+        backend,
+        concurrency: int = 4,
+        max_attempts: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 300.0,
+        poll_interval: float = 1.0,
+        lease: float = 60.0,
+    ):
+        self.backend = backend
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+        self.lease = timedelta(seconds=lease)
+        self._wakeup = asyncio.Event()
+        self._running: set[asyncio.Task] = set()
+
+    async def enqueue(self, session, kind: str, payload: Dict[str, Any]) -> None:
+        await self.backend.enqueue(session, kind, payload)
+
+    def notify(self) -> None:
+        """Wakes the worker after a commit instead of waiting for the next poll"""
+        self._wakeup.set()
+
+    def backoff(self, attempts: int) -> float:
+        return min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+
+    async def _execute(self, job: Job) -> None:
+        handler = handlers.get(job.kind)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind {job.kind!r}")
+            await handler(job.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            if job.attempts >= self.max_attempts or handler is None:
+                logger.exception("Job %s (%s) failed permanently", job.job_id, job.kind)
+                await self.backend.fail(job, error)
+            else:
+                delay = self.backoff(job.attempts)
+                logger.warning("Job %s (%s) failed, retrying in %ss: %s", job.job_id, job.kind, delay, error)
+                await self.backend.retry(job, utcnow() + timedelta(seconds=delay), error)
+        else:
+            await self.backend.complete(job)
+
+    async def _run_job(self, job: Job) -> None:
+        try:
+            await self._execute(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # The lease runs out and the job is picked up again
+            logger.exception("Failed to record the outcome of job %s", job.job_id)
+
+    async def run_once(self) -> int:
+        """Claims as many due jobs as there are free slots and starts them"""
+        free = self.concurrency - len(self._running)
+        if free <= 0:
+            return 0
+        jobs = await self.backend.claim(free, self.lease)
+        for job in jobs:
+            task = asyncio.create_task(self._run_job(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+        return len(jobs)
+
+    async def drain(self) -> None:
+        """Runs until nothing is due or in flight; meant for tests and scripts"""
+        while await self.run_once() or self._running:
+            await asyncio.wait(self._running, return_when=asyncio.FIRST_COMPLETED)
+
+    async def run(self) -> None:
+        try:
+            while True:
+                try:
+                    claimed = await self.run_once()
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("Failed to claim outbox jobs")
+                    claimed = 0
+
+                if len(self._running) >= self.concurrency:
+                    await asyncio.wait(self._running, return_when=asyncio.FIRST_COMPLETED)
+                elif not claimed:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            for task in list(self._running):
+                task.cancel()
+            if self._running:
+                await asyncio.wait(self._running)
+
+
+_queue_settings = None
+_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Builds the queue on first use and again whenever the settings are reconfigured"""
+    global _queue_settings, _queue
+    settings = get_settings()
+    if settings is not _queue_settings:
+        backend = LocalJobBackend() if settings.JOBS_BACKEND == "local" else OutboxJobBackend()
+        _queue = JobQueue(
+            backend,
+            concurrency=settings.JOBS_CONCURRENCY,
+            max_attempts=settings.JOBS_MAX_ATTEMPTS,
+            poll_interval=settings.JOBS_POLL_SECONDS,
+        )
+        _queue_settings = settings
+    return _queue
+
+
+@job_handler("order.created")
+async def order_created(payload: Dict[str, Any]) -> None:
+    # Confirmation emails and stock sync hook in here as well
+    from db.dals.analytics_dal import AnalyticsDAL
+    from db.session import async_session
+
+    async with async_session() as session:
+        await AnalyticsDAL(session).apply_order(UUID(payload["order_id"]))
+        await session.commit()
@@ -0,0 +1,148 @@
+import logging
+import re
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from prometheus_client import Counter as MetricCounter, Gauge, Histogram
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+DB_QUERY_DURATION = Histogram(
+    "shop_db_query_duration_seconds",
+    "Время выполнения SQL-запроса",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "shop_db_queries_per_request",
+    "Количество SQL-запросов на один HTTP-запрос",
+    ["method", "path"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+DB_REQUEST_QUERY_TIME = Histogram(
+    "shop_db_request_query_time_seconds",
+    "Суммарное время SQL-запросов за один HTTP-запрос",
+    ["method", "path"],
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "shop_db_pool_checkout_wait_seconds",
+    "Время ожидания соединения из пула",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+DB_POOL_IN_USE = Gauge(
+    "shop_db_pool_connections_in_use",
+    "Количество соединений, выданных из пула",
+)
+SINGLEFLIGHT_CALLS = MetricCounter(
+    "shop_singleflight_calls_total",
+    "Запросы через single-flight: leader выполняет вызов, coalesced ждёт чужой",
+    ["name", "result"],
+)
+BCRYPT_DURATION = Histogram(
+    "shop_bcrypt_duration_seconds",
+    "Время хеширования и проверки паролей bcrypt",
+    ["operation"],
+    buckets=(0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0),
+)
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    query_time: float = 0.0
+    statements: Counter | None = None
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+_PARAM_LIST_RE = re.compile(r"(?:\$\d+|%\(\w+\)s|\?)(?:\s*,\s*(?:\$\d+|%\(\w+\)s|\?))+")
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def current_request_stats() -> RequestStats | None:
+    return _request_stats.get()
+
+
+def statement_shape(statement: str) -> str:
+    """Normalizes a statement so that repeated executions with different arguments match"""
+    shape = _WHITESPACE_RE.sub(" ", statement).strip()
+    shape = _PARAM_LIST_RE.sub("?, ...", shape)
+    return _LITERAL_RE.sub("?", shape)
+
+
+def record_query(statement: str, duration: float) -> None:
+    operation = statement.split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+    DB_QUERY_DURATION.labels(operation).observe(duration)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_time += duration
+        if stats.statements is not None:
+            stats.statements[statement_shape(statement)] += 1
+
+
+def route_path(scope: Scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    return getattr(scope.get("endpoint"), "__name__", "__unmatched__")
+
+
+class RequestStatsMiddleware:
+    """Collects per-request SQL statistics recorded by the engine event hooks.
+
+    With ``debug`` enabled every statement shape is tracked: repeated shapes
+    (a typical N+1 pattern) are logged together with the route, and the
+    number of statements is returned in the ``X-DB-Queries`` header.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        record_metrics: bool = True,
+        debug: bool = False,
+        n_plus_one_threshold: int = 3,
+    ) -> None:
+        self.app = app
+        self.record_metrics = record_metrics
+        self.debug = debug
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(statements=Counter() if self.debug else None)
+        token = _request_stats.set(stats)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Queries"] = str(stats.queries)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper if self.debug else send)
+        finally:
+            _request_stats.reset(token)
+            path = route_path(scope)
+            if self.record_metrics:
+                DB_QUERIES_PER_REQUEST.labels(scope["method"], path).observe(stats.queries)
+                DB_REQUEST_QUERY_TIME.labels(scope["method"], path).observe(stats.query_time)
+            if self.debug:
+                self._report(scope["method"], path, stats)
+
+    def _report(self, method: str, path: str, stats: RequestStats) -> None:
+        for shape, count in stats.statements.most_common():
+            if count < self.n_plus_one_threshold:
+                break
+            logger.warning(
+                "Possible N+1 on %s %s: statement executed %d times (%d total): %s",
+                method, path, count, stats.queries, shape,
+            )
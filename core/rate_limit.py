@@ -0,0 +1,158 @@
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException, Request, status
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True)
+class Limit:
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, value: str) -> "Limit":
+        """Parses limits like ``10/minute`` or ``100/hour``"""
+        count, _, period = value.partition("/")
+        period = period.strip().lower().rstrip("s")
+        if period not in _PERIODS:
+            raise ValueError(f"Unknown rate limit period: {value!r}")
+        return cls(capacity=int(count), period=_PERIODS[period])
+
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets. Shared backends (e.g. Redis) implement the same interface."""
+
+    @abstractmethod
+    async def consume(self, key: str, limit: Limit, cost: float = 1.0) -> float:
+        """Takes ``cost`` tokens from the bucket; returns 0 on success or seconds to wait"""
+
+
+class _Shard:
+    __slots__ = ("lock", "buckets", "operations")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.buckets: dict[str, tuple[float, float, float]] = {}
+        self.operations = 0
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process token buckets spread across independently locked shards.
+
+    A bucket expires once it would have refilled completely, so idle keys
+    are dropped by a periodic sweep of the shard they live in.
+    """
+
+    def __init__(self, shards: int = 16, sweep_every: int = 1024, clock: Callable[[], float] = time.monotonic):
+        self._shards = [_Shard() for _ in range(shards)]
+        self._sweep_every = sweep_every
+        self._clock = clock
+
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[hash(key) % len(self._shards)]
+
+    async def consume(self, key: str, limit: Limit, cost: float = 1.0) -> float:
+        now = self._clock()
+        shard = self._shard(key)
+        with shard.lock:
+            tokens, updated_at, _ = shard.buckets.get(key, (limit.capacity, now, 0.0))
+            tokens = min(limit.capacity, tokens + (now - updated_at) * limit.rate)
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (cost - tokens) / limit.rate
+            expires_at = now + (limit.capacity - tokens) / limit.rate
+            shard.buckets[key] = (tokens, now, expires_at)
+
+            shard.operations += 1
+            if shard.operations >= self._sweep_every:
+                shard.operations = 0
+                self._sweep(shard, now)
+        return wait
+
+    @staticmethod
+    def _sweep(shard: _Shard, now: float) -> None:
+        expired = [key for key, (_, _, expires_at) in shard.buckets.items() if expires_at <= now]
+        for key in expired:
+            del shard.buckets[key]
+
+    def __len__(self) -> int:
+        return sum(len(shard.buckets) for shard in self._shards)
+
+
+default_backend: RateLimitBackend = MemoryRateLimitBackend()
+
+
+def set_default_backend(backend: RateLimitBackend) -> None:
+    global default_backend
+    default_backend = backend
+
+
+KeyFunc = Callable[[Request], Awaitable[str | None]]
+
+
+async def client_ip(request: Request) -> str | None:
+    return request.client.host if request.client else None
+
+
+async def login_account(request: Request) -> str | None:
+    form = await request.form()
+    username = form.get("username")
+    return username.strip().lower() if isinstance(username, str) else None
+
+
+async def body_email(request: Request) -> str | None:
+    if request.method != "POST":
+        return None
+    try:
+        data = await request.json()
+    except ValueError:
+        return None
+    email = data.get("email") if isinstance(data, dict) else None
+    return email.strip().lower() if isinstance(email, str) else None
+
+
+class RateLimiter:
+    """Dependency rejecting requests with 429 once the bucket for their key is empty.
+
+    Attach it to a router via ``include_router(..., dependencies=[Depends(limiter)])``,
+    or to a single route via its ``dependencies=``, so the check runs before
+    the endpoint touches the database or bcrypt.
+    """
+
+    def __init__(
+        self,
+        scope: str,
+        limit: Limit | str,
+        key: KeyFunc = client_ip,
+        backend: RateLimitBackend | None = None,
+    ) -> None:
+        self.scope = scope
+        self.limit = Limit.parse(limit) if isinstance(limit, str) else limit
+        self.key = key
+        self.backend = backend
+
+    async def __call__(self, request: Request) -> None:
+        key = await self.key(request)
+        if key is None:
+            return
+
+        backend = self.backend or default_backend
+        wait = await backend.consume(f"{self.scope}:{key}", self.limit)
+        if wait > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Слишком много запросов, попробуйте позже",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
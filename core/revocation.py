@@ -0,0 +1,100 @@
+import asyncio
+import hashlib
+import logging
+import math
+from datetime import datetime
+from typing import Iterable
+
+from core.clock import utcnow
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(capacity, 1)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class RevocationList:
+    """In-memory copy of ``revoked_tokens`` used to verify access tokens without the DB.
+
+    The bloom filter answers the common "not revoked" case; only its hits
+    are confirmed against the set. Revocations made by this worker apply
+    immediately, those made by other workers after the next ``sync``.
+    """
+
+    def __init__(self, capacity: int = 10_000):
+        self.capacity = capacity
+        self._ids: set[str] = set()
+        self._bloom = BloomFilter(capacity)
+        self._recent: dict[str, datetime] = {}
+        self.synced_at: datetime | None = None
+
+    def is_revoked(self, token_id: str) -> bool:
+        if token_id not in self._bloom:
+            return False
+        return token_id in self._ids
+
+    def add(self, token_id: str) -> None:
+        self._recent[token_id] = utcnow()
+        if len(self._ids) >= self.capacity:
+            self.replace(self._ids | {token_id})
+            return
+        self._ids.add(token_id)
+        self._bloom.add(token_id)
+
+    def replace(self, token_ids: Iterable[str]) -> None:
+        ids = set(token_ids)
+        capacity = max(self.capacity, 2 * len(ids))
+        bloom = BloomFilter(capacity)
+        for token_id in ids:
+            bloom.add(token_id)
+        self.capacity, self._ids, self._bloom = capacity, ids, bloom
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    async def sync(self, dal) -> None:
+        now = utcnow()
+        await dal.purge_expired(now)
+        active = await dal.get_active_token_ids(now)
+        # keep local revocations that the snapshot may have raced with
+        self._recent = {token_id: at for token_id, at in self._recent.items() if at >= now}
+        self.replace([*active, *self._recent])
+        self.synced_at = now
+
+
+revocation_list = RevocationList()
+
+
+async def run_revocation_sync(interval: float) -> None:
+    from db.dals.token_dal import TokenDAL
+    from db.session import async_session
+
+    while True:
+        try:
+            async with async_session() as session:
+                await revocation_list.sync(TokenDAL(session))
+                await session.commit()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Failed to sync token revocation list")
+        await asyncio.sleep(interval)
@@ -1,13 +1,36 @@
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
-from jose import jwt
+from jose import JWTError
 
-from core.config import settings
+from core.config import Settings, get_settings
+from core.tokens import VerifiedTokenCache, build_backend
+
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
+verified_tokens = VerifiedTokenCache(0)
+
+_backend_settings: Settings | None = None
+_backend = None
+
+
+def get_jwt_backend():
+    """Builds keys on first use and again whenever the settings are reconfigured"""
+    global _backend_settings, _backend
+    settings = get_settings()
+    if settings is not _backend_settings:
+        _backend = build_backend(settings)
+        _backend_settings = settings
+        verified_tokens.clear()
+        verified_tokens.maxsize = settings.JWT_CACHE_SIZE
+    return _backend
 
 
 def create_access_token(data: dict[str, Any], expires_delta: timedelta | None = None) -> str:
 
+    settings = get_settings()
     to_encode = data.copy()
 
     if expires_delta:
@@ -16,11 +39,57 @@ def create_access_token(data: dict[str, Any], expires_delta: timedelta | None =
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 
     to_encode.update({"exp": expire})
+    to_encode.setdefault("type", ACCESS_TOKEN_TYPE)
+
+    encoded_jwt = get_jwt_backend().encode(to_encode)
+
+    return encoded_jwt
+
+
+def create_refresh_token(data: dict[str, Any], expires_delta: timedelta | None = None) -> str:
+
+    to_encode = data.copy()
+    to_encode.update({
+        "type": REFRESH_TOKEN_TYPE,
+        "jti": uuid.uuid4().hex,
+    })
 
-    encoded_jwt = jwt.encode(
+    return create_access_token(
         to_encode,
-        settings.SECRET_KEY,
-        algorithm=settings.ALGORITHM
+        expires_delta or timedelta(days=get_settings().REFRESH_TOKEN_EXPIRE_DAYS)
     )
 
-    return encoded_jwt
\ No newline at end of file
+
+def create_token_pair(user, session_id: str | None = None) -> dict[str, Any]:
+    """Issues a short-lived access token and a refresh token bound to one login session"""
+
+    claims = {
+        "sub": user.email,
+        "uid": str(user.user_id),
+        "sid": session_id or uuid.uuid4().hex,
+    }
+
+    return {
+        "access_token": create_access_token({**claims, "roles": user.role}),
+        "refresh_token": create_refresh_token(claims),
+        "token_type": "bearer",
+        "expires_in": get_settings().ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+def decode_token(token: str, token_type: str = ACCESS_TOKEN_TYPE) -> dict[str, Any]:
+
+    backend = get_jwt_backend()
+    payload = verified_tokens.get(token)
+    if payload is None:
+        payload = backend.decode(token)
+        verified_tokens.put(token, payload)
+
+    if payload.get("type", ACCESS_TOKEN_TYPE) != token_type:
+        raise JWTError("Unexpected token type")
+
+    return payload
+
+
+def token_expiry(payload: dict[str, Any]) -> datetime:
+    return datetime.fromtimestamp(payload["exp"], timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,44 @@
+"""Request coalescing for identical concurrent reads.
+
+The first caller with a key (the leader) starts the call; callers arriving
+while it is in flight await the same result instead of issuing their own
+query. Nothing is cached: once the call finishes, the next caller with the
+key starts a fresh one.
+
+The call runs in its own task and must not use the leader's request
+session, so a leader that disconnects neither cancels the call for the
+others nor closes a session still in use. Results are shared between
+requests, so return plain data (dicts, pydantic models), not ORM objects.
+Coalescing is per process.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from core.metrics import SINGLEFLIGHT_CALLS
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            SINGLEFLIGHT_CALLS.labels(self.name, "leader").inc()
+            task = asyncio.create_task(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            SINGLEFLIGHT_CALLS.labels(self.name, "coalesced").inc()
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Every waiter may have gone away; don't let the error go unretrieved
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,127 @@
+import hashlib
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from jose import JWTError, jwk
+from jose import jwt as jose_jwt
+
+_SYMMETRIC_PREFIX = "HS"
+
+
+def _read_key(value: str | None) -> str | None:
+    """Keys can be given inline (PEM) or as a path to a PEM file"""
+    if not value or value.lstrip().startswith("-----BEGIN"):
+        return value
+    return Path(value).read_text()
+
+
+class JoseBackend:
+    """python-jose with key objects constructed once instead of on every call"""
+
+    def __init__(self, algorithm: str, signing_key: str, verification_key: str):
+        self.algorithm = algorithm
+        self._signing_key = jwk.construct(signing_key, algorithm)
+        self._verification_key = jwk.construct(verification_key, algorithm)
+
+    def encode(self, claims: dict[str, Any]) -> str:
+        return jose_jwt.encode(claims, self._signing_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict[str, Any]:
+        return jose_jwt.decode(token, self._verification_key, algorithms=[self.algorithm])
+
+
+class PyJWTBackend:
+    """PyJWT backend, required for EdDSA (Ed25519) keys"""
+
+    def __init__(self, algorithm: str, signing_key: str, verification_key: str):
+        try:
+            import jwt
+        except ImportError as e:
+            raise RuntimeError("JWT_BACKEND=pyjwt requires the PyJWT package") from e
+
+        self._jwt = jwt
+        self.algorithm = algorithm
+        algorithm_impl = jwt.get_algorithm_by_name(algorithm)
+        self._signing_key = algorithm_impl.prepare_key(signing_key)
+        self._verification_key = algorithm_impl.prepare_key(verification_key)
+
+    def encode(self, claims: dict[str, Any]) -> str:
+        return self._jwt.encode(claims, self._signing_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict[str, Any]:
+        try:
+            return self._jwt.decode(
+                token,
+                self._verification_key,
+                algorithms=[self.algorithm],
+                options={"verify_aud": False},
+            )
+        except self._jwt.PyJWTError as e:
+            raise JWTError(str(e)) from e
+
+
+_BACKENDS = {"jose": JoseBackend, "pyjwt": PyJWTBackend}
+
+
+def build_backend(settings):
+    if settings.ALGORITHM.startswith(_SYMMETRIC_PREFIX):
+        signing_key = verification_key = settings.SECRET_KEY
+    else:
+        signing_key = _read_key(settings.JWT_PRIVATE_KEY)
+        verification_key = _read_key(settings.JWT_PUBLIC_KEY)
+        if not signing_key or not verification_key:
+            raise RuntimeError(f"{settings.ALGORITHM} requires JWT_PRIVATE_KEY and JWT_PUBLIC_KEY")
+
+    try:
+        backend_class = _BACKENDS[settings.JWT_BACKEND]
+    except KeyError as e:
+        raise RuntimeError(f"Unknown JWT_BACKEND: {settings.JWT_BACKEND!r}") from e
+
+    if settings.ALGORITHM == "EdDSA" and backend_class is JoseBackend:
+        raise RuntimeError("EdDSA is only supported with JWT_BACKEND=pyjwt")
+
+    return backend_class(settings.ALGORITHM, signing_key, verification_key)
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of already verified tokens, keyed by the token digest.
+
+    An entry is only served until the token's ``exp``, so caching never
+    extends a token's lifetime.
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[bytes, tuple[dict[str, Any], float]] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict[str, Any] | None:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        payload, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def put(self, token: str, payload: dict[str, Any]) -> None:
+        expires_at = payload.get("exp")
+        if self.maxsize <= 0 or not isinstance(expires_at, (int, float)):
+            return
+        self._entries[self._key(token)] = (payload, float(expires_at))
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
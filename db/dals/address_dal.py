@@ -1,66 +1,112 @@
 from typing import List, Optional
 from uuid import UUID
 
-from sqlalchemy import select, update, delete
+from sqlalchemy import bindparam, case, insert, select, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.attributes import set_committed_value
 
-from db.models import Address, User
+from db.models import Address
+
+
+GET_USER_ADDRESSES = (
+    select(Address)
+    .where(Address.user_id == bindparam("user_id"))
+    .order_by(Address.is_default.desc(), Address.address_id)
+)
+
+GET_ADDRESS = select(Address).where(
+    Address.address_id == bindparam("address_id"),
+    Address.user_id == bindparam("user_id")
+)
+
+DELETE_ADDRESS = (
+    delete(Address)
+    .where(Address.address_id == bindparam("address_id"), Address.user_id == bindparam("user_id"))
+    .execution_options(synchronize_session=False)
+)
+
+IS_TARGET = Address.address_id == bindparam("target_id")
+
+_owned = aliased(Address)
+OWNS_TARGET = (
+    select(_owned.address_id)
+    .where(_owned.address_id == bindparam("target_id"), _owned.user_id == bindparam("owner_id"))
+    .exists()
+)
+
+# One statement flips the flag on every address of the user, so the switch
+# is atomic; the guard keeps an unknown address from clearing the default.
+# "fetch" reads the touched ids back through RETURNING and expires the flag
+# on addresses already loaded in the session, so they don't keep a stale one
+SWITCH_DEFAULT_ADDRESS = (
+    update(Address)
+    .where(Address.user_id == bindparam("owner_id"), OWNS_TARGET)
+    .values(is_default=IS_TARGET)
+    .execution_options(synchronize_session="fetch")
+)
 
 
 class AddressDAL:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def create_address(self, user: User, data: dict) -> Address:
-        address = Address(user_id=user.user_id, **data)
-        self.session.add(address)
-        await self.session.flush()
+    async def create_address(self, user_id: UUID, data: dict) -> Address:
+        make_default = data.pop("is_default", False)
+        stmt = insert(Address).values(user_id=user_id, is_default=False, **data).returning(Address)
+        address = (await self.session.execute(stmt)).scalar_one()
+        if make_default:
+            await self.set_default_address(address.address_id, user_id)
+            # Already written by the switch, which expired the flag; set it
+            # back without a reload (lazy loads don't work under asyncio)
+            set_committed_value(address, "is_default", True)
         return address
 
     async def get_user_addresses(self, user_id: UUID) -> List[Address]:
-        stmt = select(Address).where(Address.user_id == user_id).order_by(Address.is_default.desc(), Address.address_id)
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(GET_USER_ADDRESSES, {"user_id": user_id})
         return result.scalars().all()
 
     async def get_address_by_id(self, address_id: UUID, user_id: UUID) -> Optional[Address]:
-        stmt = select(Address).where(
-            Address.address_id == address_id,
-            Address.user_id == user_id
-        )
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(GET_ADDRESS, {"address_id": address_id, "user_id": user_id})
         return result.scalars().first()
 
-    async def update_address(self, address: Address, data: dict) -> Address:
-        for key, value in data.items():
-            if value is not None:
-                setattr(address, key, value)
-        await self.session.flush()
-        return address
+    async def update_address(self, address_id: UUID, user_id: UUID, data: dict) -> Optional[Address]:
+        """Applies the edit with a single UPDATE ... RETURNING; None if the address isn't the user's"""
+        values = {key: value for key, value in data.items() if value is not None and key != "is_default"}
+        params = {"target_id": address_id, "owner_id": user_id}
+
+        if data.get("is_default"):
+            # Edit and default switch in one statement: the other addresses
+            # only lose the flag, their fields are written back unchanged
+            stmt = (
+                update(Address)
+                .where(Address.user_id == bindparam("owner_id"), OWNS_TARGET)
+                .values(
+                    {key: case((IS_TARGET, value), else_=getattr(Address, key)) for key, value in values.items()}
+                    | {"is_default": IS_TARGET}
+                )
+            )
+        else:
+            if data.get("is_default") is False:
+                values["is_default"] = False
+            if not values:
+                return await self.get_address_by_id(address_id, user_id)
+            stmt = (
+                update(Address)
+                .where(IS_TARGET, Address.user_id == bindparam("owner_id"))
+                .values(values)
+            )
+
+        stmt = stmt.returning(Address).execution_options(synchronize_session=False, populate_existing=True)
+        result = await self.session.execute(stmt, params)
+        return next((address for address in result.scalars() if address.address_id == address_id), None)
 
     async def delete_address(self, address_id: UUID, user_id: UUID) -> bool:
-        stmt = delete(Address).where(
-            Address.address_id == address_id,
-            Address.user_id == user_id
-        )
-        result = await self.session.execute(stmt)
+        result = await self.session.execute(DELETE_ADDRESS, {"address_id": address_id, "user_id": user_id})
         return result.rowcount > 0
 
     async def set_default_address(self, address_id: UUID, user_id: UUID) -> bool:
-
-        reset_stmt = (
-            update(Address)
-            .where(Address.user_id == user_id)
-            .values(is_default=False)
+        result = await self.session.execute(
+            SWITCH_DEFAULT_ADDRESS, {"target_id": address_id, "owner_id": user_id}
         )
-        await self.session.execute(reset_stmt)
-
-        set_stmt = (
-            update(Address)
-            .where(
-                Address.address_id == address_id,
-                Address.user_id == user_id
-            )
-            .values(is_default=True)
-        )
-        result = await self.session.execute(set_stmt)
-        return result.rowcount > 0
\ No newline at end of file
+        return result.rowcount > 0
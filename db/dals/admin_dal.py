@@ -1,10 +1,47 @@
-from typing import Union, List, Optional
+from typing import Dict, Union, List, Optional
 from uuid import UUID
 
-from sqlalchemy import select, update, delete
+from sqlalchemy import String, any_, bindparam, func, insert, select, update, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.models import Product, Category
+from db.errors import CATEGORIES_NAME_KEY, PRODUCTS_CATEGORY_FKEY, violated_constraint
+from db.models import Product, ProductImage, Category
+
+
+GET_PRODUCT = select(Product).where(Product.product_id == bindparam("product_id"))
+
+# One array parameter keeps a single statement shape whatever the batch size
+GET_PRODUCTS_BY_IDS = select(Product).where(
+    Product.product_id == any_(bindparam("product_ids", type_=ARRAY(PG_UUID(as_uuid=True))))
+)
+
+DELETE_PRODUCT = (
+    delete(Product)
+    .where(Product.product_id == bindparam("product_id"))
+    .returning(Product.product_id)
+    .execution_options(synchronize_session=False)
+)
+
+ADD_PRODUCT_IMAGE_URLS = (
+    update(Product)
+    .where(Product.product_id == bindparam("target_id"))
+    .values(
+        images=func.array_append(Product.images, bindparam("image_url", type_=String)),
+        thumbnails=func.array_append(Product.thumbnails, bindparam("thumbnail_url", type_=String)),
+    )
+    .execution_options(synchronize_session=False)
+)
+
+GET_CATEGORY = select(Category).where(Category.category_id == bindparam("category_id"))
+
+DELETE_CATEGORY = (
+    delete(Category)
+    .where(Category.category_id == bindparam("category_id"))
+    .returning(Category.category_id)
+    .execution_options(synchronize_session=False)
+)
 
 
 class AdminDAL:
@@ -24,7 +61,7 @@ class AdminDAL:
         discount_percentage: float = 0.0,
         images: List[str] = None,
     ) -> Product:
-        new_product = Product(
+        stmt = insert(Product).values(
             name=name,
             price=price,
             description=description,
@@ -32,19 +69,46 @@ class AdminDAL:
             discount_percentage=discount_percentage,
             category_id=category_id,
             images=images or [],
-        )
-        self.db_session.add(new_product)
-        await self.db_session.flush()
-        return new_product
+        ).returning(Product)
+        try:
+            res = await self.db_session.execute(stmt)
+        except IntegrityError as e:
+            # Rolling back is left to the unit of work
+            if violated_constraint(e) == PRODUCTS_CATEGORY_FKEY:
+                raise ValueError("Категория не найдена") from e
+            raise
+        return res.scalar_one()
 
     async def get_product_by_id(self, product_id: UUID) -> Union[Product, None]:
-        query = select(Product).where(Product.product_id == product_id)
-        res = await self.db_session.execute(query)
+        res = await self.db_session.execute(GET_PRODUCT, {"product_id": product_id})
         row = res.fetchone()
         if row:
             return row[0]
         return None
 
+    async def get_products_by_ids(self, product_ids: List[UUID]) -> Dict[UUID, Product]:
+        res = await self.db_session.execute(GET_PRODUCTS_BY_IDS, {"product_ids": product_ids})
+        return {product.product_id: product for product in res.scalars()}
+
+    async def add_product_image(
+        self,
+        product_id: UUID,
+        key: str,
+        width: int,
+        height: int,
+        variants: List[dict],
+        image_url: str,
+        thumbnail_url: str,
+    ) -> ProductImage:
+        stmt = insert(ProductImage).values(
+            product_id=product_id, key=key, width=width, height=height, variants=variants
+        ).returning(ProductImage)
+        image = (await self.db_session.execute(stmt)).scalar_one()
+        await self.db_session.execute(ADD_PRODUCT_IMAGE_URLS, {
+            "target_id": product_id, "image_url": image_url, "thumbnail_url": thumbnail_url,
+        })
+        return image
+
     async def update_product(self, product_id: UUID, **kwargs) -> Union[UUID, None]:
         if not kwargs:
             return None
@@ -62,12 +126,7 @@ class AdminDAL:
         return None
 
     async def delete_product(self, product_id: UUID) -> Union[UUID, None]:
-        query = (
-            delete(Product)
-            .where(Product.product_id == product_id)
-            .returning(Product.product_id)
-        )
-        res = await self.db_session.execute(query)
+        res = await self.db_session.execute(DELETE_PRODUCT, {"product_id": product_id})
         row = res.fetchone()
         if row:
             return row[0]
@@ -80,17 +139,17 @@ class AdminDAL:
         name: str,
         description: Optional[str] = None,
     ) -> Category:
-        new_category = Category(
-            name=name,
-            description=description,
-        )
-        self.db_session.add(new_category)
-        await self.db_session.flush()
-        return new_category
+        stmt = insert(Category).values(name=name, description=description).returning(Category)
+        try:
+            res = await self.db_session.execute(stmt)
+        except IntegrityError as e:
+            if violated_constraint(e) == CATEGORIES_NAME_KEY:
+                raise ValueError("Категория с таким названием уже существует") from e
+            raise
+        return res.scalar_one()
 
     async def get_category_by_id(self, category_id: UUID) -> Union[Category, None]:
-        query = select(Category).where(Category.category_id == category_id)
-        res = await self.db_session.execute(query)
+        res = await self.db_session.execute(GET_CATEGORY, {"category_id": category_id})
         row = res.fetchone()
         if row:
             return row[0]
@@ -113,12 +172,7 @@ class AdminDAL:
         return None
 
     async def delete_category(self, category_id: UUID) -> Union[UUID, None]:
-        query = (
-            delete(Category)
-            .where(Category.category_id == category_id)
-            .returning(Category.category_id)
-        )
-        res = await self.db_session.execute(query)
+        res = await self.db_session.execute(DELETE_CATEGORY, {"category_id": category_id})
         row = res.fetchone()
         if row:
             return row[0]
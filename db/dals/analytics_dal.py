@@ -0,0 +1,224 @@
+from collections import defaultdict
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, List
+from uuid import UUID
+
+from sqlalchemy import Date, bindparam, cast, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models import (
+    Category, Order, OrderItem, Product,
+    SalesDaily, SalesDailyCategory, SalesDailyProduct, SalesRollupOrder,
+)
+
+# Per-order increments take the lock shared, a rebuild takes it exclusively,
+# so a rebuild never interleaves with increments for the days it rewrites
+ROLLUP_LOCK_ID = 0x5A1E5
+
+LOCK_FOR_INCREMENT = select(func.pg_advisory_xact_lock_shared(ROLLUP_LOCK_ID))
+LOCK_FOR_REBUILD = select(func.pg_advisory_xact_lock(ROLLUP_LOCK_ID))
+
+ORDER_DAY = cast(Order.created_at, Date)
+
+MARK_ORDER_COUNTED = (
+    insert(SalesRollupOrder)
+    .values(order_id=bindparam("counted_id"))
+    .on_conflict_do_nothing(index_elements=[SalesRollupOrder.order_id])
+    .returning(SalesRollupOrder.order_id)
+)
+
+GET_ORDER_LINES = (
+    select(
+        Order.created_at, Order.total, OrderItem.product_id, OrderItem.quantity,
+        Product.category_id, OrderItem.line_total.label("revenue"),
+    )
+    .join(OrderItem, (OrderItem.order_id == Order.order_id) & (OrderItem.order_created_at == Order.created_at))
+    # Outer join: a deleted product still counts towards the day and product totals
+    .outerjoin(Product, Product.product_id == OrderItem.product_id)
+    .where(Order.order_id == bindparam("order_id"))
+)
+
+
+def _increment(model, keys: list):
+    stmt = insert(model)
+    counters = [name for name in ("orders_count", "items_count", "quantity", "revenue") if name in model.__table__.c]
+    return stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={name: model.__table__.c[name] + stmt.excluded[name] for name in counters},
+    )
+
+
+INCREMENT_DAILY = _increment(SalesDaily, ["day"])
+INCREMENT_DAILY_CATEGORY = _increment(SalesDailyCategory, ["day", "category_id"])
+INCREMENT_DAILY_PRODUCT = _increment(SalesDailyProduct, ["day", "product_id"])
+
+
+def _clear_days(model):
+    return (
+        delete(model)
+        .where(model.day >= bindparam("start"), model.day < bindparam("end"))
+        .execution_options(synchronize_session=False)
+    )
+
+
+CLEAR_ROLLUPS = [_clear_days(SalesDaily), _clear_days(SalesDailyCategory), _clear_days(SalesDailyProduct)]
+
+ORDERS_IN_DAYS = (Order.created_at >= bindparam("since"), Order.created_at < bindparam("until"))
+# A rebuild marks the days' orders first and aggregates only marked ones: under
+# READ COMMITTED an order committed between the statements is then left to its
+# own increment instead of being marked without being counted
+COUNTED = select(SalesRollupOrder.order_id).where(SalesRollupOrder.order_id == Order.order_id).exists()
+ITEMS_IN_DAYS = (OrderItem.order_created_at >= bindparam("since"), OrderItem.order_created_at < bindparam("until"))
+
+ORDER_ITEM_COUNTS = (
+    select(OrderItem.order_id, OrderItem.order_created_at, func.sum(OrderItem.quantity).label("items_count"))
+    .where(*ITEMS_IN_DAYS)
+    .group_by(OrderItem.order_id, OrderItem.order_created_at)
+    .subquery()
+)
+
+# INSERT ... SELECT goes through the tables, not the ORM entities: ORM bulk
+# insert would take the statement's parameters for row values
+REBUILD_DAILY = insert(SalesDaily.__table__).from_select(
+    ["day", "orders_count", "items_count", "revenue"],
+    select(
+        ORDER_DAY,
+        func.count(),
+        func.coalesce(func.sum(ORDER_ITEM_COUNTS.c.items_count), 0),
+        func.sum(Order.total),
+    )
+    .outerjoin(
+        ORDER_ITEM_COUNTS,
+        (ORDER_ITEM_COUNTS.c.order_id == Order.order_id)
+        & (ORDER_ITEM_COUNTS.c.order_created_at == Order.created_at),
+    )
+    .where(*ORDERS_IN_DAYS, COUNTED)
+    .group_by(ORDER_DAY),
+)
+
+_LINES_IN_DAYS = (
+    select(Order)
+    .join(OrderItem, (OrderItem.order_id == Order.order_id) & (OrderItem.order_created_at == Order.created_at))
+    .outerjoin(Product, Product.product_id == OrderItem.product_id)
+    .where(*ORDERS_IN_DAYS, *ITEMS_IN_DAYS, COUNTED)
+)
+
+REBUILD_DAILY_CATEGORY = insert(SalesDailyCategory.__table__).from_select(
+    ["day", "category_id", "quantity", "revenue"],
+    _LINES_IN_DAYS.with_only_columns(
+        ORDER_DAY, Product.category_id, func.sum(OrderItem.quantity), func.sum(OrderItem.line_total)
+    ).where(Product.category_id.is_not(None)).group_by(ORDER_DAY, Product.category_id),
+)
+
+REBUILD_DAILY_PRODUCT = insert(SalesDailyProduct.__table__).from_select(
+    ["day", "product_id", "quantity", "revenue"],
+    _LINES_IN_DAYS.with_only_columns(
+        ORDER_DAY, OrderItem.product_id, func.sum(OrderItem.quantity), func.sum(OrderItem.line_total)
+    ).group_by(ORDER_DAY, OrderItem.product_id),
+)
+
+MARK_DAYS_COUNTED = (
+    insert(SalesRollupOrder.__table__)
+    .from_select(["order_id"], select(Order.order_id).where(*ORDERS_IN_DAYS))
+    .on_conflict_do_nothing(index_elements=[SalesRollupOrder.__table__.c.order_id])
+)
+
+GET_DAILY = (
+    select(SalesDaily)
+    .where(SalesDaily.day >= bindparam("start"), SalesDaily.day <= bindparam("end"))
+    .order_by(SalesDaily.day)
+)
+
+GET_DAILY_BY_CATEGORY = (
+    select(
+        SalesDailyCategory.day, SalesDailyCategory.category_id, Category.name.label("category_name"),
+        SalesDailyCategory.quantity, SalesDailyCategory.revenue,
+    )
+    .outerjoin(Category, Category.category_id == SalesDailyCategory.category_id)
+    .where(SalesDailyCategory.day >= bindparam("start"), SalesDailyCategory.day <= bindparam("end"))
+    .order_by(SalesDailyCategory.day, SalesDailyCategory.revenue.desc())
+)
+
+GET_TOP_PRODUCTS = (
+    select(
+        SalesDailyProduct.product_id, Product.name.label("product_name"),
+        func.sum(SalesDailyProduct.quantity).label("quantity"),
+        func.sum(SalesDailyProduct.revenue).label("revenue"),
+    )
+    .outerjoin(Product, Product.product_id == SalesDailyProduct.product_id)
+    .where(SalesDailyProduct.day >= bindparam("start"), SalesDailyProduct.day <= bindparam("end"))
+    .group_by(SalesDailyProduct.product_id, Product.name)
+    .order_by(func.sum(SalesDailyProduct.revenue).desc())
+    .limit(bindparam("limit"))
+)
+
+class AnalyticsDAL:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def apply_order(self, order_id: UUID) -> bool:
+        """Adds one order to the rollups; returns False if it was already counted"""
+        await self.session.execute(LOCK_FOR_INCREMENT)
+        lines = (await self.session.execute(GET_ORDER_LINES, {"order_id": order_id})).all()
+        if not lines:
+            return False
+
+        counted = await self.session.execute(MARK_ORDER_COUNTED, {"counted_id": order_id})
+        if counted.first() is None:
+            return False
+
+        day = lines[0].created_at.date()
+        categories: dict[UUID, list] = defaultdict(lambda: [0, Decimal("0")])
+        products: dict[UUID, list] = defaultdict(lambda: [0, Decimal("0")])
+        for line in lines:
+            for totals, key in ((categories, line.category_id), (products, line.product_id)):
+                if key is None:
+                    continue
+                totals[key][0] += line.quantity
+                totals[key][1] += line.revenue
+
+        await self.session.execute(INCREMENT_DAILY, {
+            "day": day,
+            "orders_count": 1,
+            "items_count": sum(line.quantity for line in lines),
+            "revenue": lines[0].total,
+        })
+        if categories:
+            await self.session.execute(INCREMENT_DAILY_CATEGORY, [
+                {"day": day, "category_id": key, "quantity": quantity, "revenue": revenue}
+                for key, (quantity, revenue) in categories.items()
+            ])
+        if products:
+            await self.session.execute(INCREMENT_DAILY_PRODUCT, [
+                {"day": day, "product_id": key, "quantity": quantity, "revenue": revenue}
+                for key, (quantity, revenue) in products.items()
+            ])
+        return True
+
+    async def rebuild_days(self, start: date, end: date) -> None:
+        """Recomputes the rollups for [start, end) from orders and order_items"""
+        params = {
+            "start": start,
+            "end": end,
+            "since": datetime.combine(start, time.min),
+            "until": datetime.combine(end, time.min),
+        }
+        await self.session.execute(LOCK_FOR_REBUILD)
+        for stmt in CLEAR_ROLLUPS:
+            await self.session.execute(stmt, params)
+        for stmt in (MARK_DAYS_COUNTED, REBUILD_DAILY, REBUILD_DAILY_CATEGORY, REBUILD_DAILY_PRODUCT):
+            await self.session.execute(stmt, params)
+
+    async def get_daily(self, start: date, end: date) -> List[SalesDaily]:
+        result = await self.session.execute(GET_DAILY, {"start": start, "end": end})
+        return result.scalars().all()
+
+    async def get_daily_by_category(self, start: date, end: date) -> List[Any]:
+        result = await self.session.execute(GET_DAILY_BY_CATEGORY, {"start": start, "end": end})
+        return result.all()
+
+    async def get_top_products(self, start: date, end: date, limit: int) -> List[Any]:
+        result = await self.session.execute(GET_TOP_PRODUCTS, {"start": start, "end": end, "limit": limit})
+        return result.all()
@@ -1,39 +1,109 @@
-from typing import Optional
-from uuid import UUID
+from typing import Dict, List, Optional
+from uuid import UUID, uuid4
 
-from sqlalchemy import select, delete, update
+from sqlalchemy import Integer, bindparam, column, func, select, delete, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from db.models import Cart, CartItem, User
+from db.models import Cart, CartItem, Product
+
+
+# Statements are built once; their compiled form is cached by SQLAlchemy
+# and only the bound parameters change between calls. Bulk DML skips the
+# in-session synchronisation, the cart is re-read with populate_existing.
+
+GET_CART_WITH_ITEMS = (
+    select(Cart)
+    .options(selectinload(Cart.items).selectinload(CartItem.product))
+    .where(Cart.user_id == bindparam("user_id"))
+    .execution_options(populate_existing=True)
+)
+
+GET_CART_ITEM = select(CartItem).where(
+    CartItem.cart_id == bindparam("cart_id"),
+    CartItem.product_id == bindparam("product_id")
+)
+
+UPDATE_ITEM_QUANTITY = (
+    update(CartItem)
+    .where(CartItem.cart_id == bindparam("item_cart_id"), CartItem.product_id == bindparam("item_product_id"))
+    .values(quantity=bindparam("new_quantity"))
+    .returning(CartItem)
+    # the RETURNING row refreshes the item already loaded with the cart
+    .execution_options(synchronize_session=False, populate_existing=True)
+)
+
+DELETE_CART_ITEM = (
+    delete(CartItem)
+    .where(CartItem.cart_id == bindparam("cart_id"), CartItem.product_id == bindparam("product_id"))
+    .execution_options(synchronize_session=False)
+)
+
+CLEAR_CART = (
+    delete(CartItem)
+    .where(CartItem.cart_id == bindparam("cart_id"))
+    .execution_options(synchronize_session=False)
+)
+
+_ensure = insert(Cart).values(cart_id=bindparam("new_cart_id"), user_id=bindparam("owner_id"))
+# The no-op update makes RETURNING yield the existing row on conflict
+ENSURE_CART = _ensure.on_conflict_do_update(
+    index_elements=[Cart.user_id], set_={"user_id": _ensure.excluded.user_id}
+).returning(Cart.cart_id)
+
+GET_PRODUCTS = select(Product).where(Product.product_id.in_(bindparam("product_ids", expanding=True)))
+
+DELETE_ITEMS_EXCEPT = (
+    delete(CartItem)
+    .where(
+        CartItem.cart_id == bindparam("cart_id"),
+        CartItem.product_id.not_in(bindparam("product_ids", expanding=True)),
+    )
+    .execution_options(synchronize_session=False)
+)
+
+NEW_ITEMS = (
+    func.unnest(
+        bindparam("product_ids", type_=ARRAY(PG_UUID(as_uuid=True))),
+        bindparam("quantities", type_=ARRAY(Integer)),
+    )
+    .table_valued(column("product_id", PG_UUID(as_uuid=True)), column("quantity", Integer))
+    .render_derived(name="new_items", with_types=False)
+)
+
+# Products deleted in the meantime are skipped by the join instead of
+# failing the whole write on the foreign key
+_upsert = insert(CartItem).from_select(
+    ["cart_id", "product_id", "quantity"],
+    select(bindparam("cart_id", type_=PG_UUID(as_uuid=True)), NEW_ITEMS.c.product_id, NEW_ITEMS.c.quantity)
+    .join(Product, Product.product_id == NEW_ITEMS.c.product_id),
+)
+UPSERT_ITEMS = _upsert.on_conflict_do_update(
+    index_elements=[CartItem.cart_id, CartItem.product_id],
+    set_={"quantity": _upsert.excluded.quantity},
+)
 
 
 class CartDAL:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def get_or_create_cart(self, user: User) -> Cart:
-        stmt = (
-            select(Cart)
-            .options(selectinload(Cart.items).selectinload(CartItem.product))
-            .where(Cart.user_id == user.user_id)
-        )
-        result = await self.session.execute(stmt)
+    async def get_or_create_cart(self, user_id: UUID) -> Cart:
+        result = await self.session.execute(GET_CART_WITH_ITEMS, {"user_id": user_id})
         cart = result.scalars().first()
 
         if cart is None:
-            cart = Cart(user_id=user.user_id)
+            cart = Cart(user_id=user_id)
             self.session.add(cart)
             await self.session.flush()
 
         return cart
 
     async def add_item(self, cart: Cart, product_id: UUID, quantity: int = 1) -> CartItem:
-        stmt = select(CartItem).where(
-            CartItem.cart_id == cart.cart_id,
-            CartItem.product_id == product_id
+        result = await self.session.execute(
+            GET_CART_ITEM, {"cart_id": cart.cart_id, "product_id": product_id}
         )
-        result = await self.session.execute(stmt)
         item = result.scalars().first()
 
         if item:
@@ -59,24 +129,41 @@ class CartDAL:
             await self.remove_item(cart_id, product_id)
             return None
 
-        stmt = (
-            update(CartItem)
-            .where(CartItem.cart_id == cart_id, CartItem.product_id == product_id)
-            .values(quantity=quantity)
-            .returning(CartItem)
+        result = await self.session.execute(
+            UPDATE_ITEM_QUANTITY,
+            {"item_cart_id": cart_id, "item_product_id": product_id, "new_quantity": quantity}
         )
-        result = await self.session.execute(stmt)
         return result.scalars().first()
 
     async def remove_item(self, cart_id: UUID, product_id: UUID) -> bool:
-        stmt = delete(CartItem).where(
-            CartItem.cart_id == cart_id,
-            CartItem.product_id == product_id
+        result = await self.session.execute(
+            DELETE_CART_ITEM, {"cart_id": cart_id, "product_id": product_id}
         )
-        result = await self.session.execute(stmt)
         return result.rowcount > 0
 
     async def clear_cart(self, cart_id: UUID) -> bool:
-        stmt = delete(CartItem).where(CartItem.cart_id == cart_id)
-        result = await self.session.execute(stmt)
-        return result.rowcount > 0
\ No newline at end of file
+        result = await self.session.execute(CLEAR_CART, {"cart_id": cart_id})
+        return result.rowcount > 0
+
+    async def ensure_cart_id(self, user_id: UUID) -> UUID:
+        result = await self.session.execute(ENSURE_CART, {"new_cart_id": uuid4(), "owner_id": user_id})
+        return result.scalar_one()
+
+    async def get_products(self, product_ids: List[UUID]) -> Dict[UUID, Product]:
+        if not product_ids:
+            return {}
+        result = await self.session.execute(GET_PRODUCTS, {"product_ids": product_ids})
+        return {product.product_id: product for product in result.scalars()}
+
+    async def replace_items(self, cart_id: UUID, items: Dict[UUID, int]) -> None:
+        """Makes the stored cart match `items` with one delete and one upsert"""
+        product_ids = list(items)
+        if not product_ids:
+            await self.clear_cart(cart_id)
+            return
+        await self.session.execute(DELETE_ITEMS_EXCEPT, {"cart_id": cart_id, "product_ids": product_ids})
+        await self.session.execute(UPSERT_ITEMS, {
+            "cart_id": cart_id,
+            "product_ids": product_ids,
+            "quantities": [items[product_id] for product_id in product_ids],
+        })
@@ -0,0 +1,91 @@
+import time
+from decimal import Decimal
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.metrics import record_query
+
+
+PRODUCT_DETAIL_SQL = """
+SELECT product_id, name, price, description, stock, discount_percentage, category_id, images, thumbnails
+FROM products
+WHERE product_id = $1
+"""
+
+PRODUCTS_BY_IDS_SQL = """
+SELECT product_id, name, price, description, stock, discount_percentage, category_id, images, thumbnails
+FROM products
+WHERE product_id = ANY($1::uuid[])
+"""
+
+CART_SQL = """
+SELECT c.cart_id, ci.product_id, ci.quantity, p.name, p.price, p.discount_percentage
+FROM carts c
+LEFT JOIN cart_items ci ON ci.cart_id = c.cart_id
+LEFT JOIN products p ON p.product_id = ci.product_id
+WHERE c.user_id = $1
+"""
+
+
+class FastReadDAL:
+    """Read-only queries executed directly on the pooled asyncpg connection.
+
+    Records are mapped straight into response dicts, skipping ORM
+    compilation, the identity map and relationship loading. asyncpg keeps
+    the statements prepared per connection. The ORM DALs stay the
+    reference implementation; ``tests/test_fast_read_parity.py`` checks
+    that both return the same responses.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def _fetch(self, sql: str, *args):
+        conn = await self.session.connection()
+        raw = await conn.get_raw_connection()
+        start = time.perf_counter()
+        try:
+            return await raw.driver_connection.fetch(sql, *args)
+        finally:
+            record_query(sql.lstrip(), time.perf_counter() - start)
+
+    async def get_product(self, product_id: UUID) -> Optional[dict]:
+        rows = await self._fetch(PRODUCT_DETAIL_SQL, product_id)
+        return dict(rows[0]) if rows else None
+
+    async def get_products(self, product_ids: List[UUID]) -> Dict[UUID, dict]:
+        rows = await self._fetch(PRODUCTS_BY_IDS_SQL, product_ids)
+        return {row["product_id"]: dict(row) for row in rows}
+
+    async def get_cart(self, user_id: UUID) -> Optional[dict]:
+        """Returns the cart in ``CartShow`` shape, or None if the user has no cart yet"""
+        rows = await self._fetch(CART_SQL, user_id)
+        if not rows:
+            return None
+
+        items = []
+        total = Decimal("0")
+        for row in rows:
+            if row["product_id"] is None:
+                continue
+            # same Decimal arithmetic as CartItem.subtotal
+            discount = Decimal(str(row["discount_percentage"])) / Decimal("100")
+            subtotal = row["quantity"] * row["price"] * (Decimal("1") - discount)
+            total += subtotal
+            items.append({
+                "product_id": row["product_id"],
+                "quantity": row["quantity"],
+                "subtotal": subtotal,
+                "product_name": row["name"],
+                "product_price": row["price"],
+                "product_discount": row["discount_percentage"],
+            })
+
+        return {
+            "cart_id": rows[0]["cart_id"],
+            "total_price": total,
+            "items": items,
+            "items_count": len(items),
+        }
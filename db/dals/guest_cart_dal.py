@@ -0,0 +1,153 @@
+from datetime import datetime
+from typing import Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import Integer, String, bindparam, case, cast, delete, func, select, true, update
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models import CartItem, GuestCart, Product
+
+
+PRODUCT_KEY = bindparam("product_key", type_=String)
+QUANTITY = bindparam("quantity", type_=Integer)
+
+GET_GUEST_CART = select(GuestCart.items).where(
+    GuestCart.guest_id == bindparam("guest_id"), GuestCart.expires_at > bindparam("now")
+)
+
+# Every edit is a single statement on the one row: JSONB operators change
+# the item in place and the TTL slides forward. An expired row that has not
+# been swept yet starts over from an empty cart.
+_add = insert(GuestCart).values(
+    guest_id=bindparam("guest_id"),
+    items=func.jsonb_build_object(PRODUCT_KEY, QUANTITY),
+    expires_at=bindparam("expires_at"),
+)
+ADD_GUEST_ITEM = _add.on_conflict_do_update(
+    index_elements=[GuestCart.guest_id],
+    set_={
+        "items": case(
+            (GuestCart.expires_at <= bindparam("now"), _add.excluded["items"]),
+            else_=GuestCart.items.op("||")(func.jsonb_build_object(
+                PRODUCT_KEY,
+                func.coalesce(cast(GuestCart.items.op("->>")(PRODUCT_KEY), Integer), 0)
+                + QUANTITY,
+            )),
+        ),
+        "expires_at": _add.excluded.expires_at,
+    },
+).returning(GuestCart.items)
+
+SET_GUEST_ITEM = (
+    update(GuestCart)
+    .where(GuestCart.guest_id == bindparam("target_id"), GuestCart.expires_at > bindparam("now"))
+    .values(
+        items=GuestCart.items.op("||")(func.jsonb_build_object(PRODUCT_KEY, QUANTITY)),
+        expires_at=bindparam("new_expires_at"),
+    )
+    .returning(GuestCart.items)
+    .execution_options(synchronize_session=False)
+)
+
+REMOVE_GUEST_ITEM = (
+    update(GuestCart)
+    .where(GuestCart.guest_id == bindparam("target_id"), GuestCart.expires_at > bindparam("now"))
+    .values(items=GuestCart.items.op("-")(PRODUCT_KEY), expires_at=bindparam("new_expires_at"))
+    .returning(GuestCart.items)
+    .execution_options(synchronize_session=False)
+)
+
+DELETE_GUEST_CART = (
+    delete(GuestCart)
+    .where(GuestCart.guest_id == bindparam("guest_id"))
+    .execution_options(synchronize_session=False)
+)
+
+# Merge on login in one statement: the CTE deletes the guest row and the
+# insert adds its items to the user's cart, summing quantities on conflict
+_moved = (
+    delete(GuestCart)
+    .where(GuestCart.guest_id == bindparam("guest_id"))
+    .returning(GuestCart.items, GuestCart.expires_at)
+    .cte("moved")
+)
+_entries = func.jsonb_each_text(_moved.c["items"]).table_valued("key", "value").render_derived("entry")
+# Through the table: ORM bulk insert would take the parameters for row values
+_merge = insert(CartItem.__table__).from_select(
+    ["cart_id", "product_id", "quantity"],
+    select(
+        bindparam("cart_id", type_=PG_UUID(as_uuid=True)),
+        Product.product_id,
+        cast(_entries.c.value, Integer),
+    )
+    .select_from(_moved)
+    .join(_entries, true())
+    .join(Product, Product.product_id == cast(_entries.c.key, PG_UUID(as_uuid=True)))
+    .where(_moved.c.expires_at > bindparam("now")),
+)
+MERGE_INTO_CART = _merge.on_conflict_do_update(
+    index_elements=[CartItem.cart_id, CartItem.product_id],
+    set_={"quantity": CartItem.quantity + _merge.excluded.quantity},
+)
+
+_expired_batch = (
+    select(GuestCart.guest_id)
+    .where(GuestCart.expires_at <= bindparam("now"))
+    .limit(bindparam("batch_size"))
+    .with_for_update(skip_locked=True)
+)
+PURGE_EXPIRED_BATCH = (
+    delete(GuestCart)
+    .where(GuestCart.guest_id.in_(_expired_batch.scalar_subquery()))
+    .execution_options(synchronize_session=False)
+)
+
+
+def _to_items(raw: Optional[dict]) -> Dict[UUID, int]:
+    return {UUID(key): int(value) for key, value in (raw or {}).items()}
+
+
+class GuestCartDAL:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_items(self, guest_id: UUID, now: datetime) -> Dict[UUID, int]:
+        result = await self.session.execute(GET_GUEST_CART, {"guest_id": guest_id, "now": now})
+        return _to_items(result.scalar())
+
+    async def add_item(
+        self, guest_id: UUID, product_id: UUID, quantity: int, now: datetime, expires_at: datetime
+    ) -> Dict[UUID, int]:
+        result = await self.session.execute(ADD_GUEST_ITEM, {
+            "guest_id": guest_id,
+            "product_key": str(product_id),
+            "quantity": quantity,
+            "expires_at": expires_at,
+            "now": now,
+        })
+        return _to_items(result.scalar())
+
+    async def set_item(
+        self, guest_id: UUID, product_id: UUID, quantity: int, now: datetime, expires_at: datetime
+    ) -> Optional[Dict[UUID, int]]:
+        """Sets or (quantity 0) removes an item; None if the guest cart doesn't exist"""
+        params = {"target_id": guest_id, "product_key": str(product_id), "now": now, "new_expires_at": expires_at}
+        if quantity > 0:
+            result = await self.session.execute(SET_GUEST_ITEM, {**params, "quantity": quantity})
+        else:
+            result = await self.session.execute(REMOVE_GUEST_ITEM, params)
+        row = result.first()
+        return None if row is None else _to_items(row.items)
+
+    async def delete(self, guest_id: UUID) -> None:
+        await self.session.execute(DELETE_GUEST_CART, {"guest_id": guest_id})
+
+    async def merge_into_cart(self, guest_id: UUID, cart_id: UUID, now: datetime) -> int:
+        """Moves the guest items into a user's cart; returns the number of merged items"""
+        result = await self.session.execute(MERGE_INTO_CART, {"guest_id": guest_id, "cart_id": cart_id, "now": now})
+        return result.rowcount
+
+    async def purge_expired(self, now: datetime, batch_size: int) -> int:
+        result = await self.session.execute(PURGE_EXPIRED_BATCH, {"now": now, "batch_size": batch_size})
+        return result.rowcount
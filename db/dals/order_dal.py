@@ -1,12 +1,77 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
 from uuid import UUID
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
 
-from sqlalchemy import select
+from sqlalchemy import Integer, bindparam, column, func, literal_column, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from db.models import Order, OrderItem, Cart
+from db.models import OPEN_ORDER_STATUSES, ORDER_TRANSITIONS, Order, OrderItem, OrderStatus, Cart
+
+CENT = Decimal('0.01')
+
+# History is paged by created_at (keyset), so each page reads the newest
+# partitions first and stops at the limit instead of probing every month
+GET_USER_ORDERS = (
+    select(Order)
+    .where(Order.user_id == bindparam("user_id"), Order.created_at < bindparam("before"))
+    .options(selectinload(Order.items))
+    .order_by(Order.created_at.desc())
+    .limit(bindparam("limit"))
+)
+
+GET_ORDER = (
+    select(Order)
+    .where(Order.order_id == bindparam("order_id"), Order.user_id == bindparam("user_id"))
+    .options(selectinload(Order.items))
+)
+
+# With the creation time known only its month's partition is searched
+GET_ORDER_AT = GET_ORDER.where(Order.created_at == bindparam("created_at"))
+
+# Literal statuses rather than bind parameters, so the planner can always
+# match the predicate of the partial ix_orders_open_created_at index
+IS_OPEN = Order.status.in_([literal_column(str(int(s))) for s in sorted(OPEN_ORDER_STATUSES)])
+
+GET_OPEN_ORDERS = (
+    select(Order)
+    .where(IS_OPEN)
+    .options(selectinload(Order.items))
+    .order_by(Order.created_at)
+    .limit(bindparam("limit"))
+)
+
+GET_OPEN_ORDERS_BY_STATUS = GET_OPEN_ORDERS.where(Order.status == bindparam("status"))
+
+EXPECTED_VERSIONS = (
+    func.unnest(
+        bindparam("order_ids", type_=ARRAY(PG_UUID(as_uuid=True))),
+        bindparam("versions", type_=ARRAY(Integer)),
+    )
+    .table_valued(column("order_id", PG_UUID(as_uuid=True)), column("version", Integer))
+    .render_derived(name="expected", with_types=False)
+)
+
+# One round trip for the whole batch: a row is only updated if nobody has
+# touched it since the caller read it and the transition is allowed from its
+# current status
+TRANSITION_ORDERS = (
+    update(Order)
+    .where(
+        Order.order_id == EXPECTED_VERSIONS.c.order_id,
+        Order.version == EXPECTED_VERSIONS.c.version,
+        Order.status.in_(bindparam("from_statuses", expanding=True)),
+    )
+    .values(status=bindparam("new_status"), version=Order.version + 1)
+    .returning(Order.order_id, Order.status, Order.version)
+    .execution_options(synchronize_session=False)
+)
+
+GET_ORDER_VERSIONS = select(Order.order_id, Order.status, Order.version).where(
+    Order.order_id.in_(bindparam("order_ids", expanding=True))
+)
 
 
 class OrderDAL:
@@ -17,14 +82,11 @@ class OrderDAL:
         if not cart.items:
             raise ValueError("Корзина пуста")
 
-        order = Order(
-            user_id=user_id,
-            total=Decimal('0'),
-            status=1.0
-        )
-        self.session.add(order)
-        await self.session.flush()  
+        # created_at is set up front: it is part of the key the items copy
+        order = Order(user_id=user_id, status=OrderStatus.PENDING, created_at=datetime.utcnow())
 
+        # The total is known before the first flush, so the order is inserted
+        # once instead of inserted and then updated (which would bump version)
         total = Decimal('0')
 
         for item in cart.items:
@@ -32,37 +94,79 @@ class OrderDAL:
             if not product:
                 continue  
 
-            discount_factor = Decimal('1') - Decimal(str(product.discount_percentage)) / Decimal('100')
-            item_total = Decimal(str(item.quantity)) * product.price * discount_factor
-            total += item_total
+            discount = Decimal(str(product.discount_percentage))
+            discount_factor = Decimal('1') - discount / Decimal('100')
+            # Rounded per line, so the order total is exactly the sum of its lines
+            line_total = (Decimal(str(item.quantity)) * product.price * discount_factor).quantize(CENT, ROUND_HALF_UP)
+            total += line_total
 
-            order_item = OrderItem(
-                order_id=order.order_id,
+            order.items.append(OrderItem(
                 product_id=product.product_id,
                 quantity=item.quantity,
-                price=product.price  
-            )
-            self.session.add(order_item)
+                price=product.price,
+                discount_percentage=discount,
+                line_total=line_total,
+            ))
 
         order.total = total
+        self.session.add(order)
         await self.session.flush()
         return order
 
-    async def get_user_orders(self, user_id: UUID) -> List[Order]:
-        stmt = (
-            select(Order)
-            .where(Order.user_id == user_id)
-            .options(selectinload(Order.items))
-            .order_by(Order.created_at.desc())
-        )
-        result = await self.session.execute(stmt)
+    async def get_user_orders(
+        self, user_id: UUID, limit: int = 20, before: Optional[datetime] = None
+    ) -> List[Order]:
+        """Newest orders first, `limit` at a time; pass the last created_at as `before` for the next page"""
+        result = await self.session.execute(GET_USER_ORDERS, {
+            "user_id": user_id,
+            "before": before or datetime.max,
+            "limit": limit,
+        })
         return result.scalars().all()
 
-    async def get_order_by_id(self, order_id: UUID, user_id: UUID) -> Optional[Order]:
-        stmt = (
-            select(Order)
-            .where(Order.order_id == order_id, Order.user_id == user_id)
-            .options(selectinload(Order.items))
-        )
-        result = await self.session.execute(stmt)
-        return result.scalars().first()
\ No newline at end of file
+    async def get_order_by_id(
+        self, order_id: UUID, user_id: UUID, created_at: Optional[datetime] = None
+    ) -> Optional[Order]:
+        if created_at is None:
+            result = await self.session.execute(GET_ORDER, {"order_id": order_id, "user_id": user_id})
+        else:
+            result = await self.session.execute(
+                GET_ORDER_AT, {"order_id": order_id, "user_id": user_id, "created_at": created_at}
+            )
+        return result.scalars().first()
+
+    async def get_open_orders(self, limit: int, status: Optional[OrderStatus] = None) -> List[Order]:
+        if status is None:
+            result = await self.session.execute(GET_OPEN_ORDERS, {"limit": limit})
+        else:
+            result = await self.session.execute(GET_OPEN_ORDERS_BY_STATUS, {"limit": limit, "status": status})
+        return result.scalars().all()
+
+    async def transition_orders(
+        self, expected: Sequence[Tuple[UUID, int]], target: OrderStatus
+    ) -> Tuple[list, list]:
+        """Moves orders to `target` if their version still matches.
+
+        Returns (updated, conflicts) as (order_id, status, version) rows; the
+        conflict rows carry the current state, or status None for unknown ids.
+        """
+        sources = [status for status, targets in ORDER_TRANSITIONS.items() if target in targets]
+        if not expected or not sources:
+            updated = []
+        else:
+            result = await self.session.execute(TRANSITION_ORDERS, {
+                "order_ids": [order_id for order_id, _ in expected],
+                "versions": [version for _, version in expected],
+                "from_statuses": sources,
+                "new_status": target,
+            })
+            updated = result.all()
+
+        done = {row.order_id for row in updated}
+        missing = [order_id for order_id, _ in expected if order_id not in done]
+        conflicts = []
+        if missing:
+            result = await self.session.execute(GET_ORDER_VERSIONS, {"order_ids": missing})
+            current = {row.order_id: row for row in result.all()}
+            conflicts = [current.get(order_id, (order_id, None, None)) for order_id in missing]
+        return updated, conflicts
@@ -0,0 +1,72 @@
+from datetime import datetime
+from typing import Any, List
+
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models import OutboxJob
+
+
+# Claiming pushes run_after forward by the lease instead of flipping a status,
+# so a job whose worker died simply becomes due again once the lease expires.
+DUE_JOBS = (
+    select(OutboxJob.job_id)
+    .where(OutboxJob.status == "pending", OutboxJob.run_after <= bindparam("now"))
+    .order_by(OutboxJob.run_after)
+    .limit(bindparam("limit"))
+    .with_for_update(skip_locked=True)
+)
+
+CLAIM_JOBS = (
+    update(OutboxJob)
+    .where(OutboxJob.job_id.in_(DUE_JOBS.scalar_subquery()))
+    .values(attempts=OutboxJob.attempts + 1, run_after=bindparam("lease_until"))
+    .returning(OutboxJob.job_id, OutboxJob.kind, OutboxJob.payload, OutboxJob.attempts)
+    .execution_options(synchronize_session=False)
+)
+
+COMPLETE_JOB = (
+    delete(OutboxJob)
+    .where(OutboxJob.job_id == bindparam("done_id"))
+    .execution_options(synchronize_session=False)
+)
+
+RETRY_JOB = (
+    update(OutboxJob)
+    .where(OutboxJob.job_id == bindparam("retry_id"))
+    .values(run_after=bindparam("retry_at"), last_error=bindparam("error"))
+    .execution_options(synchronize_session=False)
+)
+
+FAIL_JOB = (
+    update(OutboxJob)
+    .where(OutboxJob.job_id == bindparam("failed_id"))
+    .values(status="failed", last_error=bindparam("error"))
+    .execution_options(synchronize_session=False)
+)
+
+
+class OutboxDAL:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def enqueue(self, kind: str, payload: dict[str, Any]) -> OutboxJob:
+        """Adds the job to the current transaction; it is only visible to workers after commit"""
+        job = OutboxJob(kind=kind, payload=payload)
+        self.session.add(job)
+        return job
+
+    async def claim_due(self, now: datetime, lease_until: datetime, limit: int) -> List[Any]:
+        result = await self.session.execute(
+            CLAIM_JOBS, {"now": now, "lease_until": lease_until, "limit": limit}
+        )
+        return result.all()
+
+    async def complete(self, job_id) -> None:
+        await self.session.execute(COMPLETE_JOB, {"done_id": job_id})
+
+    async def retry(self, job_id, retry_at: datetime, error: str) -> None:
+        await self.session.execute(RETRY_JOB, {"retry_id": job_id, "retry_at": retry_at, "error": error})
+
+    async def fail(self, job_id, error: str) -> None:
+        await self.session.execute(FAIL_JOB, {"failed_id": job_id, "error": error})
@@ -0,0 +1,56 @@
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import bindparam, select, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.models import RevokedToken
+
+
+REVOKE_TOKEN = (
+    insert(RevokedToken)
+    .values(token_id=bindparam("revoked_id"), expires_at=bindparam("revoked_until"))
+    .on_conflict_do_nothing(index_elements=[RevokedToken.token_id])
+    .returning(RevokedToken.token_id)
+)
+
+ANY_REVOKED = (
+    select(RevokedToken.token_id)
+    .where(RevokedToken.token_id.in_(bindparam("token_ids", expanding=True)))
+    .limit(1)
+)
+
+GET_ACTIVE_TOKEN_IDS = select(RevokedToken.token_id).where(RevokedToken.expires_at > bindparam("now"))
+
+PURGE_EXPIRED = (
+    delete(RevokedToken)
+    .where(RevokedToken.expires_at <= bindparam("now"))
+    .execution_options(synchronize_session=False)
+)
+
+
+class TokenDAL:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def revoke(self, token_id: str, expires_at: datetime) -> bool:
+        """Returns False if the token was already revoked.
+
+        A concurrent revoke of the same id waits on the primary key until the
+        first transaction ends, so only one of them ever gets True.
+        """
+        result = await self.session.execute(REVOKE_TOKEN, {"revoked_id": token_id, "revoked_until": expires_at})
+        return result.first() is not None
+
+    async def is_revoked(self, *token_ids: str) -> bool:
+        result = await self.session.execute(ANY_REVOKED, {"token_ids": list(token_ids)})
+        return result.first() is not None
+
+    async def get_active_token_ids(self, now: datetime) -> List[str]:
+        result = await self.session.execute(GET_ACTIVE_TOKEN_IDS, {"now": now})
+        return result.scalars().all()
+
+    async def purge_expired(self, now: datetime) -> int:
+        result = await self.session.execute(PURGE_EXPIRED, {"now": now})
+        return result.rowcount
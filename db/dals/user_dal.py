@@ -1,10 +1,19 @@
 from typing import Optional
-from sqlalchemy import select
+from uuid import UUID
+
+from sqlalchemy import bindparam, insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from db.errors import USERS_EMAIL_KEY, violated_constraint
 from db.models import User
 
 
+GET_USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+
+GET_USER_BY_ID = select(User).where(User.user_id == bindparam("user_id"))
+
+
 class UserDAL:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -16,28 +25,31 @@ class UserDAL:
         email: str,
         password_hash: str,
     ) -> User:
-       
-        query = select(User).where(User.email == email)
-        result = await self.session.execute(query)
-        if result.scalar_one_or_none():
-            raise ValueError("Пользователь с таким email уже существует")
-
-        new_user = User(
+        # The unique constraint on email is the duplicate check, no pre-SELECT
+        stmt = insert(User).values(
             name=name,
             surname=surname,
             email=email,
             password_hash=password_hash,
             role=["user"],
-        )
+        ).returning(User)
+
+        try:
+            result = await self.session.execute(stmt)
+        except IntegrityError as e:
+            # Rolling back is left to the unit of work
+            if violated_constraint(e) == USERS_EMAIL_KEY:
+                raise ValueError("Пользователь с таким email уже существует") from e
+            raise
+
+        return result.scalar_one()
 
-        self.session.add(new_user)
-        await self.session.commit()
-        await self.session.refresh(new_user)
+    async def get_user_by_id(self, user_id: UUID) -> Optional[User]:
 
-        return new_user
+        result = await self.session.execute(GET_USER_BY_ID, {"user_id": user_id})
+        return result.scalar_one_or_none()
 
     async def get_user_by_email(self, email: str) -> Optional[User]:
         
-        query = select(User).where(User.email == email)
-        result = await self.session.execute(query)
+        result = await self.session.execute(GET_USER_BY_EMAIL, {"email": email})
         return result.scalar_one_or_none()
\ No newline at end of file
@@ -0,0 +1,14 @@
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+
+# PostgreSQL's default names for the constraints the DALs map to user errors
+USERS_EMAIL_KEY = "users_email_key"
+CATEGORIES_NAME_KEY = "categories_name_key"
+PRODUCTS_CATEGORY_FKEY = "products_category_id_fkey"
+
+
+def violated_constraint(exc: IntegrityError) -> Optional[str]:
+    """Name of the constraint an IntegrityError reports, if the driver gives one"""
+    # asyncpg's own exception is the cause of the DBAPI-level one
+    return getattr(getattr(exc.orig, "__cause__", None), "constraint_name", None)
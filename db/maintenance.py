@@ -0,0 +1,78 @@
+"""Database maintenance commands.
+
+    python -m db.maintenance rebuild-rollups --since 2026-01-01 [--until 2026-02-01]
+    python -m db.maintenance ensure-partitions [--months-ahead 3]
+    python -m db.maintenance archive-partitions --keep-months 24
+"""
+import argparse
+import asyncio
+from datetime import date, timedelta
+
+from db.session import async_session, dispose_engine
+
+
+async def rebuild_rollups(since: date, until: date) -> None:
+    from db.dals.analytics_dal import AnalyticsDAL
+
+    # One transaction per day keeps the exclusive rollup lock short
+    day = since
+    while day < until:
+        async with async_session() as session:
+            await AnalyticsDAL(session).rebuild_days(day, day + timedelta(days=1))
+            await session.commit()
+        print(f"rebuilt rollups for {day}")
+        day += timedelta(days=1)
+
+
+async def ensure_partitions(months_ahead: int) -> None:
+    from db.partitions import ensure_partitions
+
+    async with async_session() as session:
+        created = await ensure_partitions(session, months_ahead)
+        await session.commit()
+    print("created: " + (", ".join(created) or "nothing"))
+
+
+async def archive_partitions(keep_months: int) -> None:
+    from db.partitions import add_months, archive_partitions
+
+    before = add_months(date.today().replace(day=1), -keep_months)
+    async with async_session() as session:
+        archived = await archive_partitions(session, before)
+        await session.commit()
+    print("archived: " + (", ".join(archived) or "nothing"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m db.maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rollups = commands.add_parser("rebuild-rollups", help="recompute sales rollups from orders")
+    rollups.add_argument("--since", type=date.fromisoformat, required=True)
+    rollups.add_argument("--until", type=date.fromisoformat, help="exclusive, defaults to tomorrow")
+
+    ensure = commands.add_parser("ensure-partitions", help="create upcoming monthly order partitions")
+    ensure.add_argument("--months-ahead", type=int, default=3)
+
+    archive = commands.add_parser("archive-partitions", help="move old order partitions to the archive schema")
+    archive.add_argument("--keep-months", type=int, required=True,
+                         help="full months to keep besides the current one")
+
+    args = parser.parse_args()
+
+    async def run():
+        try:
+            if args.command == "rebuild-rollups":
+                await rebuild_rollups(args.since, args.until or date.today() + timedelta(days=1))
+            elif args.command == "ensure-partitions":
+                await ensure_partitions(args.months_ahead)
+            elif args.command == "archive-partitions":
+                await archive_partitions(args.keep_months)
+        finally:
+            await dispose_engine()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,62 @@
 from decimal import Decimal
+import enum
 import uuid
 from datetime import datetime
 
 from sqlalchemy import (
     ARRAY, Column, Integer, String, Boolean,
-    ForeignKey, Float, DateTime, Numeric
+    DDL, ForeignKey, ForeignKeyConstraint, Float, Date, DateTime, Numeric, Index, SmallInteger,
+    event, text
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID, ExcludeConstraint
 from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.types import TypeDecorator
 
 Base = declarative_base()
 
 
+class OrderStatus(enum.IntEnum):
+    PENDING = 1
+    PAID = 2
+    SHIPPED = 3
+    DELIVERED = 4
+    CANCELLED = 5
+
+    @property
+    def is_open(self) -> bool:
+        return self in OPEN_ORDER_STATUSES
+
+    def can_transition_to(self, target: "OrderStatus") -> bool:
+        return target in ORDER_TRANSITIONS[self]
+
+
+OPEN_ORDER_STATUSES = frozenset({OrderStatus.PENDING, OrderStatus.PAID, OrderStatus.SHIPPED})
+
+ORDER_TRANSITIONS = {
+    OrderStatus.PENDING: frozenset({OrderStatus.PAID, OrderStatus.CANCELLED}),
+    OrderStatus.PAID: frozenset({OrderStatus.SHIPPED, OrderStatus.CANCELLED}),
+    OrderStatus.SHIPPED: frozenset({OrderStatus.DELIVERED}),
+    OrderStatus.DELIVERED: frozenset(),
+    OrderStatus.CANCELLED: frozenset(),
+}
+
+
+class IntEnumType(TypeDecorator):
+    """Stores an IntEnum as a smallint and loads it back as the enum"""
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_class, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.enum_class = enum_class
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else int(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else self.enum_class(value)
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -38,11 +83,30 @@ class Product(Base):
     description = Column(String, nullable=True)
     stock = Column(Integer, nullable=False, default=0)
     images = Column(ARRAY(String), nullable=False, default=list)
+    # Small variants of uploaded images, so listings don't load product_images
+    thumbnails = Column(ARRAY(String), nullable=False, default=list, server_default="{}")
 
     cart_items = relationship("CartItem", back_populates="product")
     category = relationship("Category", back_populates="products")
 
 
+class ProductImage(Base):
+    """An uploaded product image; `variants` holds the resized copies as
+    [{name, url, width, height, bytes}]"""
+    __tablename__ = "product_images"
+
+    image_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    product_id = Column(
+        UUID(as_uuid=True), ForeignKey("products.product_id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    # sha256 of the original, also its storage directory
+    key = Column(String(64), nullable=False)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    variants = Column(JSONB, nullable=False, default=list)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
 class Cart(Base):
     __tablename__ = "carts"
 
@@ -75,6 +139,19 @@ class CartItem(Base):
         return self.quantity * price * (Decimal('1') - discount)
 
 
+class GuestCart(Base):
+    """Cart of a visitor without an account, keyed by the signed guest cookie.
+
+    Items are one JSONB object {product_id: quantity} instead of rows, so a
+    guest cart is a single tuple that is cheap to write and to sweep.
+    """
+    __tablename__ = "guest_carts"
+
+    guest_id = Column(UUID(as_uuid=True), primary_key=True)
+    items = Column(JSONB, nullable=False, default=dict)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
 class Address(Base):
     __tablename__ = "addresses"
 
@@ -90,6 +167,20 @@ class Address(Base):
 
     user = relationship("User", back_populates="addresses")
 
+    # At most one default address per user. A partial unique index would be
+    # checked row by row, so switching the default in one UPDATE could trip
+    # over the old default; a deferrable constraint is checked per statement
+    __table_args__ = (
+        ExcludeConstraint(
+            (user_id, "="),
+            name="ex_addresses_one_default",
+            using="btree",
+            where="is_default",
+            deferrable=True,
+            initially="IMMEDIATE",
+        ),
+    )
+
 
 class Order(Base):
     __tablename__ = "orders"
@@ -98,24 +189,60 @@ class Order(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
 
     total = Column(Numeric(12, 2), nullable=False)
-    status = Column(Float, nullable=False, default=1.0)          
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    status = Column(IntEnumType(OrderStatus), nullable=False, default=OrderStatus.PENDING)
+    version = Column(Integer, nullable=False, default=1)
+    # Partition key, so it has to be part of the primary key
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
 
     user = relationship("User", back_populates="orders")
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
 
+    __mapper_args__ = {"version_id_col": version}
+    __table_args__ = (
+        # Only open orders are indexed, so the fulfilment queue stays small
+        # while delivered and cancelled orders keep piling up
+        Index(
+            "ix_orders_open_created_at", "status", "created_at",
+            postgresql_where=text("status IN (1, 2, 3)"),
+        ),
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
 
 class OrderItem(Base):
     __tablename__ = "order_items"
 
-    order_id = Column(UUID(as_uuid=True), ForeignKey("orders.order_id", ondelete="CASCADE"), primary_key=True)
+    order_id = Column(UUID(as_uuid=True), primary_key=True)
     product_id = Column(UUID(as_uuid=True), ForeignKey("products.product_id", ondelete="SET NULL"), primary_key=True)
+    # Copy of orders.created_at: items are partitioned by the same month as their order
+    order_created_at = Column(DateTime, primary_key=True)
 
     quantity = Column(Integer, nullable=False)
+    # Snapshot at checkout: list price, discount and what the line actually cost
     price = Column(Numeric(10, 2), nullable=False)        
+    discount_percentage = Column(Numeric(5, 2), nullable=False, default=0)
+    line_total = Column(Numeric(12, 2), nullable=False)
 
     order = relationship("Order", back_populates="items")
+
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["order_id", "order_created_at"], ["orders.order_id", "orders.created_at"], ondelete="CASCADE"
+        ),
+        {"postgresql_partition_by": "RANGE (order_created_at)"},
+    )
    
+# A partitioned table without partitions rejects every row. Databases built
+# with create_all (tests, scratch databases) get a catch-all DEFAULT partition;
+# migrated ones get monthly partitions from db/partitions.py as well.
+for _table in (Order.__table__, OrderItem.__table__):
+    event.listen(
+        _table, "after_create",
+        DDL(f"CREATE TABLE {_table.name}_default PARTITION OF {_table.name} DEFAULT"),
+    )
+
+
 class Category(Base):
     __tablename__ = "categories"
 
@@ -123,4 +250,66 @@ class Category(Base):
     name = Column(String, nullable=False, unique=True)
     description = Column(String, nullable=True)
 
-    products = relationship("Product", back_populates="category")
\ No newline at end of file
+    products = relationship("Product", back_populates="category")
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    token_id = Column(String(64), primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class OutboxJob(Base):
+    __tablename__ = "outbox_jobs"
+
+    job_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column(String(64), nullable=False)
+    payload = Column(JSONB, nullable=False, default=dict)
+    status = Column(String(16), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_outbox_jobs_due", "run_after", postgresql_where=text("status = 'pending'")),
+    )
+
+
+# Sales rollups, maintained per order by the order.created job and rebuilt
+# per day by `python -m db.maintenance rebuild-rollups`. Amounts are gross:
+# cancelled orders are not subtracted.
+
+class SalesDaily(Base):
+    __tablename__ = "sales_daily"
+
+    day = Column(Date, primary_key=True)
+    orders_count = Column(Integer, nullable=False, default=0)
+    items_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(14, 2), nullable=False, default=0)
+
+
+class SalesDailyCategory(Base):
+    __tablename__ = "sales_daily_category"
+
+    day = Column(Date, primary_key=True)
+    category_id = Column(UUID(as_uuid=True), primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(14, 2), nullable=False, default=0)
+
+
+class SalesDailyProduct(Base):
+    __tablename__ = "sales_daily_product"
+
+    day = Column(Date, primary_key=True)
+    product_id = Column(UUID(as_uuid=True), primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(14, 2), nullable=False, default=0)
+
+
+class SalesRollupOrder(Base):
+    """Orders already counted in the rollups, so a retried job adds nothing twice"""
+    __tablename__ = "sales_rollup_orders"
+
+    order_id = Column(UUID(as_uuid=True), primary_key=True)
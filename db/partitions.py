@@ -0,0 +1,174 @@
+"""Monthly range partitions of orders and order_items.
+
+Partitions are named <table>_yYYYYmMM and cover [first day of the month,
+first day of the next month). Old months are detached and moved to the
+archive schema, where they stay queryable but out of every hot query plan.
+"""
+import asyncio
+import logging
+import re
+from datetime import date
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# Referenced table first; archiving walks the list backwards
+PARTITIONED_TABLES = ("orders", "order_items")
+PARTITION_KEYS = {"orders": "created_at", "order_items": "order_created_at"}
+ARCHIVE_SCHEMA = "archive"
+PARTITION_LOCK_ID = 0x9A27
+
+PARTITION_NAME = re.compile(r"_y(\d{4})m(\d{2})$")
+
+LOCK_PARTITIONS = text("SELECT pg_advisory_xact_lock(:lock_id)")
+
+LIST_PARTITIONS = text(
+    "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+    "WHERE i.inhparent = CAST(:parent AS regclass)"
+)
+
+LIST_FOREIGN_KEYS = text(
+    "SELECT conname FROM pg_constraint "
+    "WHERE conrelid = CAST(:child AS regclass) AND confrelid = CAST(:parent AS regclass) AND contype = 'f'"
+)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def partition_month(name: str) -> date | None:
+    match = PARTITION_NAME.search(name)
+    return date(int(match[1]), int(match[2]), 1) if match else None
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def month_filter_sql(table: str, month: date) -> str:
+    key = PARTITION_KEYS[table]
+    return f"{key} >= '{month.isoformat()}' AND {key} < '{add_months(month, 1).isoformat()}'"
+
+
+def create_partition_sql(table: str, month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+async def _lock(session: AsyncSession) -> None:
+    await session.execute(LOCK_PARTITIONS, {"lock_id": PARTITION_LOCK_ID})
+
+
+async def _partition_names(session: AsyncSession, table: str) -> List[str]:
+    result = await session.execute(LIST_PARTITIONS, {"parent": table})
+    return result.scalars().all()
+
+
+async def _partition_months(session: AsyncSession, table: str) -> List[date]:
+    return sorted(filter(None, (partition_month(name) for name in await _partition_names(session, table))))
+
+
+async def _take_from_default(session: AsyncSession, month: date, tables: List[str]) -> None:
+    """Moves the month's rows out of the DEFAULT partitions into temporary tables.
+
+    Creating a partition fails while DEFAULT holds rows in its range. Items
+    are deleted before their orders, so the cascade never fires; every
+    table is moved, because deleting orders would otherwise take the items
+    of an existing partition with them.
+    """
+    for table in tables:
+        await session.execute(text(
+            f"CREATE TEMPORARY TABLE moving_{table} AS "
+            f"SELECT * FROM {default_partition_name(table)} WHERE {month_filter_sql(table, month)}"
+        ))
+    for table in reversed(tables):
+        await session.execute(text(
+            f"DELETE FROM {default_partition_name(table)} WHERE {month_filter_sql(table, month)}"
+        ))
+
+
+async def _put_back(session: AsyncSession, tables: List[str]) -> None:
+    """Reinserts moved rows through the parents, which routes them to the new partitions"""
+    for table in tables:
+        await session.execute(text(f"INSERT INTO {table} SELECT * FROM moving_{table}"))
+        await session.execute(text(f"DROP TABLE moving_{table}"))
+
+
+async def ensure_partitions(session: AsyncSession, months_ahead: int = 3, today: date | None = None) -> List[str]:
+    """Creates partitions from the current month up to `months_ahead` months ahead.
+
+    Rows that already landed in a DEFAULT partition for one of those months
+    are moved into the new partition in the same transaction.
+    """
+    current = (today or date.today()).replace(day=1)
+    await _lock(session)
+    existing = {table: await _partition_names(session, table) for table in PARTITIONED_TABLES}
+    with_default = [table for table in PARTITIONED_TABLES if default_partition_name(table) in existing[table]]
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        missing = [table for table in PARTITIONED_TABLES if partition_name(table, month) not in existing[table]]
+        if not missing:
+            continue
+        await _take_from_default(session, month, with_default)
+        for table in missing:
+            await session.execute(text(create_partition_sql(table, month)))
+            created.append(partition_name(table, month))
+        await _put_back(session, with_default)
+    return created
+
+
+async def archive_partitions(session: AsyncSession, before: date) -> List[str]:
+    """Detaches every monthly partition that ends on or before `before` into the archive schema.
+
+    DETACH takes an ACCESS EXCLUSIVE lock on the parent for the rest of the
+    transaction, so run it off-peak.
+    """
+    await _lock(session)
+    await session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+    archived = []
+    parent = PARTITIONED_TABLES[0]
+    for table in reversed(PARTITIONED_TABLES):
+        for month in await _partition_months(session, table):
+            if add_months(month, 1) > before:
+                continue
+            name = partition_name(table, month)
+            await session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            if table != parent:
+                # The clone of the order_items -> orders foreign key would
+                # otherwise block detaching the matching orders partition
+                result = await session.execute(LIST_FOREIGN_KEYS, {"child": name, "parent": parent})
+                for constraint in result.scalars().all():
+                    await session.execute(text(f'ALTER TABLE {name} DROP CONSTRAINT "{constraint}"'))
+            await session.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+            archived.append(f"{ARCHIVE_SCHEMA}.{name}")
+    return archived
+
+
+async def run_partition_maintenance(interval: float, months_ahead: int) -> None:
+    """Keeps future partitions in place so new orders never land in the DEFAULT partition"""
+    from db.session import async_session
+
+    while True:
+        try:
+            async with async_session() as session:
+                created = await ensure_partitions(session, months_ahead)
+                await session.commit()
+            if created:
+                logger.info("Created partitions: %s", ", ".join(created))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Failed to create order partitions")
+        await asyncio.sleep(interval)
@@ -1,13 +1,72 @@
-from typing import Generator
+import inspect
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Generator, Union
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 import settings
+from db.instrumentation import InstrumentedQueuePool, instrument_engine
 
-engine = create_async_engine(settings.REAL_DATABASE_URL, future=True, echo=True)
+logger = logging.getLogger(__name__)
 
-async_session = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+_engine: AsyncEngine | None = None
+_sessionmaker: sessionmaker | None = None
+_read_sessionmaker: sessionmaker | None = None
+
+
+def get_engine() -> AsyncEngine:
+    """Creates the engine on first use instead of at import time"""
+    global _engine, _sessionmaker, _read_sessionmaker
+    if _engine is None:
+        _engine = create_async_engine(
+            settings.REAL_DATABASE_URL,
+            future=True,
+            echo=True,
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+        )
+        instrument_engine(_engine)
+        _sessionmaker = sessionmaker(_engine, expire_on_commit=False, class_=AsyncSession)
+        # Same pool; in autocommit mode asyncpg runs each statement on its own,
+        # without BEGIN/COMMIT round trips
+        _read_sessionmaker = sessionmaker(
+            _engine.execution_options(isolation_level="AUTOCOMMIT"),
+            expire_on_commit=False,
+            class_=AsyncSession,
+        )
+    return _engine
+
+
+def async_session() -> AsyncSession:
+    get_engine()
+    return _sessionmaker()
+
+
+def async_read_session() -> AsyncSession:
+    """Session for reads only: no transaction, so nothing it does is ever rolled back"""
+    get_engine()
+    return _read_sessionmaker()
+
+
+async def dispose_engine() -> None:
+    global _engine, _sessionmaker, _read_sessionmaker
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = _sessionmaker = _read_sessionmaker = None
+
+
+def dispose_inherited_pool() -> None:
+    """Drops pool connections inherited from a parent process without closing them"""
+    if _engine is not None:
+        _engine.sync_engine.dispose(close=False)
+
+
+def __getattr__(name: str):
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 async def get_db() -> Generator:
@@ -16,4 +75,49 @@ async def get_db() -> Generator:
         session: AsyncSession = async_session()
         yield session
     finally:
-        await session.close()
\ No newline at end of file
+        await session.close()
+
+
+AfterCommit = Callable[[], Union[None, Awaitable[None]]]
+
+
+def after_commit(session: AsyncSession, callback: AfterCommit) -> None:
+    """Runs `callback` once the unit of work has committed; dropped on rollback"""
+    session.info.setdefault("after_commit", []).append(callback)
+
+
+async def get_uow() -> AsyncIterator[AsyncSession]:
+    """Unit of work: one transaction per request, committed when the endpoint
+    returns and rolled back if it raises.
+
+    Use it through ``api.dependencies.db.UnitOfWork``, which closes it before
+    the response is sent, so a failed commit is reported to the client.
+    """
+    session: AsyncSession = async_session()
+    try:
+        yield session
+        await session.commit()
+        callbacks = session.info.pop("after_commit", [])
+    except BaseException:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+    for callback in callbacks:
+        # The data is committed; a failing side effect mustn't turn that into an error response
+        try:
+            result = callback()
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            logger.exception("After-commit callback %r failed", callback)
+
+
+async def get_read_session() -> AsyncIterator[AsyncSession]:
+    """Autocommit session for read-only endpoints"""
+    session = async_read_session()
+    try:
+        yield session
+    finally:
+        await session.close()
@@ -0,0 +1,45 @@
+import asyncio
+import logging
+import uuid
+from contextlib import AsyncExitStack
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+logger = logging.getLogger(__name__)
+
+
+async def _run_hot_statements(session: AsyncSession) -> None:
+    """Only SELECTs: nothing here may depend on the rollback to stay harmless"""
+    # Imported lazily: the hot paths pull in the routers and DALs
+    from api.routes.public_products import load_product, load_products_list
+    from db.dals.address_dal import AddressDAL
+    from db.dals.order_dal import OrderDAL
+    from db.dals.user_dal import UserDAL
+
+    missing_id = uuid.uuid4()
+
+    await load_products_list(session, page=1, size=20, category_id=None, search=None, sort="name_asc")
+    await load_product(session, missing_id)
+    await UserDAL(session).get_user_by_email("warmup@invalid")
+    await UserDAL(session).get_user_by_id(missing_id)
+    await AddressDAL(session).get_user_addresses(missing_id)
+    await OrderDAL(session).get_user_orders(missing_id)
+    await OrderDAL(session).get_order_by_id(missing_id, missing_id)
+
+
+async def warm_up(engine: AsyncEngine, connections: int) -> None:
+    """Opens ``connections`` pool connections at once and runs the hot statements on each.
+
+    This pays connection setup, asyncpg type introspection, SQLAlchemy
+    statement compilation and server-side prepares before real traffic.
+    The connections run in autocommit, like the read sessions the
+    catalog loaders use at request time, so no transaction is opened.
+    """
+    connections = max(1, min(connections, engine.pool.size()))
+    async with AsyncExitStack() as stack:
+        opened = await asyncio.gather(*(stack.enter_async_context(engine.connect()) for _ in range(connections)))
+        for conn in opened:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            async with AsyncSession(bind=conn, expire_on_commit=False) as session:
+                await _run_hot_statements(session)
+    logger.info("Database warm-up finished: %d connections", connections)
@@ -1,30 +1,199 @@
-from fastapi import FastAPI
-from fastapi.routing import APIRouter
-import uvicorn
+from __future__ import annotations
 
-from api.routes.handlers import router as users_router 
-from api.routes.auth import router as auth_router
-from api.routes.admin import router as admin_router
-from api.routes.public_products import router as public_products_router
-from api.routes.cart import router as cart_router
-from api.routes.address import router as address_router
-from api.routes.order import router as order_router
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+from typing import TYPE_CHECKING
 
-app = FastAPI(title="Shop")
+from core.config import Settings, configure, get_settings
 
+if TYPE_CHECKING:
+    from fastapi import FastAPI
 
-main_router = APIRouter()
+logger = logging.getLogger(__name__)
 
+WARMUP_RETRY_SECONDS = 5
 
-main_router.include_router(users_router, prefix="", tags=["users"])  
-main_router.include_router(auth_router, prefix="", tags=["auth"])    
-main_router.include_router(admin_router, prefix="", tags=["admin"])
-main_router.include_router(public_products_router, prefix="", tags=["public_products"])
-main_router.include_router(cart_router, prefix="", tags=["cart"])
-main_router.include_router(address_router, prefix="", tags=["adresses"])
-main_router.include_router(order_router, prefix="", tags=["order"])
 
-app.include_router(main_router)
+async def _warm_up_until_ready(app: FastAPI) -> None:
+    import settings as db_settings
+    from db.session import get_engine
+    from db.warmup import warm_up
+
+    while True:
+        try:
+            await warm_up(get_engine(), db_settings.DB_POOL_WARMUP)
+        except Exception:
+            logger.exception("Database warm-up failed, retrying in %ss", WARMUP_RETRY_SECONDS)
+            await asyncio.sleep(WARMUP_RETRY_SECONDS)
+        else:
+            app.state.ready = True
+            return
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from core.cart_store import get_cart_store
+    from core.guest_carts import run_guest_cart_sweeper
+    from core.images import shutdown_image_pool
+    from core.jobs import get_job_queue
+    from core.revocation import run_revocation_sync
+    from db.partitions import run_partition_maintenance
+    from db.session import dispose_engine
+
+    settings = get_settings()
+    app.state.ready = False
+    tasks = [
+        asyncio.create_task(_warm_up_until_ready(app)),
+        asyncio.create_task(run_revocation_sync(settings.REVOCATION_SYNC_SECONDS)),
+        asyncio.create_task(run_partition_maintenance(
+            settings.PARTITION_MAINTENANCE_SECONDS, settings.PARTITION_MONTHS_AHEAD
+        )),
+        asyncio.create_task(run_guest_cart_sweeper(
+            settings.GUEST_CART_SWEEP_SECONDS, settings.GUEST_CART_SWEEP_BATCH
+        )),
+    ]
+    if settings.JOBS_ENABLED:
+        tasks.append(asyncio.create_task(get_job_queue().run()))
+    try:
+        yield
+    finally:
+        app.state.ready = False
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        cart_store = get_cart_store()
+        if cart_store is not None:
+            await cart_store.flush_all()
+        shutdown_image_pool()
+        await dispose_engine()
+
+
+def _include_routers(app: FastAPI, settings: Settings) -> None:
+    from fastapi import Depends
+    from fastapi.routing import APIRouter
+
+    from core.rate_limit import RateLimiter, client_ip, login_account
+
+    from api.routes.handlers import router as users_router
+    from api.routes.auth import router as auth_router
+    from api.routes.admin import router as admin_router
+    from api.routes.analytics import router as analytics_router
+    from api.routes.public_products import router as public_products_router
+    from api.routes.cart import router as cart_router
+    from api.routes.guest_cart import router as guest_cart_router
+    from api.routes.address import router as address_router
+    from api.routes.order import router as order_router
+    from api.routes.health import router as health_router
+    from api.routes.media import router as media_router
+
+    main_router = APIRouter()
+
+    auth_limits = []
+    guest_cart_limits = []
+    if settings.RATE_LIMIT_ENABLED:
+        auth_limits = [
+            Depends(RateLimiter("auth:ip", settings.RATE_LIMIT_AUTH_IP, key=client_ip)),
+            Depends(RateLimiter("auth:account", settings.RATE_LIMIT_AUTH_ACCOUNT, key=login_account)),
+        ]
+        # Anonymous: every cookie-less POST would otherwise create a guest_carts row
+        guest_cart_limits = [
+            Depends(RateLimiter("guest_cart:ip", settings.RATE_LIMIT_GUEST_CART_IP, key=client_ip)),
+        ]
+
+    main_router.include_router(users_router, prefix="", tags=["users"])
+    main_router.include_router(auth_router, prefix="", tags=["auth"], dependencies=auth_limits)
+    main_router.include_router(admin_router, prefix="", tags=["admin"])
+    main_router.include_router(analytics_router, prefix="", tags=["admin"])
+    main_router.include_router(public_products_router, prefix="", tags=["public_products"])
+    main_router.include_router(cart_router, prefix="", tags=["cart"])
+    main_router.include_router(guest_cart_router, prefix="", tags=["guest-cart"], dependencies=guest_cart_limits)
+    main_router.include_router(address_router, prefix="", tags=["adresses"])
+    main_router.include_router(order_router, prefix="", tags=["order"])
+    main_router.include_router(health_router, prefix="", tags=["health"])
+    main_router.include_router(media_router, prefix="", tags=["media"])
+
+    app.include_router(main_router)
+
+
+def _install_compression(app: FastAPI, settings: Settings) -> None:
+    if settings.COMPRESSION_ENABLED:
+        from core.compression import CompressionMiddleware
+
+        app.add_middleware(
+            CompressionMiddleware,
+            min_size=settings.COMPRESSION_MIN_BYTES,
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        )
+
+
+def _install_instrumentation(app: FastAPI, settings: Settings) -> None:
+    if settings.SENTRY_DSN:
+        import sentry_sdk
+
+        sentry_sdk.init(dsn=settings.SENTRY_DSN, traces_sample_rate=settings.SENTRY_TRACES_SAMPLE_RATE)
+
+    if settings.METRICS_ENABLED or settings.QUERY_DEBUG:
+        from core.metrics import RequestStatsMiddleware
+
+        app.add_middleware(
+            RequestStatsMiddleware,
+            record_metrics=settings.METRICS_ENABLED,
+            debug=settings.QUERY_DEBUG,
+            n_plus_one_threshold=settings.QUERY_DEBUG_N_PLUS_ONE_THRESHOLD,
+        )
+
+    if settings.METRICS_ENABLED:
+        from starlette_exporter import PrometheusMiddleware, handle_metrics
+
+        app.add_middleware(
+            PrometheusMiddleware,
+            app_name="shop",
+            prefix="shop",
+            group_paths=True,
+            filter_unhandled_paths=True,
+            skip_paths=["/metrics"],
+        )
+        app.add_route("/metrics", handle_metrics, include_in_schema=False)
+
+
+def create_app(settings: Settings | None = None) -> FastAPI:
+    """Builds the application.
+
+    Routers, DALs, passlib and python-jose are only imported here, and the
+    database engine is created lazily on first use, so importing this
+    module stays cheap.
+    """
+    from fastapi import FastAPI
+
+    if settings is not None:
+        configure(settings)
+    settings = get_settings()
+
+    app = FastAPI(title="Shop", lifespan=lifespan)
+    _include_routers(app, settings)
+    _install_compression(app, settings)
+    _install_instrumentation(app, settings)
+    return app
+
+
+_app: FastAPI | None = None
+
+
+def __getattr__(name: str):
+    # `uvicorn main:app` and `from main import app` build the default app on access
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    import uvicorn
+
+    uvicorn.run(create_app(), host="0.0.0.0", port=8000)
@@ -0,0 +1,36 @@
+"""guest carts
+
+Revision ID: 4f6c0a8e2b15
+Revises: e81f0b3c5d92
+Create Date: 2026-10-19 20:11:48.062593
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f6c0a8e2b15'
+down_revision: Union[str, Sequence[str], None] = 'e81f0b3c5d92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('guest_carts',
+    sa.Column('guest_id', sa.UUID(), nullable=False),
+    sa.Column('items', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('guest_id')
+    )
+    op.create_index(op.f('ix_guest_carts_expires_at'), 'guest_carts', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_guest_carts_expires_at'), table_name='guest_carts')
+    op.drop_table('guest_carts')
@@ -0,0 +1,41 @@
+"""outbox jobs
+
+Revision ID: 5b7e2d9c41a8
+Revises: 9c1f4e2ab7d3
+Create Date: 2026-10-19 14:02:17.530684
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2d9c41a8'
+down_revision: Union[str, Sequence[str], None] = '9c1f4e2ab7d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('outbox_jobs',
+    sa.Column('job_id', sa.UUID(), nullable=False),
+    sa.Column('kind', sa.String(length=64), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('run_after', sa.DateTime(), nullable=False),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('job_id')
+    )
+    op.create_index('ix_outbox_jobs_due', 'outbox_jobs', ['run_after'], unique=False, postgresql_where=sa.text("status = 'pending'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_outbox_jobs_due', table_name='outbox_jobs', postgresql_where=sa.text("status = 'pending'"))
+    op.drop_table('outbox_jobs')
@@ -0,0 +1,41 @@
+"""order item discount and line total
+
+Revision ID: a95d3e7f0c61
+Revises: 4f6c0a8e2b15
+Create Date: 2026-10-19 21:03:27.775301
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a95d3e7f0c61'
+down_revision: Union[str, Sequence[str], None] = '4f6c0a8e2b15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('order_items', sa.Column('discount_percentage', sa.Numeric(precision=5, scale=2), server_default='0', nullable=False))
+    op.add_column('order_items', sa.Column('line_total', sa.Numeric(precision=12, scale=2), nullable=True))
+    # The discount applied at checkout was never stored; the product's
+    # current discount is the best available estimate for old orders
+    op.execute(
+        'UPDATE order_items AS oi SET discount_percentage = p.discount_percentage '
+        'FROM products AS p WHERE p.product_id = oi.product_id'
+    )
+    op.execute(
+        'UPDATE order_items SET line_total = round(quantity * price * (1 - discount_percentage / 100), 2)'
+    )
+    op.alter_column('order_items', 'line_total', nullable=False)
+    op.alter_column('order_items', 'discount_percentage', server_default=None)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('order_items', 'line_total')
+    op.drop_column('order_items', 'discount_percentage')
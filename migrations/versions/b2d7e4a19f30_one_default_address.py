@@ -0,0 +1,43 @@
+"""one default address per user
+
+Revision ID: b2d7e4a19f30
+Revises: a95d3e7f0c61
+Create Date: 2026-10-19 21:42:10.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d7e4a19f30'
+down_revision: Union[str, Sequence[str], None] = 'a95d3e7f0c61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Concurrent edits under the old two-statement switch could leave several
+    # defaults behind; keep one per user
+    op.execute(
+        'UPDATE addresses SET is_default = false '
+        'WHERE is_default AND address_id NOT IN ('
+        'SELECT DISTINCT ON (user_id) address_id FROM addresses '
+        'WHERE is_default ORDER BY user_id, address_id)'
+    )
+    op.create_exclude_constraint(
+        'ex_addresses_one_default',
+        'addresses',
+        ('user_id', '='),
+        using='btree',
+        where='is_default',
+        deferrable=True,
+        initially='IMMEDIATE',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('ex_addresses_one_default', 'addresses', type_='exclude')
@@ -0,0 +1,40 @@
+"""order status enum
+
+Revision ID: c3a8f6d21e47
+Revises: 5b7e2d9c41a8
+Create Date: 2026-10-19 15:21:05.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a8f6d21e47'
+down_revision: Union[str, Sequence[str], None] = '5b7e2d9c41a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('orders', 'status',
+               existing_type=sa.Float(),
+               type_=sa.SmallInteger(),
+               existing_nullable=False,
+               postgresql_using='round(status)::smallint')
+    op.add_column('orders', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.alter_column('orders', 'version', server_default=None)
+    op.create_index('ix_orders_open_created_at', 'orders', ['status', 'created_at'], unique=False, postgresql_where=sa.text('status IN (1, 2, 3)'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_open_created_at', table_name='orders', postgresql_where=sa.text('status IN (1, 2, 3)'))
+    op.drop_column('orders', 'version')
+    op.alter_column('orders', 'status',
+               existing_type=sa.SmallInteger(),
+               type_=sa.Float(),
+               existing_nullable=False)
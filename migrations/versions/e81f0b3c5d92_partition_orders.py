@@ -0,0 +1,135 @@
+"""partition orders and order_items by month
+
+Revision ID: e81f0b3c5d92
+Revises: 7d4b19e0a6c2
+Create Date: 2026-10-19 18:05:33.417260
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81f0b3c5d92'
+down_revision: Union[str, Sequence[str], None] = '7d4b19e0a6c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _create_partitions(table: str, first: date, last: date) -> None:
+    month = first
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE {table}_y{month.year}m{month.month:02d} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+        )
+        month = _next_month(month)
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing tables can't be turned into partitioned ones in place:
+    # create the partitioned tables next to them, copy, then drop the old ones
+    op.rename_table('order_items', 'order_items_legacy')
+    op.execute('ALTER TABLE order_items_legacy RENAME CONSTRAINT order_items_pkey TO order_items_legacy_pkey')
+    op.rename_table('orders', 'orders_legacy')
+    op.execute('ALTER TABLE orders_legacy RENAME CONSTRAINT orders_pkey TO orders_legacy_pkey')
+    op.drop_index('ix_orders_open_created_at', table_name='orders_legacy', postgresql_where=sa.text('status IN (1, 2, 3)'))
+
+    op.create_table('orders',
+    sa.Column('order_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('total', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('status', sa.SmallInteger(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('order_id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)'
+    )
+    op.create_index('ix_orders_open_created_at', 'orders', ['status', 'created_at'], unique=False, postgresql_where=sa.text('status IN (1, 2, 3)'))
+    op.create_index('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at'], unique=False)
+    op.create_table('order_items',
+    sa.Column('order_id', sa.UUID(), nullable=False),
+    sa.Column('product_id', sa.UUID(), nullable=False),
+    sa.Column('order_created_at', sa.DateTime(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['order_id', 'order_created_at'], ['orders.order_id', 'orders.created_at'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('order_id', 'product_id', 'order_created_at'),
+    postgresql_partition_by='RANGE (order_created_at)'
+    )
+
+    oldest = op.get_bind().execute(sa.text("SELECT min(created_at) FROM orders_legacy")).scalar()
+    current = date.today().replace(day=1)
+    first = min(oldest.date(), current).replace(day=1) if oldest else current
+    last = current
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    _create_partitions('orders', first, last)
+    _create_partitions('order_items', first, last)
+
+    op.execute(
+        'INSERT INTO orders (order_id, user_id, total, status, version, created_at) '
+        'SELECT order_id, user_id, total, status, version, created_at FROM orders_legacy'
+    )
+    op.execute(
+        'INSERT INTO order_items (order_id, product_id, order_created_at, quantity, price) '
+        'SELECT i.order_id, i.product_id, o.created_at, i.quantity, i.price '
+        'FROM order_items_legacy i JOIN orders_legacy o ON o.order_id = i.order_id'
+    )
+    op.drop_table('order_items_legacy')
+    op.drop_table('orders_legacy')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Archived partitions (schema "archive") are not brought back
+    op.rename_table('order_items', 'order_items_partitioned')
+    op.execute('ALTER TABLE order_items_partitioned RENAME CONSTRAINT order_items_pkey TO order_items_partitioned_pkey')
+    op.rename_table('orders', 'orders_partitioned')
+    op.execute('ALTER TABLE orders_partitioned RENAME CONSTRAINT orders_pkey TO orders_partitioned_pkey')
+    op.drop_index('ix_orders_open_created_at', table_name='orders_partitioned', postgresql_where=sa.text('status IN (1, 2, 3)'))
+    op.drop_index('ix_orders_user_id_created_at', table_name='orders_partitioned')
+
+    op.create_table('orders',
+    sa.Column('order_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('total', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('status', sa.SmallInteger(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('order_id')
+    )
+    op.create_index('ix_orders_open_created_at', 'orders', ['status', 'created_at'], unique=False, postgresql_where=sa.text('status IN (1, 2, 3)'))
+    op.create_table('order_items',
+    sa.Column('order_id', sa.UUID(), nullable=False),
+    sa.Column('product_id', sa.UUID(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.order_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['product_id'], ['products.product_id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('order_id', 'product_id')
+    )
+    op.execute(
+        'INSERT INTO orders (order_id, user_id, total, status, version, created_at) '
+        'SELECT order_id, user_id, total, status, version, created_at FROM orders_partitioned'
+    )
+    op.execute(
+        'INSERT INTO order_items (order_id, product_id, quantity, price) '
+        'SELECT order_id, product_id, quantity, price FROM order_items_partitioned'
+    )
+    op.drop_table('order_items_partitioned')
+    op.drop_table('orders_partitioned')
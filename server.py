@@ -0,0 +1,105 @@
+"""Production entry point: a gunicorn master managing uvicorn workers.
+
+    python server.py
+
+Tuning is read from the environment, see the ``SERVER_*`` and
+``WEB_CONCURRENCY`` values in ``settings.py``.
+"""
+import importlib.util
+import multiprocessing
+import os
+
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+
+import settings
+
+
+def _resolve(choice: str, fast: str, fallback: str) -> str:
+    if choice != "auto":
+        return choice
+    return fast if importlib.util.find_spec(fast) is not None else fallback
+
+
+class ShopUvicornWorker(UvicornWorker):
+    CONFIG_KWARGS = {
+        "loop": _resolve(settings.SERVER_LOOP, "uvloop", "asyncio"),
+        "http": _resolve(settings.SERVER_HTTP, "httptools", "h11"),
+        "lifespan": "on",
+        "proxy_headers": True,
+    }
+
+
+def post_fork(server, worker) -> None:
+    # if the master created the engine while preloading, each worker needs its own pool
+    from db.session import dispose_inherited_pool
+
+    dispose_inherited_pool()
+
+
+def child_exit(server, worker) -> None:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def worker_count() -> int:
+    return settings.WEB_CONCURRENCY or multiprocessing.cpu_count()
+
+
+def check_worker_state(workers: int) -> None:
+    """Refuses to start several workers with per-process state that has to be shared.
+
+    The write-behind cart store keeps carts in worker memory: with more than
+    one worker a stale copy on one of them can overwrite a cart that another
+    worker's checkout has just cleared.
+    """
+    from core.config import get_settings
+
+    if workers > 1 and get_settings().CART_WRITE_BEHIND:
+        raise SystemExit(
+            f"CART_WRITE_BEHIND keeps carts in worker memory and can't run with {workers} workers: "
+            "set WEB_CONCURRENCY=1 or disable CART_WRITE_BEHIND"
+        )
+
+
+def gunicorn_options() -> dict:
+    return {
+        "bind": settings.SERVER_BIND,
+        "workers": worker_count(),
+        "worker_class": f"{__name__}.ShopUvicornWorker",
+        "keepalive": settings.SERVER_KEEPALIVE,
+        "backlog": settings.SERVER_BACKLOG,
+        "timeout": settings.SERVER_TIMEOUT,
+        "graceful_timeout": settings.SERVER_GRACEFUL_TIMEOUT,
+        "max_requests": settings.SERVER_MAX_REQUESTS,
+        "max_requests_jitter": settings.SERVER_MAX_REQUESTS_JITTER,
+        "preload_app": settings.SERVER_PRELOAD_APP,
+        "post_fork": post_fork,
+        "child_exit": child_exit,
+        "accesslog": "-",
+        "errorlog": "-",
+    }
+
+
+class ShopApplication(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        from main import app
+
+        return app
+
+
+if __name__ == "__main__":
+    options = gunicorn_options()
+    check_worker_state(options["workers"])
+    ShopApplication(options).run()
@@ -0,0 +1,66 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from core.config import Settings, configure
+from core.metrics import statement_shape
+
+configure(Settings(SECRET_KEY=os.environ.get("SECRET_KEY", "test-secret-key")))
+
+pytest_plugins = ["pytester"]
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(n): тест падает, если выполнено больше n SQL-запросов",
+    )
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement_shape(statement))
+
+
+@pytest.fixture
+def query_counter():
+    counter = QueryCounter()
+    event.listen(Engine, "after_cursor_execute", counter)
+    yield counter
+    event.remove(Engine, "after_cursor_execute", counter)
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        return (yield)
+
+    budget = marker.args[0] if marker.args else marker.kwargs["n"]
+    counter = QueryCounter()
+    event.listen(Engine, "after_cursor_execute", counter)
+    try:
+        result = yield
+    finally:
+        event.remove(Engine, "after_cursor_execute", counter)
+
+    if counter.count > budget:
+        listing = "\n".join(f"  {shape}" for shape in counter.statements)
+        pytest.fail(
+            f"Превышен бюджет SQL-запросов: {counter.count} > {budget}\n{listing}",
+            pytrace=False,
+        )
+    return result
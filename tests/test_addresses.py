@@ -0,0 +1,106 @@
+"""Default address switching against a real database.
+
+Needs a disposable PostgreSQL database, see test_fast_read_parity.py.
+"""
+import asyncio
+import os
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from db.dals.address_dal import AddressDAL
+from db.models import Address, Base, User
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _with_addresses(check):
+    engine = create_async_engine(TEST_DATABASE_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            users = [
+                User(name="Owner", surname="Test", email="owner@example.com", password_hash="x", role=["user"]),
+                User(name="Other", surname="Test", email="other@example.com", password_hash="x", role=["user"]),
+            ]
+            session.add_all(users)
+            await session.flush()
+            addresses = [
+                Address(user_id=users[0].user_id, city="Москва", street="Тверская", house="1", is_default=True),
+                Address(user_id=users[0].user_id, city="Москва", street="Арбат", house="2"),
+                Address(user_id=users[1].user_id, city="Казань", street="Баумана", house="3", is_default=True),
+            ]
+            session.add_all(addresses)
+            await session.commit()
+
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            await check(session, users, addresses)
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+async def _defaults(session, user_id):
+    return [address.address_id for address in await AddressDAL(session).get_user_addresses(user_id) if address.is_default]
+
+
+def test_switch_to_unknown_or_foreign_address_keeps_default():
+    """Неизвестный или чужой адрес не сбрасывает текущий адрес по умолчанию"""
+    async def check(session, users, addresses):
+        dal = AddressDAL(session)
+        owner = users[0].user_id
+
+        assert await dal.set_default_address(uuid.uuid4(), owner) is False
+        assert await dal.set_default_address(addresses[2].address_id, owner) is False
+        assert await dal.update_address(addresses[2].address_id, owner, {"is_default": True}) is None
+        await session.commit()
+
+        assert await _defaults(session, owner) == [addresses[0].address_id]
+        assert await _defaults(session, users[1].user_id) == [addresses[2].address_id]
+
+    run(_with_addresses(check))
+
+
+def test_switch_default_address():
+    """Смена адреса по умолчанию снимает флаг со старого адреса одним запросом"""
+    async def check(session, users, addresses):
+        owner = users[0].user_id
+        assert await AddressDAL(session).set_default_address(addresses[1].address_id, owner) is True
+        await session.commit()
+
+        assert await _defaults(session, owner) == [addresses[1].address_id]
+
+    run(_with_addresses(check))
+
+
+def test_edit_with_default_returns_edited_address():
+    """Правка вместе с is_default возвращает изменённый адрес и не трогает поля остальных"""
+    async def check(session, users, addresses):
+        owner = users[0].user_id
+        dal = AddressDAL(session)
+
+        updated = await dal.update_address(addresses[1].address_id, owner, {"street": "Никольская", "is_default": True})
+        await session.commit()
+
+        assert updated.address_id == addresses[1].address_id
+        assert (updated.street, updated.is_default) == ("Никольская", True)
+
+        previous = await dal.get_address_by_id(addresses[0].address_id, owner)
+        assert (previous.street, previous.is_default) == ("Тверская", False)
+
+        created = await dal.create_address(owner, {"city": "Тула", "street": "Ленина", "house": "5", "is_default": True})
+        await session.commit()
+        assert await _defaults(session, owner) == [created.address_id]
+
+    run(_with_addresses(check))
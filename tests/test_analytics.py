@@ -0,0 +1,226 @@
+"""Sales rollups: per-order increments, rebuilds and the admin endpoints.
+
+The DAL tests need a disposable PostgreSQL database, see test_fast_read_parity.py.
+"""
+import asyncio
+import os
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from api.dependencies.auth import require_admin
+from db.dals.analytics_dal import AnalyticsDAL
+from db.models import (
+    Base, Category, Order, OrderItem, Product, SalesDaily, SalesDailyCategory, SalesDailyProduct, User,
+)
+from db.session import get_read_session
+from main import app
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+needs_db = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+DAY = date(2026, 3, 14)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _with_orders(check):
+    engine = create_async_engine(TEST_DATABASE_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            category = Category(name="Rollups")
+            user = User(name="Rollup", surname="Test", email="rollup@example.com", password_hash="x", role=["user"])
+            session.add_all([category, user])
+            await session.flush()
+            products = [
+                Product(category_id=category.category_id, name=name, price=price,
+                        discount_percentage=0.0, stock=10, images=[])
+                for name, price in (("First", Decimal("10.00")), ("Second", Decimal("2.50")))
+            ]
+            session.add_all(products)
+            await session.flush()
+
+            orders = []
+            for hour, quantities in ((9, (1, 2)), (15, (3, 0))):
+                created_at = datetime.combine(DAY, datetime.min.time()).replace(hour=hour)
+                lines = [(product, quantity) for product, quantity in zip(products, quantities) if quantity]
+                order = Order(
+                    user_id=user.user_id, created_at=created_at,
+                    total=sum(product.price * quantity for product, quantity in lines),
+                )
+                session.add(order)
+                await session.flush()
+                session.add_all([
+                    OrderItem(order_id=order.order_id, order_created_at=created_at, product_id=product.product_id,
+                              quantity=quantity, price=product.price, line_total=product.price * quantity)
+                    for product, quantity in lines
+                ])
+                orders.append(order)
+            await session.commit()
+
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            await check(session, category, products, orders)
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+async def _rollups(session):
+    daily = (await session.execute(select(SalesDaily))).scalars().all()
+    categories = (await session.execute(select(SalesDailyCategory))).scalars().all()
+    products = (await session.execute(select(SalesDailyProduct))).scalars().all()
+    return (
+        [(row.day, row.orders_count, row.items_count, row.revenue) for row in daily],
+        sorted((row.day, str(row.category_id), row.quantity, row.revenue) for row in categories),
+        sorted((row.day, str(row.product_id), row.quantity, row.revenue) for row in products),
+    )
+
+
+@needs_db
+def test_apply_order_counts_each_order_once():
+    """Инкремент учитывает заказ в агрегатах ровно один раз"""
+    async def check(session, category, products, orders):
+        dal = AnalyticsDAL(session)
+        assert await dal.apply_order(orders[0].order_id) is True
+        assert await dal.apply_order(orders[0].order_id) is False
+        assert await dal.apply_order(orders[1].order_id) is True
+        assert await dal.apply_order(uuid.uuid4()) is False
+        await session.commit()
+
+        daily, by_category, by_product = await _rollups(session)
+        assert daily == [(DAY, 2, 6, Decimal("45.00"))]
+        assert by_category == [(DAY, str(category.category_id), 6, Decimal("45.00"))]
+        assert by_product == sorted([
+            (DAY, str(products[0].product_id), 4, Decimal("40.00")),
+            (DAY, str(products[1].product_id), 2, Decimal("5.00")),
+        ])
+
+    run(_with_orders(check))
+
+
+@needs_db
+def test_rebuild_matches_increments():
+    """Пересчёт за день даёт те же агрегаты, что и инкременты, и помечает заказы учтёнными"""
+    async def check(session, category, products, orders):
+        dal = AnalyticsDAL(session)
+        for order in orders:
+            await dal.apply_order(order.order_id)
+        await session.commit()
+        incremental = await _rollups(session)
+
+        await dal.rebuild_days(DAY, date(2026, 3, 15))
+        await session.commit()
+        assert await _rollups(session) == incremental
+        assert await dal.apply_order(orders[0].order_id) is False
+
+    run(_with_orders(check))
+
+
+@needs_db
+def test_apply_order_without_products():
+    """Заказ с удалённым товаром всё равно попадает в дневной итог"""
+    async def check(session, category, products, orders):
+        await session.execute(text("ALTER TABLE order_items DROP CONSTRAINT IF EXISTS order_items_product_id_fkey"))
+        await session.execute(text("DELETE FROM products"))
+        assert await AnalyticsDAL(session).apply_order(orders[1].order_id) is True
+        await session.commit()
+
+        daily, by_category, by_product = await _rollups(session)
+        assert daily == [(DAY, 1, 3, Decimal("30.00"))]
+        assert by_category == []
+        assert by_product == [(DAY, str(products[0].product_id), 3, Decimal("30.00"))]
+
+    run(_with_orders(check))
+
+
+@pytest.fixture
+def analytics_client(monkeypatch):
+    async def no_session():
+        yield None
+
+    app.dependency_overrides[require_admin] = lambda: SimpleNamespace(role=["admin"])
+    app.dependency_overrides[get_read_session] = no_session
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_revenue_summary(analytics_client, monkeypatch):
+    """Сводка по выручке считается по дневным агрегатам"""
+    requested = []
+
+    async def get_daily(self, start, end):
+        requested.append((start, end))
+        return [
+            SimpleNamespace(day=date(2026, 3, 1), orders_count=3, items_count=5, revenue=Decimal("90.00")),
+            SimpleNamespace(day=date(2026, 3, 2), orders_count=1, items_count=1, revenue=Decimal("10.00")),
+        ]
+
+    monkeypatch.setattr(AnalyticsDAL, "get_daily", get_daily)
+    response = analytics_client.get(
+        "/admin/analytics/revenue", params={"date_from": "2026-03-01", "date_to": "2026-03-31"}
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert requested == [(date(2026, 3, 1), date(2026, 3, 31))]
+    assert body["orders_count"] == 4
+    assert body["revenue"] == 100
+    assert body["average_order_value"] == 25
+    assert [day["day"] for day in body["days"]] == ["2026-03-01", "2026-03-02"]
+
+
+def test_categories_and_top_products(analytics_client, monkeypatch):
+    """Разбивка по категориям и топ товаров отдаются из агрегатов"""
+    category_id, product_id = uuid.uuid4(), uuid.uuid4()
+
+    async def get_daily_by_category(self, start, end):
+        return [SimpleNamespace(day=start, category_id=category_id, category_name=None, quantity=2, revenue=5)]
+
+    async def get_top_products(self, start, end, limit):
+        return [SimpleNamespace(product_id=product_id, product_name="Товар", quantity=limit, revenue=7)]
+
+    monkeypatch.setattr(AnalyticsDAL, "get_daily_by_category", get_daily_by_category)
+    monkeypatch.setattr(AnalyticsDAL, "get_top_products", get_top_products)
+
+    response = analytics_client.get("/admin/analytics/revenue/categories", params={"date_from": "2026-03-01"})
+    assert response.status_code == 200
+    assert response.json()[0]["category_id"] == str(category_id)
+
+    response = analytics_client.get("/admin/analytics/top-products", params={"limit": 3})
+    assert response.status_code == 200
+    assert response.json() == [{"product_id": str(product_id), "product_name": "Товар", "quantity": 3, "revenue": 7.0}]
+
+
+def test_analytics_period_validation(analytics_client):
+    """Период проверяется до обращения к агрегатам"""
+    response = analytics_client.get(
+        "/admin/analytics/revenue", params={"date_from": "2026-03-02", "date_to": "2026-03-01"}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Начало периода позже его конца"
+
+    response = analytics_client.get(
+        "/admin/analytics/revenue", params={"date_from": "2025-01-01", "date_to": "2026-03-01"}
+    )
+    assert response.status_code == 400
+
+
+def test_analytics_requires_admin():
+    """Без токена аналитика недоступна"""
+    assert TestClient(app).get("/admin/analytics/revenue").status_code == 401
@@ -1,14 +1,20 @@
+import asyncio
 import sys
+import threading
+import time
+import uuid
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
+import pytest
 from fastapi.testclient import TestClient
 from main import app  
 
 client = TestClient(app)
 
 
+@pytest.mark.query_budget(0)
 def test_root_redirect_or_docs():
     """Проверяем, что приложение отвечает"""
     response = client.get("/docs")
@@ -18,8 +24,121 @@ def test_root_redirect_or_docs():
     assert response_root.status_code in (200, 404, 307, 308) 
 
 
+@pytest.mark.query_budget(0)
 def test_openapi_schema():
     """Проверяем OpenAPI-схему"""
     response = client.get("/openapi.json")
     assert response.status_code == 200
-    assert "openapi" in response.json()
\ No newline at end of file
+    assert "openapi" in response.json()
+
+@pytest.mark.query_budget(0)
+def test_metrics_endpoint():
+    """Проверяем, что метрики Prometheus отдаются"""
+    client.get("/openapi.json")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "shop_request_duration_seconds" in response.text
+    assert "shop_db_pool_connections_in_use" in response.text
+
+
+async def idle(*args, **kwargs):
+    await asyncio.Event().wait()
+
+
+@pytest.mark.query_budget(0)
+def test_readiness_flips_after_warm_up(monkeypatch):
+    """Пока прогрев БД не завершён, приложение не готово принимать трафик; после прогрева готово"""
+    import core.guest_carts
+    import core.jobs
+    import core.revocation
+    import db.partitions
+    import db.warmup
+
+    release = threading.Event()
+
+    async def warm_up(engine, connections):
+        await asyncio.to_thread(release.wait, 5)
+
+    monkeypatch.setattr(db.warmup, "warm_up", warm_up)
+    for module, name in (
+        (core.revocation, "run_revocation_sync"),
+        (db.partitions, "run_partition_maintenance"),
+        (core.guest_carts, "run_guest_cart_sweeper"),
+        (core.jobs.JobQueue, "run"),
+    ):
+        monkeypatch.setattr(module, name, idle)
+
+    with TestClient(app) as running:
+        assert running.get("/health/live").status_code == 200
+        response = running.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json() == {"ready": False}
+
+        release.set()
+        deadline = time.monotonic() + 5
+        while running.get("/health/ready").status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        response = running.get("/health/ready")
+        assert response.status_code == 200
+        assert response.json() == {"ready": True}
+
+
+@pytest.mark.query_budget(0)
+def test_products_batch_queries_only_cache_misses(monkeypatch):
+    """Товары, уже лежащие в кэше каталога, отдаются из него; из БД запрашиваются только промахи"""
+    from decimal import Decimal
+
+    from api.schemas.product import ProductShow
+    from core.catalog_cache import get_catalog_cache
+    from core.compression import EncodedBody
+    from db.dals.admin_dal import AdminDAL
+    from db.session import get_read_session
+
+    def product(name):
+        return ProductShow(
+            product_id=uuid.uuid4(), category_id=uuid.uuid4(), name=name, price=Decimal("10.00"),
+            discount_percentage=0.0, description=None, stock=1, images=[],
+        )
+
+    cached, fetched = product("Cached"), product("Fetched")
+    missing_id = uuid.uuid4()
+    queried = []
+
+    async def get_products_by_ids(self, product_ids):
+        queried.append(product_ids)
+        return {fetched.product_id: fetched} if fetched.product_id in product_ids else {}
+
+    async def no_session():
+        yield None
+
+    monkeypatch.setattr(AdminDAL, "get_products_by_ids", get_products_by_ids)
+    monkeypatch.setitem(app.dependency_overrides, get_read_session, no_session)
+    cache = get_catalog_cache()
+    cache.clear()
+    cache.put(("product", cached.product_id), EncodedBody(cached.model_dump_json().encode()))
+
+    ids = ",".join(str(product_id) for product_id in (cached.product_id, fetched.product_id, missing_id))
+    try:
+        response = client.get("/products/batch", params={"ids": ids})
+        assert response.status_code == 200
+        assert [item["name"] for item in response.json()["items"]] == ["Cached", "Fetched"]
+        assert response.json()["missing"] == [str(missing_id)]
+        assert queried == [[fetched.product_id, missing_id]]
+
+        # The fetched product is now cached as well
+        client.get("/products/batch", params={"ids": ids})
+        assert queried[-1] == [missing_id]
+    finally:
+        cache.clear()
+
+
+@pytest.mark.query_budget(0)
+def test_products_batch_validates_ids():
+    """Пакетный запрос товаров проверяет ID до обращения к БД"""
+    response = client.get("/products/batch", params={"ids": "not-a-uuid"})
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Некорректный ID товара: not-a-uuid"
+
+    too_many = ",".join(str(uuid.uuid4()) for _ in range(101))
+    response = client.get("/products/batch", params={"ids": too_many})
+    assert response.status_code == 422
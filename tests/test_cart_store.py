@@ -0,0 +1,100 @@
+import asyncio
+import uuid
+
+import pytest
+
+from core.cart_store import CartSnapshot, MemoryCartStoreBackend, WriteBehindCartStore
+from core.config import configure, get_settings
+from server import check_worker_state
+
+USER = uuid.uuid4()
+PRODUCT = uuid.uuid4()
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.carts: dict = {}
+        self.writes: list = []
+        self.fail = False
+
+    async def load(self, user_id):
+        return CartSnapshot(uuid.uuid4(), dict(self.carts.get(user_id, {})))
+
+    async def write(self, user_id, cart):
+        if self.fail:
+            raise ConnectionError("db is down")
+        self.writes.append(dict(cart.items))
+        self.carts[user_id] = dict(cart.items)
+
+
+def make_store(db, flush_delay=0.01):
+    return WriteBehindCartStore(MemoryCartStoreBackend(), flush_delay, loader=db.load, writer=db.write)
+
+
+def set_quantity(quantity):
+    return lambda items: items.__setitem__(PRODUCT, quantity)
+
+
+def test_rapid_edits_are_coalesced_into_one_write():
+    """Серия быстрых изменений записывается в БД одной транзакцией с последним состоянием"""
+    db = FakeDatabase()
+
+    async def scenario():
+        store = make_store(db)
+        for quantity in range(1, 11):
+            await store.update(USER, set_quantity(quantity))
+        assert db.writes == []
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert db.writes == [{PRODUCT: 10}]
+
+
+def test_failed_flush_is_retried_and_shutdown_flushes_everything():
+    """Неудачная запись не теряет изменения, а остановка сбрасывает все грязные корзины"""
+    db = FakeDatabase()
+
+    async def scenario():
+        store = make_store(db)
+        db.fail = True
+        await store.update(USER, set_quantity(3))
+        await asyncio.sleep(0.05)
+        assert await store.backend.is_dirty(USER)
+
+        db.fail = False
+        await store.flush_all()
+        assert not await store.backend.is_dirty(USER)
+
+    asyncio.run(scenario())
+    assert db.carts[USER] == {PRODUCT: 3}
+
+
+def test_checkout_flush_writes_pending_edits_immediately():
+    """Перед оформлением заказа несохранённые изменения пишутся сразу, без ожидания"""
+    db = FakeDatabase()
+
+    async def scenario():
+        store = make_store(db, flush_delay=60)
+        await store.update(USER, set_quantity(2))
+        await store.flush(USER)
+        assert db.carts[USER] == {PRODUCT: 2}
+
+        await store.forget(USER)
+        assert len(store.backend) == 0
+
+    asyncio.run(scenario())
+
+
+def test_server_refuses_write_behind_with_several_workers():
+    """Сервер не стартует с несколькими воркерами, если корзины кэшируются в памяти воркера"""
+    previous = get_settings()
+    try:
+        configure(previous.model_copy(update={"CART_WRITE_BEHIND": True}))
+        check_worker_state(1)
+        with pytest.raises(SystemExit):
+            check_worker_state(4)
+
+        configure(previous.model_copy(update={"CART_WRITE_BEHIND": False}))
+        check_worker_state(4)
+    finally:
+        configure(previous)
@@ -0,0 +1,77 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.testclient import TestClient
+
+from core.catalog_cache import CatalogCache
+from core.compression import CompressionMiddleware, EncodedBody, choose_encoding
+
+LARGE = {"items": ["товар"] * 500}
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, min_size=1024)
+
+
+@app.get("/large")
+async def large():
+    return JSONResponse(LARGE)
+
+
+@app.get("/small")
+async def small():
+    return JSONResponse({"ok": True})
+
+
+@app.get("/encoded")
+async def encoded():
+    return PlainTextResponse("x" * 2000, headers={"Content-Encoding": "identity"})
+
+
+client = TestClient(app)
+
+
+def test_large_json_is_gzipped_small_is_not():
+    """Большие ответы сжимаются, маленькие отдаются как есть"""
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.json() == LARGE
+
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+    response = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "identity"
+
+
+def test_accept_encoding_negotiation():
+    """Учитывается q=0 и отсутствие поддерживаемых кодировок"""
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, deflate") is None
+    assert choose_encoding(None) is None
+
+
+def test_encoded_body_is_compressed_once():
+    """Сжатое тело кешируется и переиспользуется"""
+    body = EncodedBody(b"a" * 4096)
+    first, encoding = body.encoded("gzip", 1024, 6, 4)
+    second, _ = body.encoded("gzip", 1024, 6, 4)
+    assert encoding == "gzip" and first is second
+    assert gzip.decompress(first) == b"a" * 4096
+
+    assert body.encoded(None, 1024, 6, 4) == (b"a" * 4096, None)
+
+
+def test_catalog_cache_expires_and_evicts():
+    """Записи кеша каталога истекают по TTL и вытесняются сверх лимита"""
+    now = [0.0]
+    cache = CatalogCache(ttl=10, max_entries=2, clock=lambda: now[0])
+    for key in ("a", "b", "c"):
+        cache.put(key, EncodedBody(key.encode()))
+
+    assert cache.get("a") is None
+    assert cache.get("c").body == b"c"
+
+    now[0] = 11
+    assert cache.get("c") is None
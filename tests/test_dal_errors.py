@@ -0,0 +1,109 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError
+
+import db.session
+from api.dependencies.auth import require_admin
+from api.routes.admin import router as admin_router
+from api.routes.handlers import router as users_router
+from db.errors import CATEGORIES_NAME_KEY, PRODUCTS_CATEGORY_FKEY, USERS_EMAIL_KEY
+
+
+class ConstraintViolation(Exception):
+    def __init__(self, constraint_name):
+        super().__init__(constraint_name)
+        self.constraint_name = constraint_name
+
+
+def integrity_error(constraint_name):
+    orig = Exception("violation")
+    orig.__cause__ = ConstraintViolation(constraint_name)
+    return IntegrityError("INSERT ...", {}, orig)
+
+
+class FakeSession:
+    """Fails every statement with the given constraint and records the transaction calls"""
+
+    violated = None
+    sessions = []
+
+    def __init__(self):
+        self.info = {}
+        self.events = []
+        FakeSession.sessions.append(self)
+
+    async def execute(self, statement, params=None):
+        self.events.append("insert")
+        raise integrity_error(FakeSession.violated)
+
+    async def commit(self):
+        self.events.append("commit")
+
+    async def rollback(self):
+        self.events.append("rollback")
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def client(monkeypatch):
+    FakeSession.sessions = []
+    monkeypatch.setattr(db.session, "async_session", FakeSession)
+    app = FastAPI()
+    app.include_router(admin_router)
+    app.include_router(users_router)
+    app.dependency_overrides[require_admin] = lambda: None
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def create(client, kind):
+    if kind == "user":
+        return client.post("/users/", json={
+            "name": "Иван", "surname": "Петров", "email": "ivan@example.com", "password": "password123",
+        })
+    if kind == "product":
+        return client.post("/admin/products/", json={
+            "name": "Товар", "price": 10, "stock": 1, "category_id": str(uuid.uuid4()),
+        })
+    return client.post("/admin/categories/", json={"name": "Книги"})
+
+
+@pytest.mark.parametrize("kind, constraint, status, detail", [
+    ("user", USERS_EMAIL_KEY, 400, "Пользователь с таким email уже существует"),
+    ("product", PRODUCTS_CATEGORY_FKEY, 404, "Категория не найдена"),
+    ("category", CATEGORIES_NAME_KEY, 409, "Категория с таким названием уже существует"),
+])
+def test_constraint_violations_map_to_status(client, kind, constraint, status, detail):
+    """Нарушение ожидаемого ограничения превращается в понятную ошибку, транзакцию откатывает UnitOfWork"""
+    FakeSession.violated = constraint
+    response = create(client, kind)
+
+    assert response.status_code == status
+    assert response.json()["detail"] == detail
+    # One statement, no savepoint; the unit of work rolls the request back
+    assert FakeSession.sessions[0].events == ["insert", "rollback"]
+
+
+@pytest.mark.parametrize("kind", ["product", "category"])
+def test_unexpected_constraint_is_not_hidden(client, kind):
+    """Другие нарушения целостности не выдаются за «не найдено» или «уже существует»"""
+    FakeSession.violated = "some_other_check"
+    response = create(client, kind)
+
+    assert response.status_code == 500
+
+
+def test_unexpected_registration_error_is_logged_not_returned(client, caplog):
+    """Внутренняя ошибка регистрации пишется в лог, клиенту детали не отдаются"""
+    FakeSession.violated = "users_secret_check"
+    with caplog.at_level("ERROR", logger="api.routes.handlers"):
+        response = create(client, "user")
+
+    assert response.status_code == 500
+    assert response.json()["detail"] == "Внутренняя ошибка сервера"
+    assert "users_secret_check" not in response.text
+    assert any(record.exc_info for record in caplog.records)
@@ -0,0 +1,174 @@
+"""Guest carts. The merge test needs a disposable PostgreSQL database, see test_fast_read_parity.py."""
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+import core.cart_store
+import core.rate_limit
+import db.session
+from core.config import configure, get_settings
+from core.guest_carts import merge_guest_cart, read_guest_token, sign_guest_id, sweep_expired_guest_carts
+from core.rate_limit import MemoryRateLimitBackend
+from db.dals.cart_dal import CartDAL
+from db.dals.guest_cart_dal import GuestCartDAL
+from db.models import Base, Cart, CartItem, Category, GuestCart, Product, User
+from main import create_app
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+def test_guest_token_round_trip_and_forgery():
+    """Подписанный токен гостевой корзины читается, подделанный отвергается"""
+    guest_id = uuid.uuid4()
+    token = sign_guest_id(guest_id)
+    assert read_guest_token(token) == guest_id
+
+    other = sign_guest_id(uuid.uuid4())
+    forged = token.split(".")[0] + "." + other.split(".")[1]
+    assert read_guest_token(forged) is None
+    assert read_guest_token("garbage") is None
+    assert read_guest_token(None) is None
+
+
+def test_guest_cart_without_cookie_is_empty():
+    """Без cookie гостевая корзина пуста и ничего не пишет в БД"""
+    response = TestClient(create_app()).get("/guest-cart/")
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+
+
+def test_guest_cart_is_rate_limited(monkeypatch):
+    """Гостевая корзина ограничена по IP: анонимные запросы не могут плодить строки без конца"""
+    monkeypatch.setattr(core.rate_limit, "default_backend", MemoryRateLimitBackend())
+    previous = get_settings()
+    try:
+        client = TestClient(create_app(previous.model_copy(update={"RATE_LIMIT_GUEST_CART_IP": "2/minute"})))
+        assert [client.get("/guest-cart/").status_code for _ in range(3)] == [200, 200, 429]
+    finally:
+        configure(previous)
+
+
+class FakeSession:
+    def __init__(self, events):
+        self.events = events
+        self.info = {}
+
+    async def commit(self):
+        self.events.append("commit")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def test_sweeper_deletes_in_batches(monkeypatch):
+    """Просроченные корзины удаляются пачками, каждая в своей транзакции, пока пачка полная"""
+    events = []
+    batches = iter([3, 3, 1])
+
+    async def purge_expired(self, now, batch_size):
+        deleted = next(batches)
+        events.append(f"purge {deleted}")
+        return deleted
+
+    monkeypatch.setattr(db.session, "async_session", lambda: FakeSession(events))
+    monkeypatch.setattr(GuestCartDAL, "purge_expired", purge_expired)
+
+    assert asyncio.run(sweep_expired_guest_carts(batch_size=3)) == 7
+    assert events == ["purge 3", "commit", "purge 3", "commit", "purge 1", "commit"]
+
+
+def test_merge_flushes_and_forgets_cached_cart(monkeypatch):
+    """Перед слиянием кэшированная корзина записывается в БД, после коммита забывается"""
+    events = []
+    user_id, guest_id, cart_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    class FakeStore:
+        async def flush(self, owner):
+            events.append(("flush", owner))
+
+        async def forget(self, owner):
+            events.append(("forget", owner))
+
+    async def ensure_cart_id(self, owner):
+        return cart_id
+
+    async def merge_into_cart(self, guest, cart, now):
+        events.append(("merge", guest, cart))
+        return 2
+
+    monkeypatch.setattr(core.cart_store, "get_cart_store", FakeStore)
+    monkeypatch.setattr(CartDAL, "ensure_cart_id", ensure_cart_id)
+    monkeypatch.setattr(GuestCartDAL, "merge_into_cart", merge_into_cart)
+
+    session = FakeSession(events)
+    assert asyncio.run(merge_guest_cart(session, guest_id, user_id)) == 2
+    assert events == [("flush", user_id), ("merge", guest_id, cart_id)]
+
+    # The unit of work commits, then runs the cleanup
+    for callback in session.info.pop("after_commit"):
+        asyncio.run(callback())
+    assert events[-1] == ("forget", user_id)
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_merge_on_login_sums_quantities():
+    """При входе гостевая корзина добавляется к корзине пользователя, количества складываются"""
+    async def scenario():
+        engine = create_async_engine(TEST_DATABASE_URL)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+        try:
+            now = datetime.utcnow()
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                category = Category(name="Guest")
+                user = User(name="Guest", surname="Test", email="guest@example.com", password_hash="x", role=["user"])
+                session.add_all([category, user])
+                await session.flush()
+                products = [
+                    Product(category_id=category.category_id, name=name, price=Decimal("1.00"),
+                            discount_percentage=0.0, stock=10, images=[])
+                    for name in ("Shared", "Guest only")
+                ]
+                session.add_all(products)
+                await session.flush()
+                cart = Cart(user_id=user.user_id)
+                session.add(cart)
+                await session.flush()
+                session.add(CartItem(cart_id=cart.cart_id, product_id=products[0].product_id, quantity=2))
+
+                guest_id, expired_id = uuid.uuid4(), uuid.uuid4()
+                items = {str(products[0].product_id): 3, str(products[1].product_id): 1, str(uuid.uuid4()): 5}
+                session.add_all([
+                    GuestCart(guest_id=guest_id, items=items, expires_at=now + timedelta(days=1)),
+                    GuestCart(guest_id=expired_id, items=items, expires_at=now - timedelta(days=1)),
+                ])
+                await session.commit()
+
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                # Unknown products are skipped
+                assert await merge_guest_cart(session, guest_id, user.user_id) == 2
+                # An expired cart is deleted without merging anything
+                assert await merge_guest_cart(session, expired_id, user.user_id) == 0
+                await session.commit()
+
+                rows = await session.execute(select(CartItem.product_id, CartItem.quantity))
+                assert dict(rows.all()) == {products[0].product_id: 5, products[1].product_id: 1}
+                assert (await session.execute(select(GuestCart))).first() is None
+        finally:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+            await engine.dispose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,189 @@
+import asyncio
+import io
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from core.config import configure, get_settings
+import api.routes.admin
+import db.session
+from api.dependencies.auth import require_admin
+from core.images import ImageTooLarge, InvalidUpload, LocalImageStorage, StreamedUpload
+
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+@pytest.fixture
+def media_root(tmp_path):
+    previous = get_settings()
+    configure(previous.model_copy(update={"MEDIA_ROOT": str(tmp_path)}))
+    yield tmp_path
+    configure(previous)
+
+
+def test_upload_is_stored_under_its_hash(tmp_path):
+    """Загрузка сохраняется по хешу содержимого, повторная даёт тот же ключ"""
+    storage = LocalImageStorage(str(tmp_path))
+
+    first = asyncio.run(storage.save(chunks(b"abc", b"def"), max_bytes=100))
+    second = asyncio.run(storage.save(chunks(b"abcdef"), max_bytes=100))
+
+    assert first == second
+    assert (storage.image_dir(first) / "original").read_bytes() == b"abcdef"
+
+
+def test_oversized_upload_leaves_nothing_behind(tmp_path):
+    """Слишком большой файл отклоняется, временный файл удаляется"""
+    storage = LocalImageStorage(str(tmp_path))
+
+    with pytest.raises(ImageTooLarge):
+        asyncio.run(storage.save(chunks(b"x" * 60, b"x" * 60), max_bytes=100))
+
+    assert list((tmp_path / "tmp").iterdir()) == []
+    assert not (tmp_path / "images").exists()
+
+
+def test_media_is_served_with_cache_headers_and_ranges(media_root):
+    """Файлы отдаются с долгим кешированием и поддержкой Range"""
+    from main import app
+
+    (media_root / "images").mkdir()
+    (media_root / "images" / "thumb.webp").write_bytes(b"0123456789")
+    client = TestClient(app)
+
+    response = client.get("/media/images/thumb.webp")
+    assert response.status_code == 200
+    assert "immutable" in response.headers["cache-control"]
+
+    response = client.get("/media/images/thumb.webp", headers={"Range": "bytes=2-5"})
+    assert response.status_code == 206
+    assert response.content == b"2345"
+
+    assert client.get("/media/../secret").status_code == 404
+    assert client.get("/media/images/missing.webp").status_code == 404
+
+
+def test_variants_keep_aspect_ratio(tmp_path):
+    """Варианты уменьшаются по длинной стороне с сохранением пропорций"""
+    Image = pytest.importorskip("PIL.Image")
+    from core.images import InvalidImage, generate_variants
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (1000, 500), "red").save(buffer, "PNG")
+    (tmp_path / "original").write_bytes(buffer.getvalue())
+
+    result = generate_variants(str(tmp_path), {"thumb": 200, "huge": 5000})
+    assert (result["width"], result["height"]) == (1000, 500)
+    assert [(v["width"], v["height"]) for v in result["variants"]] == [(200, 100), (1000, 500)]
+
+    (tmp_path / "original").write_bytes(b"not an image")
+    with pytest.raises(InvalidImage):
+        generate_variants(str(tmp_path), {"thumb": 200})
+
+
+BOUNDARY = "test-boundary"
+FORM_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def form(content: bytes, content_type: str = "image/png", field: str = "file") -> bytes:
+    return (
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"note\"\r\n\r\nhello\r\n"
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"a.png\"\r\n"
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + content + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def split(body: bytes, size: int):
+    return chunks(*(body[i:i + size] for i in range(0, len(body), size)))
+
+
+async def read_upload(upload: StreamedUpload) -> bytes:
+    await upload.open()
+    return b"".join([chunk async for chunk in upload.chunks()])
+
+
+def test_streamed_upload_reads_file_field():
+    """Файл читается из потока тела по частям, другие поля пропускаются"""
+    content = bytes(range(256)) * 40
+    upload = StreamedUpload(split(form(content), 7), FORM_TYPE, "file", max_body_bytes=1 << 20)
+
+    assert asyncio.run(read_upload(upload)) == content
+    assert upload.content_type == "image/png"
+
+
+def test_streamed_upload_stops_at_body_limit():
+    """Чтение прекращается, как только тело превышает лимит"""
+    received = []
+
+    async def stream():
+        body = form(b"x" * 100 * 1024)
+        for i in range(0, len(body), 1024):
+            received.append(i)
+            yield body[i:i + 1024]
+
+    upload = StreamedUpload(stream(), FORM_TYPE, "file", max_body_bytes=4096)
+    with pytest.raises(ImageTooLarge):
+        asyncio.run(read_upload(upload))
+    assert len(received) == 5
+
+    with pytest.raises(InvalidUpload):
+        asyncio.run(read_upload(StreamedUpload(split(form(b"x", field="other"), 64), FORM_TYPE, "file", 4096)))
+    with pytest.raises(InvalidUpload):
+        StreamedUpload(chunks(b""), "application/json", "file", 4096)
+
+
+class FakeSession:
+    def __init__(self):
+        self.info = {}
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def upload_client(monkeypatch, media_root):
+    from main import app
+
+    async def get_product_by_id(self, product_id):
+        return object()
+
+    previous = get_settings()
+    configure(previous.model_copy(update={"IMAGE_MAX_UPLOAD_BYTES": 1000}))
+    monkeypatch.setattr(db.session, "async_session", FakeSession)
+    monkeypatch.setattr(api.routes.admin.AdminDAL, "get_product_by_id", get_product_by_id)
+    app.dependency_overrides[require_admin] = lambda: None
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+        configure(previous)
+
+
+def test_upload_limits_are_checked_while_streaming(upload_client):
+    """Загрузка отклоняется по Content-Length и по фактическому размеру тела"""
+    url = f"/admin/products/{uuid.uuid4()}/images"
+    headers = {"Content-Type": FORM_TYPE}
+
+    response = upload_client.post(url, content=form(b"x" * 100_000), headers=headers)
+    assert response.status_code == 413
+
+    # Without Content-Length the body is counted as it streams in
+    body = form(b"x" * 2000)
+    response = upload_client.post(url, content=iter([body[:1024], body[1024:]]), headers=headers)
+    assert response.status_code == 413
+
+    response = upload_client.post(url, content=form(b"x" * 10, content_type="text/plain"), headers=headers)
+    assert response.status_code == 415
+
+    response = upload_client.post(url, content=b"{}", headers={"Content-Type": "application/json"})
+    assert response.status_code == 422
@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from core import jobs
+from core.jobs import JobQueue, LocalJobBackend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime(2026, 1, 1)
+
+    def __call__(self):
+        return self.now
+
+
+def test_job_retries_with_backoff_then_fails(monkeypatch):
+    """Упавшая задача повторяется с экспоненциальной задержкой и после лимита попыток помечается как failed"""
+    clock = FakeClock()
+    monkeypatch.setattr(jobs, "utcnow", clock)
+    calls = []
+
+    async def flaky(payload):
+        calls.append(payload["n"])
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(jobs.handlers, "test.flaky", flaky)
+    backend = LocalJobBackend(clock=clock)
+    queue = JobQueue(backend, max_attempts=3, backoff_base=1.0)
+
+    async def scenario():
+        await queue.enqueue(None, "test.flaky", {"n": 1})
+        await queue.drain()
+        assert calls == [1]
+        entry = next(iter(backend.pending.values()))
+        assert entry.run_after == clock.now + timedelta(seconds=1)
+
+        clock.now += timedelta(seconds=1)
+        await queue.drain()
+        entry = next(iter(backend.pending.values()))
+        assert entry.run_after == clock.now + timedelta(seconds=2)
+
+        clock.now += timedelta(seconds=2)
+        await queue.drain()
+
+    asyncio.run(scenario())
+    assert calls == [1, 1, 1]
+    assert not backend.pending
+    assert [entry.job.attempts for entry in backend.failed] == [3]
+    assert backend.failed[0].error == "RuntimeError: boom"
+
+
+def test_worker_respects_concurrency_limit(monkeypatch):
+    """Одновременно выполняется не больше concurrency задач"""
+    in_flight = 0
+    peak = 0
+
+    async def slow(payload):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    monkeypatch.setitem(jobs.handlers, "test.slow", slow)
+    backend = LocalJobBackend()
+    queue = JobQueue(backend, concurrency=2, poll_interval=0.01)
+
+    async def scenario():
+        for n in range(5):
+            await queue.enqueue(None, "test.slow", {"n": n})
+        worker = asyncio.create_task(queue.run())
+        while len(backend.completed) < 5:
+            await asyncio.sleep(0.01)
+        worker.cancel()
+        try:
+            await worker
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(scenario())
+    assert peak == 2
+    assert sorted(job.payload["n"] for job in backend.completed) == [0, 1, 2, 3, 4]
@@ -0,0 +1,19 @@
+from sqlalchemy.dialects import postgresql
+
+from db.dals.order_dal import GET_OPEN_ORDERS
+from db.models import ORDER_TRANSITIONS, Order, OrderStatus
+
+
+def test_terminal_statuses_have_no_transitions():
+    """Из доставленного и отменённого заказа перейти никуда нельзя"""
+    assert OrderStatus.PENDING.can_transition_to(OrderStatus.PAID)
+    assert not OrderStatus.SHIPPED.can_transition_to(OrderStatus.CANCELLED)
+    assert all(not ORDER_TRANSITIONS[status] for status in OrderStatus if not status.is_open)
+
+
+def test_open_orders_query_matches_partial_index():
+    """Запрос открытых заказов содержит тот же предикат, что и частичный индекс"""
+    index = next(index for index in Order.__table__.indexes if index.name == "ix_orders_open_created_at")
+    predicate = str(index.dialect_options["postgresql"]["where"])
+    sql = str(GET_OPEN_ORDERS.compile(dialect=postgresql.dialect()))
+    assert "orders." + predicate in sql
@@ -0,0 +1,51 @@
+import asyncio
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+
+from api.schemas.order import OrderItemShow, OrderShow
+from db.dals.order_dal import OrderDAL
+
+
+class FakeSession:
+    def __init__(self):
+        self.added = []
+
+    def add(self, instance):
+        self.added.append(instance)
+
+    async def flush(self):
+        for order in self.added:
+            order.order_id = order.order_id or uuid.uuid4()
+            order.version = order.version or 1
+            for item in order.items:
+                item.order_id = order.order_id
+
+
+def cart_item(price, discount, quantity):
+    product = SimpleNamespace(product_id=uuid.uuid4(), price=Decimal(price), discount_percentage=discount)
+    return SimpleNamespace(product=product, quantity=quantity)
+
+
+def test_line_totals_sum_to_order_total():
+    """Сумма заказа равна сумме округлённых строк, строки хранят цену и скидку на момент покупки"""
+    cart = SimpleNamespace(items=[
+        cart_item("19.99", 15.0, 3),
+        cart_item("0.35", 33.3, 7),
+        cart_item("100.00", 0.0, 1),
+        SimpleNamespace(product=None, quantity=2),
+    ])
+    order = asyncio.run(OrderDAL(FakeSession()).create_order_from_cart(cart, uuid.uuid4()))
+
+    assert [item.line_total for item in order.items] == [Decimal("50.97"), Decimal("1.63"), Decimal("100.00")]
+    assert order.total == sum(item.line_total for item in order.items) == Decimal("152.60")
+
+    shown = OrderShow.model_validate(order)
+    assert shown.total == float(order.total)
+    assert shown.items[0] == OrderItemShow(
+        product_id=cart.items[0].product.product_id,
+        quantity=3,
+        price=19.99,
+        discount_percentage=15.0,
+        line_total=50.97,
+    )
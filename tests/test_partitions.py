@@ -0,0 +1,117 @@
+"""Monthly partitions of orders and order_items.
+
+The DEFAULT partition test needs a disposable PostgreSQL database, see
+test_fast_read_parity.py.
+"""
+import asyncio
+import os
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from db.models import Base, Category, Order, OrderItem, Product, User
+from db.partitions import (
+    PARTITIONED_TABLES, add_months, create_partition_sql, ensure_partitions, partition_month, partition_name,
+)
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+def test_monthly_partition_bounds():
+    """Границы месячных партиций корректно переходят через год"""
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert partition_month(partition_name("order_items", date(2026, 3, 1))) == date(2026, 3, 1)
+    assert partition_month("orders_default") is None
+    assert create_partition_sql("orders", date(2026, 12, 1)).endswith(
+        "PARTITION OF orders FOR VALUES FROM ('2026-12-01') TO ('2027-01-01')"
+    )
+
+
+class RecordingSession:
+    def __init__(self, partitions):
+        self.partitions = partitions
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        names = self.partitions.get((params or {}).get("parent"), [])
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: names))
+
+
+def test_ensure_partitions_moves_rows_out_of_default():
+    """Строки месяца переносятся из DEFAULT до создания партиции и возвращаются после"""
+    session = RecordingSession({
+        "orders": ["orders_default", "orders_y2026m03"],
+        "order_items": ["order_items_default", "order_items_y2026m03"],
+    })
+    created = asyncio.run(ensure_partitions(session, months_ahead=1, today=date(2026, 3, 10)))
+    assert created == ["orders_y2026m04", "order_items_y2026m04"]
+
+    ddl = [sql for sql in session.statements if not sql.startswith("SELECT")]
+    assert ddl == [
+        "CREATE TEMPORARY TABLE moving_orders AS SELECT * FROM orders_default "
+        "WHERE created_at >= '2026-04-01' AND created_at < '2026-05-01'",
+        "CREATE TEMPORARY TABLE moving_order_items AS SELECT * FROM order_items_default "
+        "WHERE order_created_at >= '2026-04-01' AND order_created_at < '2026-05-01'",
+        "DELETE FROM order_items_default WHERE order_created_at >= '2026-04-01' AND order_created_at < '2026-05-01'",
+        "DELETE FROM orders_default WHERE created_at >= '2026-04-01' AND created_at < '2026-05-01'",
+        create_partition_sql("orders", date(2026, 4, 1)),
+        create_partition_sql("order_items", date(2026, 4, 1)),
+        "INSERT INTO orders SELECT * FROM moving_orders",
+        "DROP TABLE moving_orders",
+        "INSERT INTO order_items SELECT * FROM moving_order_items",
+        "DROP TABLE moving_order_items",
+    ]
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_ensure_partitions_with_rows_in_default():
+    """Создание партиции не падает, если в DEFAULT уже есть строки этого месяца"""
+    async def scenario():
+        engine = create_async_engine(TEST_DATABASE_URL)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+        try:
+            created_at = datetime(2026, 4, 20, 12, 0)
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                category = Category(name="Partitions")
+                user = User(name="Part", surname="Test", email="part@example.com", password_hash="x", role=["user"])
+                session.add_all([category, user])
+                await session.flush()
+                product = Product(category_id=category.category_id, name="Item", price=Decimal("1.00"),
+                                  discount_percentage=0.0, stock=1, images=[])
+                session.add(product)
+                await session.flush()
+                order = Order(order_id=uuid.uuid4(), user_id=user.user_id, total=Decimal("2.00"), created_at=created_at)
+                session.add(order)
+                await session.flush()
+                session.add(OrderItem(order_id=order.order_id, order_created_at=created_at,
+                                      product_id=product.product_id, quantity=2, price=Decimal("1.00"),
+                                      line_total=Decimal("2.00")))
+                await session.commit()
+
+            async with AsyncSession(engine) as session:
+                created = await ensure_partitions(session, months_ahead=2, today=date(2026, 3, 1))
+                await session.commit()
+            assert partition_name("orders", date(2026, 5, 1)) in created
+
+            async with engine.connect() as conn:
+                for table in PARTITIONED_TABLES:
+                    moved = await conn.scalar(text(f"SELECT count(*) FROM {partition_name(table, date(2026, 4, 1))}"))
+                    left = await conn.scalar(text(f"SELECT count(*) FROM {table}_default"))
+                    assert (moved, left) == (1, 0)
+        finally:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+            await engine.dispose()
+
+    asyncio.run(scenario())
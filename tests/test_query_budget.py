@@ -0,0 +1,89 @@
+import logging
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+
+from core.metrics import RequestStatsMiddleware, record_query, statement_shape
+
+
+engine = create_engine("sqlite://")
+
+
+def test_statement_shape_groups_repeated_queries():
+    """Запросы, отличающиеся только аргументами, имеют одинаковую форму"""
+    first = statement_shape("SELECT * FROM products\n WHERE product_id IN ($1, $2, $3)")
+    second = statement_shape("SELECT * FROM products WHERE product_id IN ($1, $2)")
+    assert first == second
+
+    assert statement_shape("SELECT 1 LIMIT 20") == statement_shape("SELECT 2 LIMIT 100")
+
+
+def test_request_stats_report_queries_and_n_plus_one(caplog):
+    """В режиме отладки ответ содержит число запросов, а повторяющиеся запросы попадают в лог как N+1"""
+    stats_engine = create_engine("sqlite://")
+
+    @event.listens_for(stats_engine, "after_cursor_execute")
+    def forward(conn, cursor, statement, parameters, context, executemany):
+        record_query(statement, 0.0)
+
+    app = FastAPI()
+    app.add_middleware(RequestStatsMiddleware, record_metrics=False, debug=True, n_plus_one_threshold=3)
+
+    @app.get("/items")
+    async def items():
+        with stats_engine.connect() as conn:
+            for item_id in range(3):
+                conn.execute(text(f"SELECT {item_id} AS item_id"))
+            conn.execute(text("SELECT 'total'"))
+        return {}
+
+    with caplog.at_level(logging.WARNING, logger="core.metrics"):
+        response = TestClient(app).get("/items")
+
+    assert response.headers["X-DB-Queries"] == "4"
+    [record] = caplog.records
+    assert record.getMessage() == (
+        "Possible N+1 on GET /items: statement executed 3 times (4 total): SELECT ? AS item_id"
+    )
+
+
+@pytest.mark.query_budget(2)
+def test_query_counter_counts_statements(query_counter):
+    """Счётчик видит каждый выполненный запрос"""
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("SELECT 2"))
+
+    assert query_counter.count == 2
+
+
+def test_query_budget_fails_test_over_budget(pytester):
+    """Тест, выполнивший больше запросов, чем разрешает маркер, падает со списком запросов"""
+    pytester.makeconftest(Path(__file__).with_name("conftest.py").read_text(encoding="utf-8"))
+    pytester.makepyfile("""
+        import pytest
+        from sqlalchemy import create_engine, text
+
+        engine = create_engine("sqlite://")
+
+        def run(count):
+            with engine.connect() as conn:
+                for i in range(count):
+                    conn.execute(text(f"SELECT {i}"))
+
+        @pytest.mark.query_budget(2)
+        def test_within_budget():
+            run(2)
+
+        @pytest.mark.query_budget(2)
+        def test_over_budget():
+            run(3)
+    """)
+
+    result = pytester.runpytest_inprocess()
+
+    result.assert_outcomes(passed=1, failed=1)
+    result.stdout.fnmatch_lines(["*Превышен бюджет SQL-запросов: 3 > 2*"])
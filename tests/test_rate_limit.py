@@ -0,0 +1,72 @@
+import asyncio
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from core.rate_limit import Limit, MemoryRateLimitBackend, RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_and_expires():
+    """Корзина токенов пополняется со временем, простаивающие ключи удаляются"""
+    clock = FakeClock()
+    backend = MemoryRateLimitBackend(shards=1, sweep_every=1, clock=clock)
+    limit = Limit.parse("2/minute")
+
+    async def scenario():
+        assert await backend.consume("k", limit) == 0
+        assert await backend.consume("k", limit) == 0
+        assert await backend.consume("k", limit) == 30
+
+        clock.now = 30
+        assert await backend.consume("k", limit) == 0
+
+        clock.now = 1000
+        await backend.consume("other", limit)
+        return len(backend)
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_rate_limiter_dependency_returns_429():
+    """После исчерпания лимита запрос отклоняется до вызова обработчика"""
+    app = FastAPI()
+    calls = []
+    limiter = RateLimiter("test", "2/minute", backend=MemoryRateLimitBackend())
+
+    @app.post("/login", dependencies=[Depends(limiter)])
+    async def login():
+        calls.append(1)
+        return {}
+
+    client = TestClient(app)
+    assert client.post("/login").status_code == 200
+    assert client.post("/login").status_code == 200
+
+    response = client.post("/login")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
+    assert len(calls) == 2
+
+
+def test_users_limits_apply_to_registration_only(monkeypatch):
+    """Лимиты регистрации не распространяются на просмотр профиля"""
+    import core.rate_limit
+    from core.config import configure, get_settings
+    from main import create_app
+
+    monkeypatch.setattr(core.rate_limit, "default_backend", MemoryRateLimitBackend())
+    previous = get_settings()
+    try:
+        client = TestClient(create_app(previous.model_copy(update={"RATE_LIMIT_USERS_IP": "2/minute"})))
+        assert [client.get("/users/me").status_code for _ in range(3)] == [401, 401, 401]
+        assert [client.post("/users/", json={}).status_code for _ in range(3)] == [422, 422, 429]
+    finally:
+        configure(previous)
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from core.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    """Одинаковые параллельные запросы выполняются одним вызовом"""
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": 42}
+
+    async def scenario():
+        flight = SingleFlight("test")
+        results = await asyncio.gather(*(flight.do("key", load) for _ in range(10)))
+        assert all(result == {"value": 42} for result in results)
+        assert len(flight) == 0
+
+        # After completion the next call queries again
+        await flight.do("key", load)
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+
+def test_errors_reach_every_waiter():
+    """Ошибка запроса получают все ожидающие, а ключ освобождается"""
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ConnectionError("db is down")
+
+    async def scenario():
+        flight = SingleFlight("test")
+        results = await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ConnectionError) for result in results)
+        assert len(flight) == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    """Отключение первого клиента не прерывает запрос для остальных"""
+    async def load():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def scenario():
+        flight = SingleFlight("test")
+        leader = asyncio.create_task(flight.do("key", load))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", load))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert await follower == "done"
+
+    asyncio.run(scenario())
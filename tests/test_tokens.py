@@ -0,0 +1,197 @@
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from jose import JWTError
+
+import api.routes.auth
+import db.session
+from core.revocation import BloomFilter, RevocationList, revocation_list
+from core.security import REFRESH_TOKEN_TYPE, create_token_pair, decode_token
+from core.tokens import VerifiedTokenCache, build_backend
+
+
+user = SimpleNamespace(user_id=uuid.uuid4(), email="user@example.com", role=["user"])
+
+
+def test_token_pair_shares_session():
+    """Access- и refresh-токены относятся к одной сессии и не взаимозаменяемы"""
+    tokens = create_token_pair(user)
+
+    access = decode_token(tokens["access_token"])
+    refresh = decode_token(tokens["refresh_token"], REFRESH_TOKEN_TYPE)
+    assert access["sid"] == refresh["sid"]
+    assert access["uid"] == str(user.user_id)
+    assert "jti" in refresh
+
+    with pytest.raises(JWTError):
+        decode_token(tokens["refresh_token"])
+    with pytest.raises(JWTError):
+        decode_token(tokens["access_token"], REFRESH_TOKEN_TYPE)
+
+
+def test_revocation_list():
+    """Отозванные идентификаторы находятся, остальные отсекаются фильтром Блума"""
+    revoked = RevocationList(capacity=4)
+    ids = [uuid.uuid4().hex for _ in range(10)]
+    for token_id in ids:
+        revoked.add(token_id)
+
+    assert all(revoked.is_revoked(token_id) for token_id in ids)
+    assert not revoked.is_revoked(uuid.uuid4().hex)
+    assert revoked.capacity >= len(ids)
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"in-{i}")
+
+    false_positives = sum(f"out-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_verified_token_cache_respects_expiry():
+    """Кэш не отдаёт токен после его exp и ограничен по размеру"""
+    cache = VerifiedTokenCache(maxsize=2)
+    cache.put("a", {"exp": time.time() + 60})
+    cache.put("expired", {"exp": time.time() - 1})
+    cache.put("b", {"exp": time.time() + 60})
+    cache.put("c", {"exp": time.time() + 60})
+
+    assert cache.get("expired") is None
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+    assert len(cache) == 2
+
+
+def test_eddsa_with_pyjwt_backend():
+    pytest.importorskip("jwt")
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+    private_key = Ed25519PrivateKey.generate()
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+    config = SimpleNamespace(
+        ALGORITHM="EdDSA", JWT_BACKEND="pyjwt", SECRET_KEY="unused",
+        JWT_PRIVATE_KEY=private_pem, JWT_PUBLIC_KEY=public_pem,
+    )
+
+    backend = build_backend(config)
+    token = backend.encode({"sub": "user@example.com", "exp": int(time.time()) + 60})
+    assert backend.decode(token)["sub"] == "user@example.com"
+
+    signing_input, signature = token.rsplit(".", 1)
+    tampered = ("B" if signature[0] == "A" else "A") + signature[1:]
+    with pytest.raises(JWTError):
+        backend.decode(f"{signing_input}.{tampered}")
+
+
+class FakeSession:
+    def __init__(self, revoked):
+        self.info = {}
+        self.revoked = revoked
+        self.pending = set()
+
+    async def commit(self):
+        self.revoked.update(self.pending)
+        self.pending.clear()
+
+    async def rollback(self):
+        self.pending.clear()
+
+    async def close(self):
+        pass
+
+
+class FakeTokenDAL:
+    """revoked_tokens with its primary key: an id is inserted at most once"""
+
+    def __init__(self, session):
+        self.session = session
+
+    async def revoke(self, token_id, expires_at):
+        if token_id in self.session.revoked or token_id in self.session.pending:
+            return False
+        self.session.pending.add(token_id)
+        return True
+
+    async def is_revoked(self, *token_ids):
+        return any(token_id in self.session.revoked | self.session.pending for token_id in token_ids)
+
+
+@pytest.fixture
+def auth_client(monkeypatch):
+    revoked = set()
+
+    async def get_user_by_id(self, user_id):
+        return user
+
+    monkeypatch.setattr(db.session, "async_session", lambda: FakeSession(revoked))
+    monkeypatch.setattr(api.routes.auth, "TokenDAL", FakeTokenDAL)
+    monkeypatch.setattr(api.routes.auth.UserDAL, "get_user_by_id", get_user_by_id)
+
+    app = FastAPI()
+    app.include_router(api.routes.auth.router)
+    return TestClient(app), revoked
+
+
+def test_refresh_rotates_token(auth_client):
+    """Refresh выдаёт новую пару в той же сессии и отзывает старый refresh-токен"""
+    client, revoked = auth_client
+    tokens = create_token_pair(user)
+    old = decode_token(tokens["refresh_token"], REFRESH_TOKEN_TYPE)
+
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    new = decode_token(response.json()["refresh_token"], REFRESH_TOKEN_TYPE)
+    assert new["sid"] == old["sid"]
+    assert new["jti"] != old["jti"]
+    assert revoked == {old["jti"]}
+    assert revocation_list.is_revoked(old["jti"])
+
+    response = client.post("/auth/refresh", json={"refresh_token": response.json()["refresh_token"]})
+    assert response.status_code == 200
+
+
+def test_refresh_reuse_kills_session(auth_client):
+    """Повторное использование refresh-токена завершает всю сессию"""
+    client, revoked = auth_client
+    tokens = create_token_pair(user)
+    sid = decode_token(tokens["refresh_token"], REFRESH_TOKEN_TYPE)["sid"]
+
+    rotated = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert rotated.status_code == 200
+
+    # The second request with the same token loses the insert of its jti
+    reused = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert reused.status_code == 401
+    assert sid in revoked
+    assert revocation_list.is_revoked(sid)
+
+    # The pair issued by the first refresh dies with the session
+    response = client.post("/auth/refresh", json={"refresh_token": rotated.json()["refresh_token"]})
+    assert response.status_code == 401
+
+
+def test_logout_revokes_session(auth_client):
+    """Выход отзывает сессию, после чего refresh-токен не принимается"""
+    client, revoked = auth_client
+    tokens = create_token_pair(user)
+    sid = decode_token(tokens["refresh_token"], REFRESH_TOKEN_TYPE)["sid"]
+
+    assert client.post("/auth/logout", json={"refresh_token": tokens["refresh_token"]}).status_code == 204
+    assert sid in revoked
+    assert revocation_list.is_revoked(sid)
+
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+    assert client.post("/auth/logout", json={"refresh_token": "garbage"}).status_code == 401
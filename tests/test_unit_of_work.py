@@ -0,0 +1,89 @@
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+import db.session
+from api.dependencies.db import UnitOfWork
+from db.session import after_commit
+
+
+class FakeSession:
+    def __init__(self, fail_commit=False):
+        self.info = {}
+        self.events = []
+        self.fail_commit = fail_commit
+
+    async def commit(self):
+        if self.fail_commit:
+            raise ConnectionError("commit failed")
+        self.events.append("commit")
+
+    async def rollback(self):
+        self.events.append("rollback")
+
+    async def close(self):
+        self.events.append("close")
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    created = []
+    options = {}
+
+    def factory():
+        session = FakeSession(**options)
+        created.append(session)
+        return session
+
+    monkeypatch.setattr(db.session, "async_session", factory)
+    return created, options
+
+
+app = FastAPI()
+side_effects = []
+
+
+@app.post("/ok")
+async def ok(session=UnitOfWork):
+    after_commit(session, lambda: side_effects.append("notified"))
+    return {"ok": True}
+
+
+@app.post("/fail")
+async def fail(session=UnitOfWork):
+    after_commit(session, lambda: side_effects.append("notified"))
+    raise HTTPException(400, "Ошибка")
+
+
+client = TestClient(app, raise_server_exceptions=False)
+
+
+def test_commits_on_success_and_runs_callbacks(sessions):
+    """Успешный запрос коммитится одной транзакцией, затем выполняются колбэки"""
+    created, _ = sessions
+    side_effects.clear()
+
+    assert client.post("/ok").status_code == 200
+    assert created[0].events == ["commit", "close"]
+    assert side_effects == ["notified"]
+
+
+def test_rolls_back_on_error(sessions):
+    """Ошибка в обработчике откатывает транзакцию, колбэки не вызываются"""
+    created, _ = sessions
+    side_effects.clear()
+
+    assert client.post("/fail").status_code == 400
+    assert created[0].events == ["rollback", "close"]
+    assert side_effects == []
+
+
+def test_failed_commit_reaches_the_client(sessions):
+    """Коммит выполняется до отправки ответа, поэтому его ошибка видна клиенту"""
+    created, options = sessions
+    options["fail_commit"] = True
+    side_effects.clear()
+
+    assert client.post("/ok").status_code == 500
+    assert created[0].events == ["rollback", "close"]
+    assert side_effects == []
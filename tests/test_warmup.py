@@ -0,0 +1,59 @@
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+
+from db.warmup import _run_hot_statements
+
+
+class FakeResult:
+    rowcount = 0
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return []
+
+    def first(self):
+        return None
+
+    def __iter__(self):
+        return iter([])
+
+    def scalar_one(self):
+        return 0
+
+    def scalar_one_or_none(self):
+        return None
+
+    def scalar(self):
+        return None
+
+    def fetchone(self):
+        return None
+
+
+class FakeSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement, params=None, **kwargs):
+        # Compiling catches statements the real driver would reject
+        self.statements.append(str(statement.compile(dialect=postgresql.asyncpg.dialect())))
+        return FakeResult()
+
+    async def scalar(self, statement, params=None, **kwargs):
+        await self.execute(statement, params)
+        return None
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return (await self.execute(statement, params)).scalars()
+
+
+def test_hot_statements_run_against_session():
+    """Прогрев выполняет горячие запросы на переданной сессии без ошибок и ничего не изменяет"""
+    session = FakeSession()
+    asyncio.run(_run_hot_statements(session))
+    assert any("FROM products" in statement for statement in session.statements)
+    assert len(session.statements) >= 7
+    assert all(statement.lstrip().startswith("SELECT") for statement in session.statements)